@@ -0,0 +1,73 @@
+import hashlib
+import os
+import threading
+from pathlib import Path
+
+import numpy as np
+
+from common.audio_mix import decode_audio, SAMPLE_RATE
+
+# fixed_assets（BGM・効果音）をデコード済みPCMとして使い回すキャッシュ
+# キーは「ファイル内容のハッシュ + サンプルレート」。プロセス内（メモリ）とディスク（.npy）の2段構え
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+DEFAULT_CACHE_DIR = ROOT_DIR / "cache" / "audio"
+
+_memory = {}
+_hashes = {}  # (パス, 更新時刻, サイズ) → ファイルハッシュ
+_lock = threading.Lock()
+stats = {"memory": 0, "disk": 0, "decode": 0}
+
+
+def file_hash(path: Path) -> str:
+    """
+    ファイル内容の sha256。同じファイル（更新時刻・サイズが同じ）は再計算しない
+    """
+    st = path.stat()
+    key = (str(path.resolve()), st.st_mtime_ns, st.st_size)
+    with _lock:
+        if key in _hashes:
+            return _hashes[key]
+
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    digest = h.hexdigest()
+
+    with _lock:
+        _hashes[key] = digest
+    return digest
+
+
+def get_decoded_asset(path: Path, sample_rate: int = SAMPLE_RATE) -> np.ndarray:
+    """
+    デコード・リサンプル済みの (サンプル数, 2) float32 配列を返す（読み取り専用）。
+    メモリ → ディスク（cache/audio/{hash}_{sr}.npy）→ デコード の順に探す。
+    """
+    path = Path(path)
+    key = (file_hash(path), sample_rate)
+    with _lock:
+        if key in _memory:
+            stats["memory"] += 1
+            return _memory[key]
+
+    cache_dir = Path(os.getenv("AUDIO_CACHE_DIR", str(DEFAULT_CACHE_DIR)))
+    npy_path = cache_dir / f"{key[0]}_{sample_rate}.npy"
+    if npy_path.exists():
+        samples = np.load(npy_path, mmap_mode="r")
+        stats["disk"] += 1
+    else:
+        samples = decode_audio(path, sample_rate)
+        cache_dir.mkdir(parents=True, exist_ok=True)
+        tmp_path = npy_path.with_name(f"{npy_path.stem}.{os.getpid()}.{threading.get_ident()}.tmp.npy")
+        np.save(tmp_path, samples)
+        os.replace(tmp_path, npy_path)
+        stats["decode"] += 1
+        print(f"💾 固定素材をデコードしてキャッシュ: {path.name} → {npy_path.name}")
+
+    samples = np.asarray(samples)
+    samples.flags.writeable = False
+    with _lock:
+        _memory[key] = samples
+    return samples
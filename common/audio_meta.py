@@ -0,0 +1,103 @@
+import os
+import struct
+import subprocess
+import threading
+from pathlib import Path
+
+# 音声ファイルのメタ情報（長さなど）を、デコードせずヘッダから読み取る共通処理
+# 結果は「パス + 更新時刻 + サイズ」単位でプロセス内にキャッシュする
+
+_cache = {}
+_lock = threading.Lock()
+stats = {"hit": 0, "miss": 0}
+
+
+class WavInfo:
+    def __init__(self, sample_rate: int, channels: int, bits_per_sample: int, data_bytes: int):
+        self.sample_rate = sample_rate
+        self.channels = channels
+        self.bits_per_sample = bits_per_sample
+        self.data_bytes = data_bytes
+
+    @property
+    def n_frames(self) -> int:
+        return self.data_bytes // max(self.channels * self.bits_per_sample // 8, 1)
+
+    @property
+    def duration(self) -> float:
+        return self.n_frames / self.sample_rate
+
+
+def read_wav_header(path: Path) -> WavInfo:
+    """
+    RIFF/WAVE のチャンクをたどり、fmt と data の情報だけを読む（音声データ本体は読まない）
+    PCM以外（float / WAVE_FORMAT_EXTENSIBLE）でも長さは正しく求まる
+    """
+    with open(path, "rb") as f:
+        riff, _, wave_id = struct.unpack("<4sI4s", f.read(12))
+        if riff not in (b"RIFF", b"RF64") or wave_id != b"WAVE":
+            raise ValueError(f"WAVファイルではありません: {path}")
+
+        fmt = None
+        while True:
+            header = f.read(8)
+            if len(header) < 8:
+                break
+            chunk_id, chunk_size = struct.unpack("<4sI", header)
+            if chunk_id == b"fmt ":
+                _, channels, sample_rate, _, _, bits = struct.unpack("<HHIIHH", f.read(16))
+                fmt = (sample_rate, channels, bits)
+                f.seek(chunk_size - 16 + (chunk_size & 1), os.SEEK_CUR)
+            elif chunk_id == b"data":
+                if fmt is None:
+                    break
+                # 書き込み途中などで data サイズが不正な場合はファイル末尾までとみなす
+                remaining = os.fstat(f.fileno()).st_size - f.tell()
+                if chunk_size == 0xFFFFFFFF or chunk_size > remaining:
+                    chunk_size = remaining
+                return WavInfo(fmt[0], fmt[1], fmt[2], chunk_size)
+            else:
+                f.seek(chunk_size + (chunk_size & 1), os.SEEK_CUR)
+
+    raise ValueError(f"WAVのfmt/dataチャンクが見つかりません: {path}")
+
+
+def probe_duration_ffprobe(path: Path) -> float:
+    """
+    WAV以外（mp3など）の長さを ffprobe で取得する
+    """
+    result = subprocess.run(
+        ["ffprobe", "-v", "error", "-show_entries", "format=duration", "-of", "csv=p=0", str(path)],
+        capture_output=True, text=True,
+    )
+    if result.returncode != 0 or not result.stdout.strip():
+        raise RuntimeError(f"❌ 音声の長さを取得できません: {path}")
+    return float(result.stdout.strip())
+
+
+def get_audio_duration(path: Path, known_duration: float = None) -> float:
+    """
+    音声ファイルの長さ（秒）を返す。
+    - known_duration（generate_audio が timing に記録した audio_duration など）があればそれを使う
+    - WAVはヘッダから、それ以外は ffprobe で取得し、パス+更新時刻+サイズでキャッシュする
+    """
+    if known_duration is not None:
+        return known_duration
+
+    path = Path(path)
+    st = path.stat()
+    key = (str(path.resolve()), st.st_mtime_ns, st.st_size)
+    with _lock:
+        if key in _cache:
+            stats["hit"] += 1
+            return _cache[key]
+
+    if path.suffix.lower() == ".wav":
+        duration = read_wav_header(path).duration
+    else:
+        duration = probe_duration_ffprobe(path)
+
+    with _lock:
+        _cache[key] = duration
+        stats["miss"] += 1
+    return duration
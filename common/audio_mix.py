@@ -0,0 +1,142 @@
+import subprocess
+import time
+import wave
+from pathlib import Path
+
+import numpy as np
+
+from common.constants import SILENCE_DURATION
+
+# ナレーション・BGM・効果音を NumPy で1本のWAVにミックスダウンする
+# すべて float32 / 44.1kHz / ステレオの配列にしてから、サンプル単位の位置に足し込む
+
+SAMPLE_RATE = 44100
+CHANNELS = 2
+
+
+def to_stereo(samples: np.ndarray) -> np.ndarray:
+    if samples.shape[1] == CHANNELS:
+        return samples
+    if samples.shape[1] == 1:
+        return np.repeat(samples, CHANNELS, axis=1)
+    return samples[:, :CHANNELS]
+
+
+def resample_linear(samples: np.ndarray, src_rate: int, dst_rate: int) -> np.ndarray:
+    """
+    線形補間によるリサンプリング（VOICEVOXの24kHz → 44.1kHz など）
+    """
+    if src_rate == dst_rate or len(samples) == 0:
+        return samples
+    n_out = int(round(len(samples) * dst_rate / src_rate))
+    src_pos = np.arange(n_out) * (src_rate / dst_rate)
+    src_idx = np.arange(len(samples))
+    return np.stack(
+        [np.interp(src_pos, src_idx, samples[:, ch]) for ch in range(samples.shape[1])], axis=1
+    ).astype(np.float32)
+
+
+def read_pcm_wav(path: Path) -> tuple[np.ndarray, int]:
+    """
+    PCM（8/16/32bit）のWAVを (サンプル数, チャンネル数) の float32 配列で読む
+    """
+    with wave.open(str(path), "rb") as wf:
+        n_channels = wf.getnchannels()
+        sampwidth = wf.getsampwidth()
+        rate = wf.getframerate()
+        raw = wf.readframes(wf.getnframes())
+
+    if sampwidth == 1:
+        data = (np.frombuffer(raw, dtype=np.uint8).astype(np.float32) - 128) / 128
+    elif sampwidth == 2:
+        data = np.frombuffer(raw, dtype="<i2").astype(np.float32) / 32768
+    elif sampwidth == 4:
+        data = np.frombuffer(raw, dtype="<i4").astype(np.float32) / 2147483648
+    else:
+        raise ValueError(f"未対応のサンプル幅です（{sampwidth * 8}bit）: {path}")
+    return data.reshape(-1, n_channels), rate
+
+
+def decode_with_ffmpeg(path: Path, sample_rate: int = SAMPLE_RATE) -> np.ndarray:
+    """
+    mp3 など WAV 以外を ffmpeg で float32 / ステレオ / sample_rate にデコードする
+    """
+    result = subprocess.run(
+        ["ffmpeg", "-v", "error", "-i", str(path), "-f", "f32le", "-acodec", "pcm_f32le",
+         "-ac", str(CHANNELS), "-ar", str(sample_rate), "-"],
+        capture_output=True,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"❌ 音声のデコードに失敗しました: {path}\n{result.stderr.decode(errors='ignore')}")
+    return np.frombuffer(result.stdout, dtype=np.float32).reshape(-1, CHANNELS)
+
+
+def decode_audio(path: Path, sample_rate: int = SAMPLE_RATE) -> np.ndarray:
+    """
+    音声ファイルを (サンプル数, 2) の float32 配列（sample_rate）にする
+    """
+    path = Path(path)
+    if path.suffix.lower() == ".wav":
+        try:
+            samples, rate = read_pcm_wav(path)
+            return resample_linear(to_stereo(samples), rate, sample_rate)
+        except (wave.Error, ValueError):
+            pass  # PCM以外のWAVは ffmpeg に任せる
+    return decode_with_ffmpeg(path, sample_rate)
+
+
+def add_at(buffer: np.ndarray, samples: np.ndarray, offset: int, gain: float = 1.0):
+    """
+    buffer の offset サンプル目から samples を足し込む（はみ出した分は捨てる）
+    """
+    if offset >= len(buffer) or offset < 0:
+        return
+    end = min(offset + len(samples), len(buffer))
+    buffer[offset:end] += samples[:end - offset] * gain
+
+
+def write_wav(path: Path, samples: np.ndarray, sample_rate: int = SAMPLE_RATE):
+    pcm = (np.clip(samples, -1.0, 1.0) * 32767).astype("<i2")
+    with wave.open(str(path), "wb") as wf:
+        wf.setnchannels(samples.shape[1])
+        wf.setsampwidth(2)
+        wf.setframerate(sample_rate)
+        wf.writeframes(pcm.tobytes())
+
+
+def mix_down(plan: dict, output_path: Path, sample_rate: int = SAMPLE_RATE,
+             decode=decode_audio, decode_asset=None) -> float:
+    """
+    plan（compose_video.build_render_plan の戻り値）の音声を1本のWAVに書き出し、長さ（秒）を返す。
+    - narration: 再生順に連結（各音声の後ろに SILENCE_DURATION の無音）
+    - bgm:       全体にループして volume を掛ける
+    - se:        start 秒の位置に volume を掛けて重ねる
+    decode / decode_asset には (path, sample_rate) → 配列 を返す関数を渡せる
+    （decode_asset は BGM・効果音用。common.asset_cache.get_decoded_asset でデコード結果を使い回す）
+    """
+    t0 = time.perf_counter()
+    decode_asset = decode_asset or decode
+    silence_samples = int(round(SILENCE_DURATION * sample_rate))
+
+    narration = [decode(item["path"], sample_rate) for item in plan["narration"]]
+    total = sum(len(samples) + silence_samples for samples in narration)
+    mix = np.zeros((total, CHANNELS), dtype=np.float32)
+
+    offset = 0
+    for samples in narration:
+        add_at(mix, samples, offset)
+        offset += len(samples) + silence_samples
+
+    if plan.get("bgm"):
+        bgm = decode_asset(plan["bgm"]["path"], sample_rate)
+        if len(bgm):
+            reps = -(-total // len(bgm))  # 切り上げ
+            mix += np.tile(bgm, (reps, 1))[:total] * plan["bgm"]["volume"]
+
+    for se in plan.get("se", []):
+        add_at(mix, decode_asset(se["path"], sample_rate), int(round(se["start"] * sample_rate)), se["volume"])
+
+    write_wav(output_path, mix, sample_rate)
+    duration = total / sample_rate
+    print(f"🎧 ミックスダウン完了（{duration:.2f}秒 / {time.perf_counter() - t0:.2f}秒）: {output_path}")
+    return duration
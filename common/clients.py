@@ -0,0 +1,62 @@
+import os
+import threading
+from functools import lru_cache
+
+# 各ステージで共有するクライアント群
+# 同一プロセス内では初回に生成したインスタンスを使い回す（ステージ・script_idをまたいで共有）
+
+_thread_local = threading.local()
+
+
+@lru_cache(maxsize=None)
+def get_openai_client():
+    """
+    OpenAIクライアントを返す。APIキーは呼び出し時点の環境変数 OPENAI_API_KEY を使用。
+    """
+    from openai import OpenAI
+    return OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+
+
+@lru_cache(maxsize=None)
+def get_http_session():
+    """
+    VOICEVOX / SD などのHTTP呼び出し用に、コネクションを使い回す requests.Session を返す。
+    """
+    import requests
+    return requests.Session()
+
+
+def get_tagger():
+    """
+    fugashi（MeCab）の形態素解析器を返す。辞書ロードが重いため1スレッド1回のみ生成する。
+    MeCab の Tagger はスレッドセーフではないため、スレッドごとに別のインスタンスを使う
+    （スケジューラのワーカースレッドから同時に呼ばれても安全）。
+    """
+    tagger = getattr(_thread_local, "tagger", None)
+    if tagger is None:
+        from fugashi import Tagger
+        tagger = _thread_local.tagger = Tagger()
+    return tagger
+
+
+@lru_cache(maxsize=None)
+def get_s3_client():
+    """
+    ローカル開発では環境変数または .env.s3 を使用、
+    RunPodなどのクラウド環境では自動認証（IAMロール）を使用する。
+    同一プロセス内では生成済みのクライアントを使い回す。
+    """
+    import boto3
+    aws_access_key = os.getenv("AWS_ACCESS_KEY_ID")
+    aws_secret_key = os.getenv("AWS_SECRET_ACCESS_KEY")
+    aws_region = os.getenv("AWS_DEFAULT_REGION")  # デフォルトを東京に
+
+    if aws_access_key and aws_secret_key:
+        return boto3.client(
+            "s3",
+            aws_access_key_id=aws_access_key,
+            aws_secret_access_key=aws_secret_key,
+            region_name=aws_region,
+        )
+    else:
+        return boto3.client("s3")  # IAMロールなど自動認証に任せる
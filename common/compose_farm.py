@@ -0,0 +1,156 @@
+import importlib
+import multiprocessing
+import os
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from concurrent.futures.process import BrokenProcessPool
+
+from common.encoder import ENCODER_THREADS_ENV
+from common.script_utils import get_next_script_id, mark_script_completed, lease_heartbeat
+from common.stage_scheduler import load_stage_concurrency
+from common.status_store import default_owner
+
+# 複数の script_id の compose をプロセスプールで同時に実行するワーカーファーム
+# - 同時実行数は COMPOSE_WORKERS（未設定なら config.json の stage_concurrency.compose）
+# - 各ワーカーの ffmpeg / libx264 のスレッド数は「コア数 ÷ 同時実行数」に制限する
+# - script_id ごとに成否を記録し、1本の失敗（ワーカーの異常終了も含む）でバッチを止めない
+
+TASK_NAME = "compose"
+
+_compose_module = None  # ワーカープロセス内で import した compose_video
+
+
+def plan_workers(workers: int = None) -> tuple[int, int]:
+    """
+    (同時実行数, 1ワーカーあたりのスレッド数) を返す
+    """
+    cores = os.cpu_count() or 1
+    if workers is None:
+        workers = int(os.getenv("COMPOSE_WORKERS", 0)) or load_stage_concurrency().get(TASK_NAME, 1)
+    workers = max(1, min(workers, cores))
+    return workers, max(1, cores // workers)
+
+
+def _init_worker(package: str, threads: int):
+    global _compose_module
+    os.environ[ENCODER_THREADS_ENV] = str(threads)
+    _compose_module = importlib.import_module(f"{package}.compose_video")
+
+
+def _compose_one(script_id: str, owner: str, status_path: str) -> dict:
+    """
+    ワーカープロセスで1本を合成する。例外はここで受け止めて結果として返す。
+    """
+    t0 = time.perf_counter()
+    try:
+        with lease_heartbeat(script_id, TASK_NAME, status_path, owner=owner) as heartbeat:
+            _compose_module.compose_video(script_id)
+        heartbeat.ensure_held()  # 途中で他のワーカーに取られていたら完了を記録しない
+        mark_script_completed(script_id, TASK_NAME, status_path)
+        return {"script_id": script_id, "ok": True, "elapsed": time.perf_counter() - t0}
+    except Exception as e:
+        traceback.print_exc()
+        return {"script_id": script_id, "ok": False, "elapsed": time.perf_counter() - t0,
+                "error": f"{type(e).__name__}: {e}"}
+
+
+class ComposeFarm:
+    """
+    script_id をリース付きで確保しながら、空いたワーカーに順に投入する。
+
+        ComposeFarm("generator", workers=4).run()
+
+    確保（リース取得）は親プロセスが行い、リースの延長と完了記録は同じ owner でワーカーが行う。
+    失敗した script_id はリースを返却して他のワーカーに任せ、同じ実行内では再確保しない。
+    """
+
+    def __init__(self, package: str = "generator", workers: int = None, max_scripts: int = None,
+                 status_path: str = "script_status.json"):
+        self.package = package
+        self.workers, self.threads = plan_workers(workers)
+        self.max_scripts = max_scripts
+        self.status_path = status_path
+        self.owner = default_owner()
+        self.results = []
+        self.inflight = {}  # future → script_id
+        self.pool = None
+
+    def _start_pool(self):
+        # 親プロセスは status ストア・boto3 クライアント（接続プール）を作成済みのため、fork で引き継がず spawn する
+        self.pool = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(self.package, self.threads),
+        )
+
+    def _claim(self) -> str:
+        if self.max_scripts is not None and len(self.results) + len(self.inflight) >= self.max_scripts:
+            return None
+        attempted = {r["script_id"] for r in self.results} | set(self.inflight.values())
+        return get_next_script_id(TASK_NAME, self.status_path, owner=self.owner, exclude=attempted)
+
+    def run(self) -> list[dict]:
+        print(f"🏭 composeファーム: {self.workers}並列 × {self.threads}スレッド（{self.package}）")
+        t0 = time.perf_counter()
+        exhausted = False
+        self._start_pool()
+        try:
+            while True:
+                while not exhausted and len(self.inflight) < self.workers:
+                    script_id = self._claim()
+                    if not script_id:
+                        exhausted = True
+                        break
+                    print(f"🎬 投入: {script_id}")
+                    self.inflight[self.pool.submit(_compose_one, script_id, self.owner, self.status_path)] = script_id
+
+                if not self.inflight:
+                    break
+
+                done, _ = wait(list(self.inflight), return_when=FIRST_COMPLETED)
+                broken = False
+                for future in done:
+                    script_id = self.inflight.pop(future)
+                    try:
+                        result = future.result()
+                    except BrokenProcessPool as e:
+                        # ワーカーが異常終了した（OOMなど）。同じプールの実行中タスクもすべて失敗扱いになる
+                        result = {"script_id": script_id, "ok": False, "elapsed": 0.0,
+                                  "error": f"ワーカー異常終了: {e}"}
+                        broken = True
+                    self.results.append(result)
+                    if result["ok"]:
+                        print(f"✅ 完了: {script_id}（{result['elapsed']:.1f}秒）")
+                    else:
+                        print(f"❌ エラー: {script_id} → {result['error']}")
+
+                if broken:
+                    for future, script_id in self.inflight.items():
+                        self.results.append({"script_id": script_id, "ok": False, "elapsed": 0.0,
+                                             "error": "ワーカー異常終了（同じプールで実行中）"})
+                        print(f"❌ エラー: {script_id} → ワーカー異常終了（同じプールで実行中）")
+                    self.inflight.clear()
+                    print("⚠️ ワーカープールを作り直します")
+                    self.pool.shutdown(wait=False, cancel_futures=True)
+                    self._start_pool()
+        finally:
+            self.pool.shutdown(wait=True)
+
+        self.report(time.perf_counter() - t0)
+        return self.results
+
+    def report(self, wall_seconds: float):
+        succeeded = [r for r in self.results if r["ok"]]
+        failed = [r for r in self.results if not r["ok"]]
+        per_hour = len(succeeded) / wall_seconds * 3600 if wall_seconds > 0 else 0.0
+        print(f"📊 compose: 成功 {len(succeeded)}本 / 失敗 {len(failed)}本 / {wall_seconds:.1f}秒"
+              f"（{per_hour:.1f}本/時, {self.workers}並列）")
+        if succeeded:
+            avg = sum(r["elapsed"] for r in succeeded) / len(succeeded)
+            print(f"⏱️ 1本あたり平均 {avg:.1f}秒")
+        if failed:
+            print("❌ 失敗した script_id:")
+            for r in failed:
+                print(f"- {r['script_id']}: {r['error']}")
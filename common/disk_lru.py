@@ -0,0 +1,73 @@
+import threading
+from pathlib import Path
+
+# ディスクキャッシュ共通のサイズ管理（LRU）
+# tts_cache / llm_cache / segment_cache から使う
+#
+# - 合計サイズは初回だけディレクトリを走査して求め、以降は書き込み・削除のたびに増減させる
+#   （書き込みごとにディレクトリ全体を glob + stat しない）
+# - 上限を超えたときだけ走査し、最終利用（mtime）が古いものから上限の low_water 倍まで削除する
+# - 他プロセスの書き込みはこのプロセスの合計に反映されないため、rescan_every 回ごとに走査し直して補正する
+
+DEFAULT_LOW_WATER = 0.9
+DEFAULT_RESCAN_EVERY = 500
+
+
+class DiskLRU:
+    def __init__(self, cache_dir: Path, pattern: str, max_bytes: int,
+                 low_water: float = DEFAULT_LOW_WATER, rescan_every: int = DEFAULT_RESCAN_EVERY):
+        self.cache_dir = Path(cache_dir)
+        self.pattern = pattern
+        self.max_bytes = max_bytes
+        self.low_water = low_water
+        self.rescan_every = rescan_every
+        self._total = None  # 未走査
+        self._writes = 0
+        self._lock = threading.Lock()
+
+    def _scan(self) -> list[tuple[float, int, Path]]:
+        entries = []
+        for path in self.cache_dir.glob(self.pattern):
+            try:
+                st = path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((st.st_mtime, st.st_size, path))
+        return entries
+
+    def added(self, size: int, replaced_size: int = 0):
+        """
+        ファイルを1つ書き込んだ（同じキーを上書きした場合は replaced_size に元のサイズ）。必要なら削除する
+        """
+        with self._lock:
+            self._writes += 1
+            if self._total is None or self._writes % self.rescan_every == 0:
+                self._total = sum(size for _, size, _ in self._scan())
+            else:
+                self._total += size - replaced_size
+            if self._total > self.max_bytes:
+                self._evict_locked()
+
+    def removed(self, size: int):
+        """
+        キャッシュ側でファイルを削除した（有効期限切れなど）
+        """
+        with self._lock:
+            if self._total is not None:
+                self._total = max(self._total - size, 0)
+
+    def evict(self):
+        with self._lock:
+            self._evict_locked()
+
+    def _evict_locked(self):
+        entries = self._scan()
+        total = sum(size for _, size, _ in entries)
+        if total > self.max_bytes:
+            target = self.max_bytes * self.low_water
+            for _, size, path in sorted(entries):
+                path.unlink(missing_ok=True)
+                total -= size
+                if total <= target:
+                    break
+        self._total = total
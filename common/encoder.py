@@ -0,0 +1,178 @@
+import json
+import os
+import subprocess
+import time
+from functools import lru_cache
+from pathlib import Path
+
+# ffmpeg の H.264 エンコーダ選択
+# 実行環境で使えるエンコーダを起動時に1回だけ調べ、nvenc → qsv → vaapi → libx264 の順で選ぶ
+# デコード側の -hwaccel は、ffmpeg -hwaccels の一覧にある場合だけ付ける
+# どのエンコーダでも CBR 4Mbps / baseline 相当の設定にそろえる
+
+CONFIG_PATH = Path(__file__).resolve().parents[1] / "config" / "config.json"
+
+ENCODERS = {
+    "nvenc": {
+        "codec": "h264_nvenc",
+        "hwaccel": ["-hwaccel", "cuda"],
+        "args": [
+            "-c:v", "h264_nvenc", "-preset", "slow", "-rc", "cbr",
+            "-b:v", "4000k", "-maxrate", "4000k", "-bufsize", "8000k",
+            "-pix_fmt", "yuv420p", "-profile:v", "baseline", "-level", "4.0",
+        ],
+    },
+    "qsv": {
+        "codec": "h264_qsv",
+        "hwaccel": ["-hwaccel", "qsv"],
+        "args": [
+            "-c:v", "h264_qsv", "-preset", "medium",
+            "-b:v", "4000k", "-maxrate", "4000k", "-bufsize", "8000k",
+            "-pix_fmt", "nv12", "-profile:v", "baseline", "-level", "40",
+        ],
+    },
+    "vaapi": {
+        "codec": "h264_vaapi",
+        "hwaccel": [],
+        "init": ["-vaapi_device", "/dev/dri/renderD128"],
+        # フィルタ出力をGPUメモリへ渡してからエンコードする
+        "filter": "format=nv12,hwupload",
+        "args": [
+            "-c:v", "h264_vaapi", "-rc_mode", "CBR",
+            "-b:v", "4000k", "-maxrate", "4000k", "-bufsize", "8000k",
+            "-profile:v", "constrained_baseline", "-level", "40",
+        ],
+    },
+    "libx264": {
+        "codec": "libx264",
+        "hwaccel": [],
+        "args": [
+            "-c:v", "libx264", "-preset", "medium",
+            "-b:v", "4000k", "-maxrate", "4000k", "-bufsize", "8000k",
+            "-pix_fmt", "yuv420p", "-profile:v", "baseline", "-level", "4.0",
+            "-x264-params", "nal-hrd=cbr:force-cfr=1",
+        ],
+    },
+}
+
+AUTO_ORDER = ["nvenc", "qsv", "vaapi", "libx264"]
+
+# 1プロセスあたりのエンコード・フィルタのスレッド数（compose_farm が並列数に合わせて設定する）
+ENCODER_THREADS_ENV = "FFMPEG_ENCODER_THREADS"
+
+
+@lru_cache(maxsize=None)
+def probe_ffmpeg() -> dict:
+    """
+    ffmpeg に組み込まれたエンコーダ・hwaccel の一覧を返す（1プロセス1回のみ実行）
+    """
+    def listing(flag: str) -> str:
+        try:
+            result = subprocess.run(["ffmpeg", "-hide_banner", flag], capture_output=True, text=True, timeout=30)
+            return result.stdout
+        except (OSError, subprocess.TimeoutExpired):
+            return ""
+
+    encoders = {line.split()[1] for line in listing("-encoders").splitlines()
+                if len(line.split()) > 1 and line.split()[0].startswith("V")}
+    hwaccels = {line.strip() for line in listing("-hwaccels").splitlines()[1:] if line.strip()}
+    return {"encoders": encoders, "hwaccels": hwaccels}
+
+
+@lru_cache(maxsize=None)
+def is_encoder_usable(name: str) -> bool:
+    """
+    一覧にあるだけでなく、実際に短いテスト映像をエンコードできるかを確認する
+    （GPUやドライバがないマシンでは一覧にあっても失敗するため）
+    """
+    spec = ENCODERS[name]
+    if spec["codec"] not in probe_ffmpeg()["encoders"]:
+        return False
+
+    vf = "format=yuv420p"
+    if spec.get("filter"):
+        vf += "," + spec["filter"]
+    cmd = [
+        "ffmpeg", "-hide_banner", "-loglevel", "error", *spec.get("init", []),
+        "-f", "lavfi", "-i", "color=c=black:s=256x256:r=30:d=0.2",
+        "-vf", vf, *spec["args"], "-f", "null", "-",
+    ]
+    try:
+        return subprocess.run(cmd, capture_output=True, timeout=30).returncode == 0
+    except (OSError, subprocess.TimeoutExpired):
+        return False
+
+
+def load_encoder_preference(config_path: Path = CONFIG_PATH) -> str:
+    if config_path.exists():
+        with open(config_path, "r", encoding="utf-8") as f:
+            return json.load(f).get("video_encoder", "auto")
+    return "auto"
+
+
+def resolve_encoder(name: str) -> dict:
+    """
+    ENCODERS[name] に名前を付けて返す。-hwaccel の種類（cuda / qsv）が ffmpeg にない場合は付けない
+    """
+    spec = {"name": name, **ENCODERS[name]}
+    if spec["hwaccel"] and spec["hwaccel"][1] not in probe_ffmpeg()["hwaccels"]:
+        print(f"⚠️ hwaccel {spec['hwaccel'][1]} が使えないため、デコードはCPUで行います（encoder={name}）")
+        spec["hwaccel"] = []
+    return spec
+
+
+@lru_cache(maxsize=None)
+def select_encoder(preference: str = None) -> dict:
+    """
+    使用するエンコーダの設定を返す。
+    preference（未指定時は config.json の video_encoder）が "auto" なら使えるものを自動選択、
+    名前指定で使えない場合は警告して自動選択にフォールバックする。
+    """
+    preference = preference or load_encoder_preference()
+    if preference != "auto":
+        if preference in ENCODERS and is_encoder_usable(preference):
+            print(f"🎛️ エンコーダ: {preference}（config指定）")
+            return resolve_encoder(preference)
+        print(f"⚠️ 指定のエンコーダ {preference} は使用できません。自動選択します。")
+
+    for name in AUTO_ORDER:
+        if name == "libx264" or is_encoder_usable(name):
+            print(f"🎛️ エンコーダ: {name}（自動選択）")
+            return resolve_encoder(name)
+
+
+def encoder_threads() -> int:
+    """
+    環境変数 FFMPEG_ENCODER_THREADS の値（未設定なら None = ffmpeg に任せる）
+    """
+    value = os.getenv(ENCODER_THREADS_ENV)
+    return int(value) if value else None
+
+
+def thread_args() -> list[str]:
+    """
+    出力オプションとしての -threads（未設定なら空）
+    """
+    threads = encoder_threads()
+    return ["-threads", str(threads)] if threads else []
+
+
+def with_encoder_filter(encoder: dict, vf: str) -> str:
+    """
+    映像フィルタの末尾に、エンコーダが必要とする変換（vaapi の hwupload など）を追加する
+    """
+    return f"{vf},{encoder['filter']}" if encoder.get("filter") else vf
+
+
+def run_encode(cmd: list[str], label: str, encoder: dict) -> float:
+    """
+    ffmpeg を実行して所要時間（秒）を返す。失敗時は RuntimeError。
+    """
+    print(f"[{label}] {' '.join(cmd)}")
+    t0 = time.perf_counter()
+    result = subprocess.run(cmd)
+    elapsed = time.perf_counter() - t0
+    if result.returncode != 0:
+        raise RuntimeError(f"❌ {label}に失敗しました（encoder={encoder['name']}, code={result.returncode}）")
+    print(f"⏱️ {label}: {elapsed:.1f}秒（encoder={encoder['name']}）")
+    return elapsed
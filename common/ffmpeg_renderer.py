@@ -0,0 +1,216 @@
+from pathlib import Path
+
+from common.constants import SILENCE_DURATION
+from common.encoder import select_encoder, with_encoder_filter, run_encode, encoder_threads, thread_args
+from common.motion import PAN_OFFSET
+
+# compose_video の「1回のエンコードで完成版まで書き出す」ffmpegレンダラー
+# 画像/動画・パン/ズーム・ナレーション連結・BGMループ・効果音・ASS字幕を1つのfiltergraphにまとめる
+
+FPS = 30
+AUDIO_RATE = 44100
+AUDIO_FORMAT = f"aformat=sample_fmts=fltp:sample_rates={AUDIO_RATE}:channel_layouts=stereo"
+
+AUDIO_ARGS = ["-c:a", "aac", "-b:a", "128k", "-ar", str(AUDIO_RATE), "-ac", "2"]
+
+
+
+def escape_filter_path(path: Path) -> str:
+    """
+    filtergraph内でファイルパスを指定するためのエスケープ（Windowsのドライブレター対策を含む）
+    """
+    return Path(path).as_posix().replace("\\", "/").replace(":", "\\:").replace("'", "\\'")
+
+
+def pan_expressions(effect: str, duration: float) -> tuple[str, str]:
+    """
+    crop の x / y に渡す式。中央から ±PAN_OFFSET px を duration 秒かけて移動する
+    （common.motion.motion_curves と同じ動き）
+    """
+    move = f"{PAN_OFFSET}*(1-2*min(t/{duration:.3f},1))"
+    x, y = "(iw-ow)/2", "(ih-oh)/2"
+    if effect == "pan_up":
+        return x, f"{y}+{move}"
+    if effect == "pan_down":
+        return x, f"{y}-{move}"
+    if effect == "pan_left":
+        return f"{x}+{move}", y
+    if effect == "pan_right":
+        return f"{x}-{move}", y
+    if effect == "pan_diag":
+        return f"{x}-{move}", f"{y}-{move}"
+    return x, y
+
+
+def pan_scale_filter(frame_size: tuple) -> str:
+    """
+    パンの移動量（上下左右 PAN_OFFSET px）の余白がない素材だけ、縦横比を保って拡大する scale フィルタ
+    （長尺の 1280x720 画像をそのまま 1280x720 で切り出すと、crop の x / y が 0 に丸められて動かない）
+    """
+    fw, fh = frame_size
+    factor = f"max(1,max({fw + 2 * PAN_OFFSET}/iw,{fh + 2 * PAN_OFFSET}/ih))"
+    return f"scale=w='ceil(iw*{factor}/2)*2':h='ceil(ih*{factor}/2)*2'"
+
+
+def zoom_expression(effect: str, duration: float) -> str:
+    """
+    zoompan の z に渡す式（on は出力フレーム番号）
+    """
+    progress = f"min(on/{FPS}/{duration:.3f},1)"
+    if effect == "zoom_in":
+        return f"1+0.1*{progress}"
+    if effect == "zoom_out":
+        return f"1.1-0.1*{progress}"
+    return "1"
+
+
+def build_segment_filter(index: int, segment: dict, frame_size: tuple, canvas_size: tuple) -> str:
+    """
+    1つの背景素材（画像 or 動画）を「フレームサイズに切り出し → キャンバス中央に配置」するフィルタ
+    """
+    fw, fh = frame_size
+    cw, ch = canvas_size
+    duration = segment["duration"]
+    effect = segment.get("effect")
+
+    if segment["type"] == "video":
+        # 動画は中央をそのまま切り出すだけ（足りない尺は最終フレームで埋める）
+        chain = [
+            f"fps={FPS}",
+            f"crop='min(iw,{fw})':'min(ih,{fh})'",
+            f"tpad=stop_mode=clone:stop_duration={duration:.3f}",
+        ]
+    elif effect and effect.startswith("pan_"):
+        x, y = pan_expressions(effect, duration)
+        chain = [pan_scale_filter(frame_size), f"crop={fw}:{fh}:'{x}':'{y}'"]
+    elif effect and effect.startswith("zoom_"):
+        z = zoom_expression(effect, duration)
+        chain = [
+            f"crop={fw}:{fh}",
+            f"zoompan=z='{z}':x='iw/2-(iw/zoom/2)':y='ih/2-(ih/zoom/2)':d=1:s={fw}x{fh}:fps={FPS}",
+        ]
+    else:
+        chain = [f"scale={fw}:{fh}"]
+
+    chain += [
+        f"trim=duration={duration:.3f}",
+        "setpts=PTS-STARTPTS",
+        f"fps={FPS}",
+        "setsar=1",
+        f"pad={cw}:{ch}:(ow-iw)/2:(oh-ih)/2:black",
+        "format=yuv420p",
+    ]
+    return f"[{index}:v]" + ",".join(chain) + f"[v{index}]"
+
+
+def build_audio_filters(plan: dict, inputs: list, n: int, video_duration: float) -> list[str]:
+    """
+    ナレーション連結・BGMループ・効果音を filtergraph で合成する（ミックスダウン済みWAVがない場合）
+    inputs には必要な入力を追記する。n は次の入力番号。
+    """
+    filters = []
+    narration_labels = []
+    for item in plan["narration"]:
+        inputs += ["-i", str(item["path"])]
+        filters.append(f"[{n}:a]{AUDIO_FORMAT},apad=pad_dur={SILENCE_DURATION}[a{n}]")
+        narration_labels.append(f"[a{n}]")
+        n += 1
+    filters.append("".join(narration_labels) + f"concat=n={len(narration_labels)}:v=0:a=1[narration]")
+
+    mix_labels = ["[narration]"]
+    if plan.get("bgm"):
+        inputs += ["-stream_loop", "-1", "-i", str(plan["bgm"]["path"])]
+        filters.append(f"[{n}:a]{AUDIO_FORMAT},volume={plan['bgm']['volume']},atrim=duration={video_duration:.3f}[bgm]")
+        mix_labels.append("[bgm]")
+        n += 1
+
+    for se in plan.get("se", []):
+        delay_ms = int(round(se["start"] * 1000))
+        inputs += ["-i", str(se["path"])]
+        filters.append(f"[{n}:a]{AUDIO_FORMAT},volume={se['volume']},adelay={delay_ms}:all=1[se{n}]")
+        mix_labels.append(f"[se{n}]")
+        n += 1
+
+    if len(mix_labels) > 1:
+        # moviepy の CompositeAudioClip と同じく単純加算（normalize=0）
+        filters.append("".join(mix_labels) + f"amix=inputs={len(mix_labels)}:duration=first:dropout_transition=0:normalize=0[aout]")
+    else:
+        filters.append("[narration]anull[aout]")
+
+    return filters
+
+
+def build_render_command(plan: dict, output_path: Path, graph_path: Path,
+                         frame_size: tuple, canvas_size: tuple, encoder: dict) -> list[str]:
+    """
+    plan（compose_video.build_render_plan の戻り値）から ffmpeg のコマンドを組み立て、
+    filtergraph を graph_path に書き出す。
+
+    plan:
+        segments:  [{"path", "type": "image"|"video", "duration", "effect"}]（表示順・隙間なし）
+        narration: [{"path"}]（再生順。各音声の後ろに SILENCE_DURATION の無音を足す）
+        bgm:       {"path", "volume"} or None（全体にループ）
+        se:        [{"path", "start", "volume"}]
+        ass:       字幕ファイル or None
+        mixed_audio: common.audio_mix でミックスダウン済みのWAV（あれば narration / bgm / se の代わりに使う）
+    """
+    inputs = []
+    filters = []
+    n = 0
+
+    # ---- 映像 ----
+    video_labels = []
+    for segment in plan["segments"]:
+        if segment["type"] == "image":
+            inputs += ["-loop", "1", "-framerate", str(FPS), "-t", f"{segment['duration']:.3f}", "-i", str(segment["path"])]
+        else:
+            inputs += ["-i", str(segment["path"])]
+        filters.append(build_segment_filter(n, segment, frame_size, canvas_size))
+        video_labels.append(f"[v{n}]")
+        n += 1
+
+    video_duration = sum(segment["duration"] for segment in plan["segments"])
+    filters.append("".join(video_labels) + f"concat=n={len(video_labels)}:v=1:a=0[vcat]")
+    vf = f"ass='{escape_filter_path(plan['ass'])}'" if plan.get("ass") else "null"
+    filters.append(f"[vcat]{with_encoder_filter(encoder, vf)}[vout]")
+
+    # ---- 音声 ----
+    if plan.get("mixed_audio"):
+        # common.audio_mix でミックスダウン済みのWAVをそのまま使う
+        inputs += ["-i", str(plan["mixed_audio"])]
+        filters.append(f"[{n}:a]{AUDIO_FORMAT}[aout]")
+        n += 1
+    else:
+        filters += build_audio_filters(plan, inputs, n, video_duration)
+
+    graph_path.parent.mkdir(parents=True, exist_ok=True)
+    graph_path.write_text(";\n".join(filters), encoding="utf-8")
+
+    threads = encoder_threads()
+    return [
+        "ffmpeg", "-y", "-hide_banner", "-loglevel", "error", "-stats",
+        *(["-filter_complex_threads", str(threads)] if threads else []),
+        *encoder.get("init", []),
+        *inputs,
+        "-filter_complex_script", str(graph_path),
+        "-map", "[vout]", "-map", "[aout]",
+        "-t", f"{video_duration:.3f}", "-r", str(FPS),
+        *encoder["args"], *thread_args(), *AUDIO_ARGS,
+        "-movflags", "+faststart",
+        str(output_path),
+    ]
+
+
+def render_single_pass(plan: dict, output_path: Path, frame_size: tuple, canvas_size: tuple,
+                       encoder: dict = None) -> float:
+    """
+    plan を1回のエンコードで output_path に書き出し、所要時間（秒）を返す。
+    encoder 未指定時は common.encoder.select_encoder() の結果を使う。
+    """
+    encoder = encoder or select_encoder()
+    output_path = Path(output_path)
+    graph_path = output_path.with_suffix(".filtergraph.txt")
+    cmd = build_render_command(plan, output_path, graph_path, frame_size, canvas_size, encoder)
+
+    print(f"🎞️ 1パス合成: 素材{len(plan['segments'])} / 音声{len(plan['narration'])} / 効果音{len(plan.get('se', []))} → {output_path}")
+    return run_encode(cmd, "1パス合成", encoder)
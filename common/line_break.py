@@ -0,0 +1,95 @@
+import asyncio
+import contextlib
+import json
+import os
+import time
+
+from common.llm_cache import async_chat_completion, get_llm_cache, LLMReplayMiss
+
+# 字幕の改行をGPTに依頼する処理（非同期で全シーン分を同時に投げる）
+# - 同時実行数: 環境変数 OPENAI_CONCURRENCY（既定 8）
+# - 送信レート: 環境変数 OPENAI_RPM（1分あたりのリクエスト数、既定 300）
+# - 結果は呼び出し側が渡したキー（scene_id など）に対応づけて返す
+# - 失敗したシーンは改行なしの元テキストのまま返す（従来の apply_ai_line_break と同じ）
+# - 応答は common.llm_cache に保存され、再実行時はAPIを呼ばない
+
+LINE_BREAK_MODEL = "gpt-4o"
+LINE_BREAK_TEMPERATURE = 0.7
+
+
+class AsyncRateLimiter:
+    """
+    リクエストの送信間隔を 60 / rate_per_minute 秒以上あける
+    """
+
+    def __init__(self, rate_per_minute: float):
+        self.interval = 60.0 / rate_per_minute if rate_per_minute > 0 else 0.0
+        self._next = 0.0
+        self._lock = asyncio.Lock()
+
+    async def wait(self):
+        async with self._lock:
+            now = time.monotonic()
+            delay = self._next - now
+            self._next = max(now, self._next) + self.interval
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+
+async def request_line_break(client, system_prompt: str, text: str, limiter: AsyncRateLimiter = None) -> str:
+    return await async_chat_completion(
+        client,
+        messages=[
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": json.dumps({"text": text}, ensure_ascii=False)}
+        ],
+        model=LINE_BREAK_MODEL,
+        temperature=LINE_BREAK_TEMPERATURE,
+        template=system_prompt,
+        limiter=limiter,
+    )
+
+
+async def _break_all(texts: dict, system_prompt: str, concurrency: int, rate_per_minute: float) -> dict:
+    from openai import AsyncOpenAI
+
+    semaphore = asyncio.Semaphore(concurrency)
+    limiter = AsyncRateLimiter(rate_per_minute)
+
+    # 非同期クライアントはイベントループに紐づくため、実行ごとに作って閉じる
+    # （replay only モードではAPIを呼ばないので作らない）
+    if get_llm_cache().replay_only:
+        client_context = contextlib.nullcontext()
+    else:
+        client_context = AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+
+    async with client_context as client:
+        async def one(key, text):
+            async with semaphore:
+                try:
+                    return key, await request_line_break(client, system_prompt, text, limiter)
+                except LLMReplayMiss:
+                    raise
+                except Exception as e:
+                    print(f"[LineBreak API Error] {key}: {e}")
+                    return key, text  # エラー時は改行なしでそのまま返す
+
+        results = await asyncio.gather(*(one(key, text) for key, text in texts.items()))
+    return dict(results)
+
+
+def break_lines_concurrently(texts: dict, system_prompt: str, concurrency: int = None,
+                             rate_per_minute: float = None) -> dict:
+    """
+    {キー: 字幕テキスト} をまとめて改行し、{キー: 改行済みテキスト} を返す
+    """
+    if not texts:
+        return {}
+    concurrency = concurrency or int(os.getenv("OPENAI_CONCURRENCY", 8))
+    rate_per_minute = rate_per_minute or float(os.getenv("OPENAI_RPM", 300))
+
+    t0 = time.perf_counter()
+    results = asyncio.run(_break_all(texts, system_prompt, concurrency, rate_per_minute))
+    print(f"✂️ AI改行: {len(texts)}件（同時{concurrency}件, {time.perf_counter() - t0:.1f}秒）")
+    get_llm_cache().report("AI改行")
+    return results
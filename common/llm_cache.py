@@ -0,0 +1,201 @@
+import bisect
+import hashlib
+import json
+import os
+import threading
+import time
+from functools import lru_cache
+from pathlib import Path
+
+from common.clients import get_openai_client
+from common.disk_lru import DiskLRU
+
+# GPT（chat.completions）の応答をディスクに保存して使い回す共通ラッパー
+# tag_generator / generate_subtitles / prompt_persona から使う
+#
+# - キー: モデル + テンプレートのハッシュ + 実際に送るメッセージ + temperature
+# - 有効期限（LLM_CACHE_TTL_HOURS）と合計サイズ上限（LLM_CACHE_MAX_MB）で古いものから削除
+# - キャッシュあり/なし別の応答時間ヒストグラムを集計
+# - LLM_REPLAY_ONLY=1 のときはAPIを呼ばず、キャッシュにないものは LLMReplayMiss にする（オフライン確認用）
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+DEFAULT_CACHE_DIR = ROOT_DIR / "cache" / "llm"
+DEFAULT_MAX_MB = 200
+DEFAULT_TTL_HOURS = 24 * 30
+
+LATENCY_BUCKETS_MS = [1, 10, 100, 500, 1000, 2000, 5000, 10000, 30000]
+
+
+class LLMReplayMiss(RuntimeError):
+    """
+    replay only モードで、キャッシュにない問い合わせが来た
+    """
+
+
+class LLMCache:
+    """
+    GPT応答のディスクキャッシュ（1応答 = 1 JSONファイル）。
+
+    - 有効期限切れのエントリは読み込み時に削除する
+    - 合計サイズが上限を超えたら、最終利用（mtime）が古いものから削除する（LRU、common.disk_lru）
+    - 複数スレッドから同時に使用可能（書き込みは一時ファイル → os.replace）
+    """
+
+    def __init__(self, cache_dir: Path = DEFAULT_CACHE_DIR, max_bytes: int = DEFAULT_MAX_MB * 1024 * 1024,
+                 ttl_seconds: float = DEFAULT_TTL_HOURS * 3600, replay_only: bool = False):
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.lru = DiskLRU(self.cache_dir, "*/*.json", max_bytes)
+        self.ttl_seconds = ttl_seconds
+        self.replay_only = replay_only
+        self.hits = 0
+        self.misses = 0
+        self.latency = {"cached": [0] * (len(LATENCY_BUCKETS_MS) + 1),
+                        "uncached": [0] * (len(LATENCY_BUCKETS_MS) + 1)}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(model: str, template: str, messages: list, temperature: float) -> str:
+        payload = json.dumps({
+            "model": model,
+            "template": hashlib.sha256(template.encode("utf-8")).hexdigest(),
+            "messages": messages,
+            "temperature": temperature,
+        }, ensure_ascii=False, sort_keys=True)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _path(self, key: str) -> Path:
+        # 1ディレクトリにファイルが集中しないよう先頭2文字で分ける
+        return self.cache_dir / key[:2] / f"{key}.json"
+
+    def get(self, key: str) -> str | None:
+        path = self._path(key)
+        try:
+            entry = json.loads(path.read_text(encoding="utf-8"))
+        except (FileNotFoundError, ValueError):
+            entry = None
+
+        if entry is not None and time.time() - entry.get("created_at", 0) > self.ttl_seconds:
+            size = path.stat().st_size if path.exists() else 0
+            path.unlink(missing_ok=True)
+            self.lru.removed(size)
+            entry = None
+
+        with self._lock:
+            if entry is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+        os.utime(path)  # 最終利用時刻を更新（LRU用）
+        return entry["response"]
+
+    def put(self, key: str, response: str, model: str):
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        body = json.dumps({"model": model, "created_at": time.time(), "response": response},
+                          ensure_ascii=False).encode("utf-8")
+        tmp_path.write_bytes(body)
+        replaced_size = path.stat().st_size if path.exists() else 0
+        os.replace(tmp_path, path)
+        self.lru.added(len(body), replaced_size)
+
+    def evict(self):
+        self.lru.evict()
+
+    def record_latency(self, cached: bool, seconds: float):
+        bucket = bisect.bisect_left(LATENCY_BUCKETS_MS, seconds * 1000)
+        with self._lock:
+            self.latency["cached" if cached else "uncached"][bucket] += 1
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "hit": self.hits,
+            "miss": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+        }
+
+    def stats_line(self) -> str:
+        s = self.stats()
+        return f"hit={s['hit']} / miss={s['miss']}（ヒット率 {s['hit_rate']:.0%}）"
+
+    def histogram_lines(self) -> list[str]:
+        labels = [f"≤{ms}ms" for ms in LATENCY_BUCKETS_MS] + [f">{LATENCY_BUCKETS_MS[-1]}ms"]
+        lines = []
+        for kind, counts in self.latency.items():
+            if not any(counts):
+                continue
+            cells = [f"{label}:{count}" for label, count in zip(labels, counts) if count]
+            lines.append(f"{kind}: " + " ".join(cells))
+        return lines
+
+    def report(self, label: str = "LLM"):
+        print(f"📊 {label}キャッシュ: {self.stats_line()}")
+        for line in self.histogram_lines():
+            print(f"   ⏱️ {line}")
+
+
+@lru_cache(maxsize=None)
+def get_llm_cache() -> LLMCache:
+    """
+    環境変数 LLM_CACHE_DIR / LLM_CACHE_MAX_MB / LLM_CACHE_TTL_HOURS / LLM_REPLAY_ONLY で設定を変更できる。
+    """
+    cache_dir = os.getenv("LLM_CACHE_DIR", str(DEFAULT_CACHE_DIR))
+    max_mb = float(os.getenv("LLM_CACHE_MAX_MB", DEFAULT_MAX_MB))
+    ttl_hours = float(os.getenv("LLM_CACHE_TTL_HOURS", DEFAULT_TTL_HOURS))
+    replay_only = os.getenv("LLM_REPLAY_ONLY") == "1"
+    return LLMCache(cache_dir, int(max_mb * 1024 * 1024), ttl_hours * 3600, replay_only)
+
+
+def _lookup(model: str, template: str, messages: list, temperature: float) -> tuple[str, str | None]:
+    cache = get_llm_cache()
+    key = cache.make_key(model, template, messages, temperature)
+    cached = cache.get(key)
+    if cached is None and cache.replay_only:
+        raise LLMReplayMiss(f"replay only モードでキャッシュにない問い合わせです（key={key[:12]}）")
+    return key, cached
+
+
+def chat_completion(messages: list, model: str = "gpt-4o", temperature: float = 0.7,
+                    template: str = "", client=None) -> str:
+    """
+    client.chat.completions.create の応答テキスト（strip済み）を返す。キャッシュがあればAPIを呼ばない。
+    template にはプロンプトテンプレートの原文を渡す（テンプレートを直したらキャッシュを使わない）。
+    """
+    cache = get_llm_cache()
+    t0 = time.perf_counter()
+    key, cached = _lookup(model, template, messages, temperature)
+    if cached is not None:
+        cache.record_latency(True, time.perf_counter() - t0)
+        return cached
+
+    client = client or get_openai_client()
+    response = client.chat.completions.create(model=model, messages=messages, temperature=temperature)
+    result = response.choices[0].message.content.strip()
+    cache.put(key, result, model)
+    cache.record_latency(False, time.perf_counter() - t0)
+    return result
+
+
+async def async_chat_completion(client, messages: list, model: str = "gpt-4o", temperature: float = 0.7,
+                                template: str = "", limiter=None) -> str:
+    """
+    chat_completion の非同期版（client は AsyncOpenAI）。
+    limiter（wait() を持つレート制限）はAPIを呼ぶときだけ待つ（キャッシュヒットは待たない）。
+    """
+    cache = get_llm_cache()
+    t0 = time.perf_counter()
+    key, cached = _lookup(model, template, messages, temperature)
+    if cached is not None:
+        cache.record_latency(True, time.perf_counter() - t0)
+        return cached
+
+    if limiter:
+        await limiter.wait()
+    response = await client.chat.completions.create(model=model, messages=messages, temperature=temperature)
+    result = response.choices[0].message.content.strip()
+    cache.put(key, result, model)
+    cache.record_latency(False, time.perf_counter() - t0)
+    return result
@@ -0,0 +1,164 @@
+import math
+import threading
+
+from common.clients import get_tagger
+
+# 字幕の改行位置を、形態素解析（fugashi）だけで決めるローカル改行エンジン
+# - 文節（自立語 + 付属語）の境目だけを改行候補にする
+# - 見た目の幅は generator_old/generate_ed.py の visual_wrap と同じく「半角 0.5 / 全角 1」で数える
+# - 各行の幅をそろえる（最少の行数で、行幅のばらつきが小さくなる位置を選ぶ）
+# - 読点・句点の直後は優先して改行し、括弧の内側ではなるべく改行しない
+# - max_lines 行・1行 max_width 以内に収まらないものは None を返す（呼び出し側で LLM に回す）
+
+# 直前の文節にくっつける品詞
+ATTACHED_POS = {"助詞", "助動詞", "接尾辞"}
+# 直後が動詞・形容詞の「非自立可能」（〜している / 警戒される など）でも文節を分けない品詞
+AUXILIARY_HOSTS = {"動詞", "助動詞", "形容詞"}
+
+# 文節の直後で改行する場合のコスト調整（行幅の二乗誤差と同じ単位。負なら改行しやすい）
+PUNCTUATION_BONUS = -4.0   # 読点・句点の直後
+BRACKET_PENALTY = 25.0     # 括弧（“”「」など）の内側
+
+stats = {"local": 0, "fallback": 0, "short": 0}
+_stats_lock = threading.Lock()  # スケジューラでは複数スレッドから同時に呼ばれる
+
+
+def _count(kind: str):
+    with _stats_lock:
+        stats[kind] += 1
+
+
+def visual_width(text: str) -> float:
+    """
+    半角＝0.5文字、全角＝1文字とみなした見た目の幅
+    """
+    return sum(0.5 if ch.isascii() else 1 for ch in text)
+
+
+def bunsetsu_chunks(text: str) -> list[tuple[str, float]]:
+    """
+    テキストを文節に分け、(文節, その直後で改行する場合のコスト調整) のリストを返す
+    """
+    chunks = []
+    prev = None           # 直前の形態素の (品詞, 品詞細分類)
+    open_bracket = False  # 開き括弧の直後（次の語と同じ文節にする）
+    depth = 0             # 括弧の入れ子の深さ
+
+    for word in get_tagger()(text):
+        pos1, pos2 = word.feature[0], word.feature[1]
+        surface = word.surface
+
+        if pos1 == "補助記号" and pos2 == "括弧開":
+            attach = open_bracket
+        elif pos1 == "補助記号":
+            attach = True
+        elif pos1 in ATTACHED_POS:
+            attach = True
+        elif pos2 == "非自立可能" and pos1 in ("動詞", "形容詞") and prev is not None:
+            # 「警戒 + さ(れる)」「し + て + いる」などは前とつなげる
+            attach = (prev[0] in AUXILIARY_HOSTS
+                      or (prev[0] == "名詞" and prev[1] == "普通名詞")
+                      or prev == ("助詞", "接続助詞"))
+        elif pos1 == "名詞" and prev is not None and prev[0] in ("名詞", "接頭辞"):
+            attach = True  # 複合名詞・接頭辞つきの語
+        else:
+            attach = open_bracket
+
+        if pos1 == "補助記号" and pos2 == "括弧開":
+            depth += 1
+        elif pos1 == "補助記号" and pos2 == "括弧閉":
+            depth = max(depth - 1, 0)
+
+        if attach and chunks:
+            chunks[-1][0] += surface
+        else:
+            chunks.append([surface, 0.0])
+
+        if depth > 0:
+            chunks[-1][1] = BRACKET_PENALTY
+        elif pos1 == "補助記号" and pos2 in ("読点", "句点"):
+            chunks[-1][1] = PUNCTUATION_BONUS
+        else:
+            chunks[-1][1] = 0.0
+
+        open_bracket = pos1 == "補助記号" and pos2 == "括弧開"
+        prev = (pos1, pos2)
+
+    return [(chunk, break_cost) for chunk, break_cost in chunks]
+
+
+def _best_split(widths: list[float], break_costs: list[float], n_lines: int, max_width: float):
+    """
+    文節の幅のリストを n_lines 行に分ける最適な区切り（各行の先頭の文節番号）を返す。できなければ None。
+    コスト = 各行の幅と平均幅の差の二乗和 + 区切る位置ごとのコスト調整（読点の直後は減、括弧の内側は増）
+    """
+    n = len(widths)
+    prefix = [0.0]
+    for w in widths:
+        prefix.append(prefix[-1] + w)
+    ideal = prefix[-1] / n_lines
+
+    # cost[j][i]: 先頭 i 文節を j 行にしたときの最小コスト
+    cost = [[math.inf] * (n + 1) for _ in range(n_lines + 1)]
+    back = [[0] * (n + 1) for _ in range(n_lines + 1)]
+    cost[0][0] = 0.0
+    for j in range(1, n_lines + 1):
+        for i in range(j, n + 1):
+            for k in range(j - 1, i):
+                if cost[j - 1][k] == math.inf:
+                    continue
+                width = prefix[i] - prefix[k]
+                if width > max_width:
+                    continue
+                c = cost[j - 1][k] + (width - ideal) ** 2
+                if k > 0:
+                    c += break_costs[k - 1]
+                if c < cost[j][i]:
+                    cost[j][i] = c
+                    back[j][i] = k
+
+    if cost[n_lines][n] == math.inf:
+        return None
+    starts = []
+    i = n
+    for j in range(n_lines, 0, -1):
+        i = back[j][i]
+        starts.append(i)
+    return starts[::-1]
+
+
+def break_line_locally(text: str, target_width: float, max_width: float, max_lines: int) -> str | None:
+    """
+    字幕1つ分のテキストに \\N を入れて返す。
+    - 幅が target_width 以内ならそのまま（無理に改行しない）
+    - max_lines 行・1行 max_width 以内に収まらなければ None
+    """
+    if visual_width(text) <= target_width:
+        _count("short")
+        return text
+
+    chunks = bunsetsu_chunks(text)
+    widths = [visual_width(chunk) for chunk, _ in chunks]
+    break_costs = [break_cost for _, break_cost in chunks]
+
+    min_lines = max(2, math.ceil(sum(widths) / max_width))
+    for n_lines in range(min_lines, max_lines + 1):
+        starts = _best_split(widths, break_costs, n_lines, max_width)
+        if starts is None:
+            continue
+        bounds = starts + [len(chunks)]
+        lines = ["".join(chunk for chunk, _ in chunks[bounds[j]:bounds[j + 1]]) for j in range(n_lines)]
+        _count("local")
+        return r"\N".join(lines)
+
+    _count("fallback")
+    return None
+
+
+def stats_line() -> str:
+    with _stats_lock:
+        s = dict(stats)
+    total = s["local"] + s["fallback"] + s["short"]
+    rate = s["fallback"] / total if total else 0.0
+    return (f"ローカル改行 {s['local']} / 改行不要 {s['short']} / "
+            f"LLMへ {s['fallback']}（フォールバック率 {rate:.0%}）")
@@ -1,3 +1,8 @@
+import json
+import os
+import re
+from pathlib import Path
+
 # 読み間違い補正辞書（全文一致で置換）
 MISREAD_REPLACEMENTS = {
     "良い人": "いいひと",
@@ -38,10 +43,70 @@ MISREAD_REPLACEMENTS = {
     "筋ポンプ": "きんぽんぷ"
 }
 
+# 辞書から生成した置換用の正規表現（add_misread_entries / reload_misread_dict で作り直す）
+_compiled_pattern = None  # (正規表現, 生成元の辞書)
+
+
+def reload_misread_dict():
+    """
+    MISREAD_REPLACEMENTS から置換用の正規表現を作り直す。
+    MISREAD_REPLACEMENTS を直接書き換えた場合は、このあと呼ぶこと（呼ぶまでは以前の内容で置換する）
+    """
+    global _compiled_pattern
+    source = dict(MISREAD_REPLACEMENTS)
+    # 長い語から並べることで、同じ位置では最長一致が優先される（例: 「睡眠不足」＞「不足」）
+    keys = sorted((k for k in source if k), key=len, reverse=True)
+    _compiled_pattern = (re.compile("|".join(map(re.escape, keys))) if keys else None, source)
+
+
+def add_misread_entries(entries: dict):
+    """
+    読み間違い補正を追加（同じ語は上書き）し、置換用の正規表現を作り直す
+    """
+    MISREAD_REPLACEMENTS.update(entries)
+    reload_misread_dict()
+
+
+def load_misread_dict(path) -> dict:
+    """
+    外部ファイルの読み間違い補正辞書を MISREAD_REPLACEMENTS に追加する。
+    - .json: {"誤": "正", ...}
+    - それ以外: 1行1件のタブ区切り（誤<TAB>正）。空行と # で始まる行は無視
+    """
+    path = Path(path)
+    if path.suffix == ".json":
+        with open(path, "r", encoding="utf-8") as f:
+            entries = json.load(f)
+    else:
+        entries = {}
+        for line in path.read_text(encoding="utf-8").splitlines():
+            if not line.strip() or line.startswith("#"):
+                continue
+            wrong, corrected = line.split("\t", 1)
+            entries[wrong] = corrected.strip()
+
+    add_misread_entries(entries)
+    print(f"📖 読み補正辞書を読み込み: {path}（{len(entries)}件）")
+    return entries
+
+
+def _get_pattern():
+    if _compiled_pattern is None:
+        reload_misread_dict()
+    return _compiled_pattern
+
+
 def apply_misread_corrections(text: str) -> str:
     """
     登録された読み間違い補正辞書を元に、全文一致で置換する
+    （1回の走査で最長一致優先。置換後の文字列が再度置換されることはない）
     """
-    for wrong, corrected in MISREAD_REPLACEMENTS.items():
-        text = text.replace(wrong, corrected)
-    return text
+    pattern, replacements = _get_pattern()
+    if pattern is None:
+        return text
+    return pattern.sub(lambda m: replacements[m.group(0)], text)
+
+
+# 環境変数 MISREAD_DICT_PATH があれば追加辞書を読み込む
+if os.getenv("MISREAD_DICT_PATH"):
+    load_misread_dict(os.getenv("MISREAD_DICT_PATH"))
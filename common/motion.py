@@ -0,0 +1,116 @@
+import numpy as np
+from PIL import Image
+
+# 静止画のパン・ズーム（Ken Burns）を事前計算で行うモーションエンジン
+# クリップ全フレーム分の切り出し位置をNumPyでまとめて求めておき、
+# 各フレームは元画像からのスライス（ズーム時は事前計算した矩形からの縮尺変換）だけで生成する
+
+PAN_OFFSET = 50  # パンの移動量（px）
+EFFECTS = ["pan_up", "pan_down", "pan_left", "pan_right", "pan_diag", "zoom_in", "zoom_out"]
+SAMPLING_METHODS = ["bilinear", "nearest"]
+
+
+def motion_curves(effect: str, duration: float, fps: int = 30) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    各フレームの（中心からのxずれ, yずれ, ズーム倍率）を配列で返す
+    （旧 compose_video.make_offset_func / scale_func と同じ動き）
+    """
+    n_frames = max(int(np.ceil(duration * fps)), 1)
+    t = np.minimum(np.arange(n_frames) / fps, duration)
+    move = PAN_OFFSET * (1 - 2 * t / duration)
+    zeros = np.zeros(n_frames)
+
+    dx, dy, zoom = zeros, zeros, np.ones(n_frames)
+    if effect == "pan_up":
+        dy = move
+    elif effect == "pan_down":
+        dy = -move
+    elif effect == "pan_left":
+        dx = move
+    elif effect == "pan_right":
+        dx = -move
+    elif effect == "pan_diag":
+        dx, dy = -move, -move
+    elif effect == "zoom_in":
+        zoom = 1.0 + 0.1 * (t / duration)
+    elif effect == "zoom_out":
+        zoom = 1.1 - 0.1 * (t / duration)
+    return dx, dy, zoom
+
+
+def crop_boxes(effect: str, duration: float, src_size: tuple, frame_size: tuple, fps: int = 30) -> np.ndarray:
+    """
+    各フレームの切り出し矩形 (x0, y0, w, h) を (フレーム数, 4) の整数配列で返す。
+    矩形は元画像の範囲内に収める。
+    """
+    src_w, src_h = src_size
+    frame_w, frame_h = frame_size
+    dx, dy, zoom = motion_curves(effect, duration, fps)
+
+    half_w = (frame_w / 2 / zoom).astype(int)
+    half_h = (frame_h / 2 / zoom).astype(int)
+    cx = src_w // 2 + dx.astype(int)
+    cy = src_h // 2 + dy.astype(int)
+
+    w = np.minimum(2 * half_w, src_w)
+    h = np.minimum(2 * half_h, src_h)
+    x0 = np.clip(cx - half_w, 0, src_w - w)
+    y0 = np.clip(cy - half_h, 0, src_h - h)
+    return np.stack([x0, y0, w, h], axis=1)
+
+
+class PrecomputedMotion:
+    """
+    1枚の画像から、パン・ズームした frame_size のフレームを返す。
+
+    - 切り出し矩形はコンストラクタで全フレーム分計算済み
+    - 矩形が frame_size と同じ（パン）ならスライスのみ
+    - 矩形が小さい（ズーム）場合は補間方式を選べる
+      - sampling="bilinear"（既定）: 作成済みのPIL画像から矩形を指定して双線形でリサイズ
+        （フレームごとの切り出しコピー・PIL画像への変換をしない。旧実装のLANCZOSに近い画質）
+      - sampling="nearest": 事前に作った行・列インデックスで最近傍サンプリング。
+        双線形の3〜4倍速いが、拡大時に輪郭がギザギザになり画質が目に見えて落ちる
+    """
+
+    def __init__(self, image: np.ndarray, effect: str, duration: float, frame_size: tuple, fps: int = 30,
+                 sampling: str = "bilinear"):
+        if sampling not in SAMPLING_METHODS:
+            raise ValueError(f"❌ 未対応の補間方式です: {sampling}（{SAMPLING_METHODS}）")
+        self.image = image
+        self.fps = fps
+        self.sampling = sampling
+        self.frame_w, self.frame_h = frame_size
+        src_h, src_w = image.shape[:2]
+        self.boxes = crop_boxes(effect, duration, (src_w, src_h), frame_size, fps)
+
+        x0, y0, w, h = self.boxes.T
+        self.sliceable = bool(np.all((w == self.frame_w) & (h == self.frame_h)))
+        if self.sliceable:
+            return
+        if sampling == "nearest":
+            self.rows = y0[:, None] + (np.arange(self.frame_h)[None, :] * h[:, None] // self.frame_h)
+            self.cols = x0[:, None] + (np.arange(self.frame_w)[None, :] * w[:, None] // self.frame_w)
+        else:
+            self.pil_image = Image.fromarray(image)
+
+    @property
+    def n_frames(self) -> int:
+        return len(self.boxes)
+
+    def frame(self, index: int) -> np.ndarray:
+        index = min(max(index, 0), self.n_frames - 1)
+        if self.sliceable:
+            x0, y0, w, h = self.boxes[index]
+            return self.image[y0:y0 + h, x0:x0 + w]
+        if self.sampling == "nearest":
+            return self.image.take(self.rows[index], axis=0).take(self.cols[index], axis=1)
+
+        x0, y0, w, h = (int(v) for v in self.boxes[index])
+        resized = self.pil_image.resize((self.frame_w, self.frame_h), Image.BILINEAR, box=(x0, y0, x0 + w, y0 + h))
+        return np.asarray(resized)
+
+    def frame_at(self, t: float) -> np.ndarray:
+        """
+        moviepy の make_frame(t) として使う
+        """
+        return self.frame(int(t * self.fps + 1e-6))
@@ -0,0 +1,136 @@
+import hashlib
+import os
+import time
+from pathlib import Path
+
+from common.clients import get_s3_client
+
+
+class ObjectNotFound(Exception):
+    pass
+
+
+class NotModified(Exception):
+    """
+    条件付き読み込み（If-None-Match）で、手元の ETag から変更がなかった
+    """
+    pass
+
+
+class PreconditionFailed(Exception):
+    """
+    条件付き書き込み（If-Match / If-None-Match）の条件を満たさなかった（＝他ワーカーが先に更新した）
+    """
+    pass
+
+
+class S3ObjectStore:
+    """
+    S3のオブジェクトを ETag 付きで読み書きする薄いラッパー。
+    """
+
+    def __init__(self, bucket: str):
+        self.bucket = bucket
+
+    def get(self, key: str, if_none_match: str = None) -> tuple[bytes, str]:
+        from botocore.exceptions import ClientError
+
+        s3 = get_s3_client()
+        kwargs = {"IfNoneMatch": if_none_match} if if_none_match else {}
+        try:
+            response = s3.get_object(Bucket=self.bucket, Key=key, **kwargs)
+        except s3.exceptions.NoSuchKey:
+            raise ObjectNotFound(key)
+        except ClientError as e:
+            if e.response.get("Error", {}).get("Code") in ("304", "NotModified"):
+                raise NotModified(key)
+            raise
+        return response["Body"].read(), response["ETag"]
+
+    def put(self, key: str, body: bytes, if_match: str = None, if_none_match: str = None,
+            content_type: str = "application/json") -> str:
+        from botocore.exceptions import ClientError
+
+        kwargs = {}
+        if if_match:
+            kwargs["IfMatch"] = if_match
+        if if_none_match:
+            kwargs["IfNoneMatch"] = if_none_match
+
+        try:
+            response = get_s3_client().put_object(
+                Bucket=self.bucket, Key=key, Body=body, ContentType=content_type, **kwargs
+            )
+        except ClientError as e:
+            code = e.response.get("Error", {}).get("Code")
+            if code in ("PreconditionFailed", "ConditionalRequestConflict"):
+                raise PreconditionFailed(key)
+            raise
+        return response["ETag"]
+
+
+class LocalObjectStore:
+    """
+    S3の代わりにローカルディレクトリを使うオブジェクトストア（オフライン実行・動作確認用）。
+    ETag と条件付き書き込みの挙動をS3に合わせている。複数プロセスから同時に使用可能。
+    """
+
+    LOCK_TIMEOUT = 10.0  # この秒数より古いロックファイルは残骸とみなして削除
+
+    def __init__(self, root_dir: Path):
+        self.root_dir = Path(root_dir)
+        self.root_dir.mkdir(parents=True, exist_ok=True)
+
+    def _path(self, key: str) -> Path:
+        return self.root_dir / key
+
+    @staticmethod
+    def _etag(body: bytes) -> str:
+        return f'"{hashlib.md5(body).hexdigest()}"'
+
+    def get(self, key: str, if_none_match: str = None) -> tuple[bytes, str]:
+        path = self._path(key)
+        if not path.exists():
+            raise ObjectNotFound(key)
+        body = path.read_bytes()
+        etag = self._etag(body)
+        if if_none_match and if_none_match == etag:
+            raise NotModified(key)
+        return body, etag
+
+    def _acquire_lock(self, lock_path: Path):
+        # O_EXCL によるロック（Windows / Linux 共通）
+        while True:
+            try:
+                fd = os.open(str(lock_path), os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+                os.close(fd)
+                return
+            except FileExistsError:
+                try:
+                    if time.time() - lock_path.stat().st_mtime > self.LOCK_TIMEOUT:
+                        lock_path.unlink()
+                        continue
+                except FileNotFoundError:
+                    continue
+                time.sleep(0.01)
+
+    def put(self, key: str, body: bytes, if_match: str = None, if_none_match: str = None,
+            content_type: str = "application/json") -> str:
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        lock_path = path.with_name(path.name + ".lock")
+
+        self._acquire_lock(lock_path)
+        try:
+            current_etag = self._etag(path.read_bytes()) if path.exists() else None
+            if if_match and current_etag != if_match:
+                raise PreconditionFailed(key)
+            if if_none_match == "*" and current_etag is not None:
+                raise PreconditionFailed(key)
+
+            tmp_path = path.with_name(path.name + f".{os.getpid()}.tmp")
+            tmp_path.write_bytes(body)
+            os.replace(tmp_path, path)
+        finally:
+            lock_path.unlink(missing_ok=True)
+        return self._etag(body)
@@ -0,0 +1,39 @@
+from functools import lru_cache
+
+from common.clients import get_tagger
+
+# 助詞の発音補正（表記 → 発音）
+PARTICLE_READINGS = {
+    "は": "わ",
+    "へ": "え",
+    "を": "お",
+}
+
+# カタカナ（ァ〜ン）→ ひらがな の変換テーブル
+KATA_TO_HIRA_TABLE = str.maketrans({
+    chr(code): chr(code - 0x60) for code in range(ord("ァ"), ord("ン") + 1)
+})
+
+
+def kata_to_hira(text: str) -> str:
+    return text.translate(KATA_TO_HIRA_TABLE)
+
+
+@lru_cache(maxsize=4096)
+def normalize_reading(text: str) -> str:
+    """
+    TTS用の読みに変換する（形態素解析は1回のみ）。
+    - 助詞の「は・へ・を」を発音どおり「わ・え・お」に置換
+    - それ以外は読み（カナ）があれば読みに、なければ表記のまま
+    - 最後にカタカナをひらがなに変換
+    形態素解析器はスレッドごとに別のもの（common.clients.get_tagger）を使うため、スレッドから呼んでもよい。
+    """
+    tagger = get_tagger()
+    parts = []
+    for word in tagger(text):
+        surface = word.surface
+        if word.feature[0] == "助詞" and surface in PARTICLE_READINGS:
+            parts.append(PARTICLE_READINGS[surface])
+            continue
+        parts.append(word.feature.kana or surface)
+    return "".join(parts).translate(KATA_TO_HIRA_TABLE)
@@ -6,8 +6,8 @@ from typing import List, Dict, Union
 import json
 import os
 import argparse
-import boto3
-from io import BytesIO
+from common.clients import get_s3_client
+from common.status_store import get_status_store, LeaseHeartbeat, DEFAULT_LEASE_SECONDS
 
 # .env.s3の読み込み（dotenvがあれば）
 if not os.getenv("AWS_ACCESS_KEY_ID") or not os.getenv("AWS_SECRET_ACCESS_KEY"):
@@ -131,140 +131,77 @@ def parse_and_generate_voicevox_script(
 ROOT_DIR = Path(__file__).resolve().parents[1]
 STATUS_PATH = ROOT_DIR / "script_status.json"
 
-def get_s3_client():
-    """
-    ローカル開発では環境変数または .env.s3 を使用、
-    RunPodなどのクラウド環境では自動認証（IAMロール）を使用する。
-    """
-    aws_access_key = os.getenv("AWS_ACCESS_KEY_ID")
-    aws_secret_key = os.getenv("AWS_SECRET_ACCESS_KEY")
-    aws_region = os.getenv("AWS_DEFAULT_REGION")  # デフォルトを東京に
-
-    if aws_access_key and aws_secret_key:
-        return boto3.client(
-            "s3",
-            aws_access_key_id=aws_access_key,
-            aws_secret_access_key=aws_secret_key,
-            region_name=aws_region,
-        )
-    else:
-        return boto3.client("s3")  # IAMロールなど自動認証に任せる
-
+# 各タスクの依存関係（キーのタスクは、値のタスクがすべて完了してから実行可能）
+TASK_DEPENDENCIES = {
+    "audio": [],
+    "tag": ["audio"],
+    "prompt": ["tag"],
+    "subtitle": ["prompt"],
+    "image": ["subtitle"],
+    "video": ["image"],
+    "compose": ["image"],
+    "upload": ["compose"]
+}
 
-def get_next_script_id(task_name: str, status_path="script_status.json", explicit_script_id: str = None):
-
-    DEPENDENCIES = {
-        "audio": [],
-        "tag": ["audio"],
-        "prompt": ["tag"],
-        "subtitle": ["prompt"],
-        "image": ["subtitle"],
-        "video": ["image"],
-        "compose": ["image"],
-        "upload": ["compose"]
-    }
-
-    # S3設定
-    s3_bucket = "youtube-auto-bk"
-    s3_key = status_path
-
-    s3 = get_s3_client()
-    s3_object = s3.get_object(Bucket=s3_bucket, Key=s3_key)
 
+def fetch_status_data(status_path="script_status.json") -> dict:
+    """
+    全script_idのステータスを取得して返す。取得できない場合は None。
+    """
+    return get_status_store(status_path).load_all()
 
-    # ステータスJSONの読み込み
-    try:
-        response = s3.get_object(Bucket=s3_bucket, Key=s3_key)
-        content = response["Body"].read().decode("utf-8")
-        status_data = json.loads(content)
-    except s3.exceptions.NoSuchKey:
-        print(f"⚠️ S3にstatusファイルが存在しません: {s3_key}")
-        return None
-    except Exception as e:
-        print(f"❌ S3からのstatus取得失敗: {e}")
-        return None
-    all_completed = []
-    unmet_dependencies = []
 
+def get_next_script_id(task_name: str, status_path="script_status.json", explicit_script_id: str = None,
+                       owner: str = None, lease_seconds: float = DEFAULT_LEASE_SECONDS, exclude: set = None):
+    """
+    task_name を実行可能な script_id を1つ選び、リース（owner, 期限）を取得して返す。
+    他ワーカーがリース中のものと exclude に含まれるものは選ばない。期限切れのリースは自動的に回収される。
+    完了を記録せずに処理を終える場合は release_script_lease でリースを返却すること。
+    """
+    store = get_status_store(status_path)
+    dependencies = TASK_DEPENDENCIES[task_name]
 
     # 明示的にscript_idが指定されている場合、そのstatusを検証して即返す
     if explicit_script_id:
-        status = status_data.get(explicit_script_id, {})
-        unmet = [dep for dep in DEPENDENCIES[task_name] if status.get(dep) != True]
+        status = store.get_script_status(explicit_script_id)
+        unmet = [dep for dep in dependencies if status.get(dep) != True]
         if unmet:
             # print(f"[⛔] 依存未達: {explicit_script_id}（未完了: {unmet}）")
             return None
         if status.get(task_name) == True:
             # print(f"[✓] すでに完了: {explicit_script_id} → {task_name}")
             return None
+        if not store.claim(explicit_script_id, task_name, owner, lease_seconds, dependencies):
+            print(f"[⛔] 他のワーカーが処理中か、すでに完了: {explicit_script_id}（task: {task_name}）")
+            return None
         print(f"[INFO] 明示された処理対象: {explicit_script_id}（task: {task_name}）")
         return explicit_script_id
 
-    for script_id, status in status_data.items():
-        # print(f"[DEBUG] status_path = {status_path}")
-        # print(f"[DEBUG] checking: {script_id}, task={task_name}, status={status}")
+    script_id = store.claim_next(task_name, dependencies, owner, lease_seconds, exclude)
+    if script_id:
+        print(f"[INFO] 処理対象: {script_id}（task: {task_name}）")
+    return script_id
+
 
-        # すでに完了していたらスキップ
-        if status.get(task_name) == True:
-            all_completed.append(script_id)
-            continue
+def mark_script_completed(script_id: str, task_name: str, status_path="script_status.json"):
+    get_status_store(status_path).mark_completed(script_id, task_name)
 
-        # 依存タスクが未完了ならスキップ
-        unmet = [dep for dep in DEPENDENCIES[task_name] if status.get(dep) != True]
-        if unmet:
-            # print(f"[⛔] 依存未達: {script_id}（未完了: {unmet}）")
-            unmet_dependencies.append(script_id)
-            continue  # OK: スキップして次の script_id を探す
-        print(f"[INFO] 処理対象: {script_id}（task: {task_name}）")
-        return script_id
 
-    # ログ出力：依存未達と完了済みを区別して表示
-    if all_completed and not unmet_dependencies:
-        print(f"[✓] task={task_name} に対する処理対象はすべて完了済みです。")
-    elif unmet_dependencies and not all_completed:
-        print(f"[⏳] task={task_name} に対する処理対象はすべて依存タスク未完了のためスキップされました。")
-    elif not all_completed and not unmet_dependencies:
-        print(f"[❌] task={task_name} に該当する台本が存在しません。")
-    else:
-        print(f"[INFO] task={task_name} に対する処理対象は現在ありません。")
+def release_script_lease(script_id: str, task_name: str, status_path="script_status.json", owner: str = None):
+    """
+    完了を記録せずに処理を終えるとき（入力なし・失敗など）に、取得したリースを返却する。
+    リースを持っていなければ何もしない。
+    """
+    get_status_store(status_path).release(script_id, task_name, owner)
 
-    return None
 
+def lease_heartbeat(script_id: str, task_name: str, status_path="script_status.json", owner: str = None,
+                    lease_seconds: float = DEFAULT_LEASE_SECONDS) -> LeaseHeartbeat:
+    """
+    get_next_script_id で取得したリースを、処理中に定期延長するためのコンテキストマネージャを返す。
+    """
+    return LeaseHeartbeat(get_status_store(status_path), script_id, task_name, owner, lease_seconds)
 
-def mark_script_completed(script_id: str, task_name: str, status_path="script_status.json"):
-    # S3設定
-    s3_bucket = os.getenv("AWS_S3_BUCKET_NAME", "youtube-auto-bk")
-    s3_key = status_path  # 例: "script_status.json"
-    
-    s3 = get_s3_client()
-    s3_object = s3.get_object(Bucket=s3_bucket, Key=s3_key)
-
-    # S3からステータスJSONを取得
-    try:
-        response = s3.get_object(Bucket=s3_bucket, Key=s3_key)
-        content = response["Body"].read().decode("utf-8")
-        status_data = json.loads(content)
-    except s3.exceptions.NoSuchKey:
-        print(f"⚠️ S3にstatusファイルが存在しません: {s3_key}")
-        status_data = {}
-    except Exception as e:
-        print(f"❌ S3からのstatus取得失敗: {e}")
-        return
-
-    # ステータス更新
-    status_data.setdefault(script_id, {})[task_name] = True
-
-    # JSONにしてS3に再アップロード
-    try:
-        s3.put_object(
-            Bucket=s3_bucket,
-            Key=s3_key,
-            Body=json.dumps(status_data, ensure_ascii=False, indent=2).encode("utf-8"),
-            ContentType="application/json"
-        )
-        print(f"[INFO] 完了フラグ更新（S3）: {script_id} → {task_name}=True")
-    except Exception as e:
-        print(f"❌ ステータスのS3保存失敗: {e}")
 
 def load_status_data(path: Union[str, Path] = STATUS_PATH):
     path = Path(path)
@@ -0,0 +1,23 @@
+import hashlib
+import os
+import random
+
+# (script_id, parent_id, stage) ごとに固定のシードを持つ乱数
+# 同じ台本を再実行しても、エフェクト・テーマ・モーションプロンプトが同じものになる
+# （キャッシュが効くように出力を再現可能にする）。
+# 別の結果がほしいときは環境変数 PIPELINE_SEED を変える。
+
+SEED_ENV = "PIPELINE_SEED"
+
+
+def make_seed(script_id: str, parent_id: str, stage: str) -> int:
+    salt = os.getenv(SEED_ENV, "")
+    digest = hashlib.sha256(f"{salt}:{script_id}:{parent_id}:{stage}".encode("utf-8")).digest()
+    return int.from_bytes(digest[:8], "big")
+
+
+def get_rng(script_id: str, parent_id: str, stage: str) -> random.Random:
+    """
+    キーごとに独立した random.Random を返す（choice / shuffle などは random モジュールと同じ使い方）
+    """
+    return random.Random(make_seed(script_id, parent_id, stage))
@@ -0,0 +1,196 @@
+import hashlib
+import json
+import os
+import re
+import time
+from functools import lru_cache
+from pathlib import Path
+
+from common.asset_cache import file_hash
+from common.disk_lru import DiskLRU
+from common.encoder import select_encoder, with_encoder_filter, run_encode, encoder_threads, thread_args
+from common.ffmpeg_renderer import FPS, AUDIO_ARGS, AUDIO_FORMAT, build_segment_filter, escape_filter_path
+
+# 背景素材（parent_scene_id）ごとに字幕込みの中間動画を作ってキャッシュし、
+# concat demuxer のストリームコピーでつなげて完成版にするレンダラー
+# 画像・動画を1枚差し替えた場合は、その区間だけを再エンコードする
+# キャッシュの合計サイズは SEGMENT_CACHE_MAX_MB（既定 5000MB）まで。超えたら最終利用が古いものから削除する
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+DEFAULT_CACHE_DIR = ROOT_DIR / "cache" / "segments"
+DEFAULT_MAX_MB = 5000
+CACHE_VERSION = 2  # フィルタ構成を変えたら上げる（既存キャッシュを無効にする）
+
+stats = {"hit": 0, "render": 0}
+
+_ASS_TIME = re.compile(r"(\d+):(\d{2}):(\d{2})\.(\d{2})")
+
+
+def parse_ass_time(value: str) -> float:
+    h, m, s, cs = map(int, _ASS_TIME.match(value.strip()).groups())
+    return h * 3600 + m * 60 + s + cs / 100
+
+
+def load_ass(ass_path: Path) -> tuple[str, list[tuple[float, float, str]]]:
+    """
+    ASSファイルを「Dialogue 以外（スタイル定義など）」と「(開始, 終了, 行) のリスト」に分ける
+    """
+    header = []
+    events = []
+    for line in Path(ass_path).read_text(encoding="utf-8-sig").splitlines():
+        if line.startswith("Dialogue:"):
+            fields = line.split(",", 3)
+            events.append((parse_ass_time(fields[1]), parse_ass_time(fields[2]), fields[3]))
+        else:
+            header.append(line)
+    return "\n".join(header), events
+
+
+def frame_range(start: float, duration: float) -> tuple[int, int]:
+    """
+    区間の (開始フレーム, フレーム数)。境界をタイムライン全体で丸めるので、区間をつなげても尺がずれない
+    """
+    first = int(round(start * FPS))
+    last = int(round((start + duration) * FPS))
+    return first, max(last - first, 1)
+
+
+def segment_key(segment: dict, first_frame: int, n_frames: int, ass: tuple, encoder: dict,
+                frame_size: tuple, canvas_size: tuple) -> str:
+    """
+    中間動画のキャッシュキー。
+    素材の内容・尺・エフェクト・エンコーダ設定と、区間に重なる字幕（区間先頭からの相対時刻）から作る。
+    タイムライン上の位置がずれても、見た目が同じ区間は再利用できる。
+    """
+    seg_start = first_frame / FPS
+    seg_end = (first_frame + n_frames) / FPS
+    header, events = ass if ass else ("", [])
+    overlapping = [
+        (round(start - seg_start, 2), round(end - seg_start, 2), text)
+        for start, end, text in events
+        if start < seg_end and end > seg_start
+    ]
+    payload = {
+        "version": CACHE_VERSION,
+        "asset": file_hash(Path(segment["path"])),
+        "type": segment["type"],
+        "effect": segment.get("effect"),
+        "duration": round(segment["duration"], 3),
+        "frames": n_frames,
+        "frame_size": list(frame_size),
+        "canvas_size": list(canvas_size),
+        "encoder": [encoder["name"], *encoder["args"]],
+        "ass_header": header if overlapping else "",
+        "subtitles": overlapping,
+    }
+    return hashlib.sha256(json.dumps(payload, ensure_ascii=False, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def render_segment(segment: dict, first_frame: int, n_frames: int, ass_path: Path, output_path: Path,
+                   frame_size: tuple, canvas_size: tuple, encoder: dict) -> float:
+    """
+    1区間を映像のみの中間動画にする。
+    字幕は区間の開始時刻までタイムスタンプをずらしてから焼き込み、先頭0秒に戻す。
+    """
+    if segment["type"] == "image":
+        inputs = ["-loop", "1", "-framerate", str(FPS), "-t", f"{segment['duration']:.3f}", "-i", str(segment["path"])]
+    else:
+        inputs = ["-i", str(segment["path"])]
+
+    vf = f"ass='{escape_filter_path(ass_path)}'" if ass_path else "null"
+    graph = (
+        build_segment_filter(0, segment, frame_size, canvas_size)
+        + f";[v0]tpad=stop_mode=clone:stop={n_frames},setpts=PTS+{first_frame}/{FPS}/TB,{vf},"
+        + f"setpts=PTS-STARTPTS,{with_encoder_filter(encoder, 'null')}[vout]"
+    )
+
+    threads = encoder_threads()
+    tmp_path = output_path.with_name(f"{output_path.stem}.{os.getpid()}.tmp.mp4")
+    cmd = [
+        "ffmpeg", "-y", "-hide_banner", "-loglevel", "error",
+        *(["-filter_complex_threads", str(threads)] if threads else []),
+        *encoder.get("init", []),
+        *inputs,
+        "-filter_complex", graph,
+        "-map", "[vout]", "-an",
+        "-frames:v", str(n_frames), "-r", str(FPS),
+        *encoder["args"], *thread_args(),
+        str(tmp_path),
+    ]
+    elapsed = run_encode(cmd, f"区間エンコード {segment.get('parent_id', '')}", encoder)
+    os.replace(tmp_path, output_path)
+    return elapsed
+
+
+def concat_segments(segment_paths: list[Path], audio_path: Path, output_path: Path, duration: float):
+    """
+    中間動画を concat demuxer でストリームコピーし、ミックスダウン済みの音声を付ける（映像は再エンコードしない）
+    """
+    list_path = output_path.with_suffix(".segments.txt")
+    list_path.write_text(
+        "".join(f"file '{Path(p).resolve().as_posix()}'\n" for p in segment_paths), encoding="utf-8"
+    )
+    cmd = [
+        "ffmpeg", "-y", "-hide_banner", "-loglevel", "error",
+        "-f", "concat", "-safe", "0", "-i", str(list_path),
+        "-i", str(audio_path),
+        "-map", "0:v", "-map", "1:a",
+        "-c:v", "copy", "-af", AUDIO_FORMAT, *AUDIO_ARGS,
+        "-t", f"{duration:.3f}",
+        "-movflags", "+faststart",
+        str(output_path),
+    ]
+    run_encode(cmd, "区間の連結", {"name": "copy"})
+
+
+@lru_cache(maxsize=None)
+def get_segment_lru(cache_dir: str) -> DiskLRU:
+    max_mb = float(os.getenv("SEGMENT_CACHE_MAX_MB", DEFAULT_MAX_MB))
+    return DiskLRU(Path(cache_dir), "*.mp4", int(max_mb * 1024 * 1024))
+
+
+def render_segmented(plan: dict, output_path: Path, frame_size: tuple, canvas_size: tuple,
+                     encoder: dict = None) -> float:
+    """
+    plan（compose_video.build_render_plan の戻り値 + mixed_audio）を区間キャッシュ経由で書き出し、
+    所要時間（秒）を返す。キャッシュ先は SEGMENT_CACHE_DIR（既定: cache/segments）。
+    """
+    if not plan.get("mixed_audio"):
+        raise ValueError("❌ 区間レンダラーにはミックスダウン済みの音声（plan['mixed_audio']）が必要です")
+
+    t0 = time.perf_counter()
+    encoder = encoder or select_encoder()
+    cache_dir = Path(os.getenv("SEGMENT_CACHE_DIR", str(DEFAULT_CACHE_DIR)))
+    cache_dir.mkdir(parents=True, exist_ok=True)
+
+    ass_path = plan.get("ass")
+    ass = load_ass(ass_path) if ass_path else None
+
+    segment_paths = []
+    rendered_bytes = 0
+    hits = 0
+    timeline = 0.0
+    for segment in plan["segments"]:
+        first_frame, n_frames = frame_range(timeline, segment["duration"])
+        timeline += segment["duration"]
+
+        key = segment_key(segment, first_frame, n_frames, ass, encoder, frame_size, canvas_size)
+        segment_path = cache_dir / f"{key}.mp4"
+        if segment_path.exists():
+            hits += 1
+            stats["hit"] += 1
+            os.utime(segment_path)  # 最終利用時刻を更新（LRU用）
+        else:
+            render_segment(segment, first_frame, n_frames, ass_path, segment_path, frame_size, canvas_size, encoder)
+            rendered_bytes += segment_path.stat().st_size
+            stats["render"] += 1
+        segment_paths.append(segment_path)
+
+    print(f"🧩 区間キャッシュ: 再利用 {hits} / 新規 {len(segment_paths) - hits}（全{len(segment_paths)}区間）")
+    concat_segments(segment_paths, plan["mixed_audio"], Path(output_path), timeline)
+    # 連結が終わってから上限を超えた分を削除する（今回使う区間を途中で消さない）
+    get_segment_lru(str(cache_dir)).added(rendered_bytes)
+
+    elapsed = time.perf_counter() - t0
+    print(f"⏱️ 区間レンダリング合計: {elapsed:.1f}秒")
+    return elapsed
@@ -0,0 +1,65 @@
+import importlib
+import time
+from collections import defaultdict
+
+# ステージ名 → generator 配下のモジュール名（各モジュールは main(script_id) を持つ）
+STAGE_MODULES = {
+    "audio": "generate_audio",
+    "tag": "tag_generator",
+    "prompt": "generate_sd_prompt",
+    "subtitle": "generate_subtitles",
+    "image": "run_batches",
+    "video": "generate_runway_video",
+    "compose": "compose_video",
+}
+
+
+class StageRunner:
+    """
+    各ステージをサブプロセスではなく同一プロセス内で実行するランナー。
+
+    - ステージのモジュールは初回のみ import し、以降は使い回す
+      （moviepy / fugashi / openai などの import とクライアント生成を1回に抑える）
+    - script_idごとに「起動（import）時間」と「実処理時間」を集計する
+    """
+
+    def __init__(self, package: str = "generator"):
+        self.package = package
+        self.modules = {}
+        self.timings = defaultdict(lambda: {"startup": 0.0, "work": 0.0})
+
+    def load(self, stage: str, script_id: str = None):
+        if stage in self.modules:
+            return self.modules[stage]
+
+        module_name = f"{self.package}.{STAGE_MODULES[stage]}"
+        t0 = time.perf_counter()
+        module = importlib.import_module(module_name)
+        elapsed = time.perf_counter() - t0
+
+        self.modules[stage] = module
+        if script_id:
+            self.timings[script_id]["startup"] += elapsed
+        print(f"📦 モジュール読み込み: {module_name}（{elapsed:.2f}秒）")
+        return module
+
+    def run(self, stage: str, script_id: str) -> bool:
+        """
+        指定ステージを script_id に対して実行する。失敗時は False を返す。
+        """
+        print(f"▶️ 実行中: {stage} ({script_id})")
+        try:
+            module = self.load(stage, script_id)
+            t0 = time.perf_counter()
+            try:
+                module.main(script_id)
+            finally:
+                self.timings[script_id]["work"] += time.perf_counter() - t0
+        except Exception as e:
+            print(f"❌ エラー: {stage} ({script_id}) → {type(e).__name__}: {e}")
+            return False
+        return True
+
+    def report(self, script_id: str):
+        t = self.timings[script_id]
+        print(f"⏱️ {script_id}: 起動 {t['startup']:.2f}秒 / 処理 {t['work']:.2f}秒")
@@ -0,0 +1,125 @@
+import json
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from pathlib import Path
+
+from common.script_utils import TASK_DEPENDENCIES
+from common.stage_runner import StageRunner, STAGE_MODULES
+from common.status_store import get_status_store, LeaseHeartbeat
+
+CONFIG_PATH = Path(__file__).resolve().parents[1] / "config" / "config.json"
+
+# ステージごとの同時実行数（config.json の stage_concurrency で上書き可）
+# audio: VOICEVOX / tag・prompt・subtitle: OpenAI / image: SD / video: Runway / compose: CPU
+DEFAULT_STAGE_CONCURRENCY = {
+    "audio": 1,
+    "tag": 4,
+    "prompt": 4,
+    "subtitle": 4,
+    "image": 1,
+    "video": 2,
+    "compose": 2,
+}
+
+
+def load_stage_concurrency(config_path: Path = CONFIG_PATH) -> dict:
+    concurrency = dict(DEFAULT_STAGE_CONCURRENCY)
+    if config_path.exists():
+        with open(config_path, "r", encoding="utf-8") as f:
+            concurrency.update(json.load(f).get("stage_concurrency", {}))
+    return concurrency
+
+
+class StageScheduler:
+    """
+    (script_id, stage) を1タスクとして TASK_DEPENDENCIES のDAGに沿って実行するスケジューラ。
+
+    - ステージごとに専用のワーカープールと同時実行数を持つ
+    - 依存タスクが完了した script_id から順に投入するため、
+      script N の compose 中に script N+1 の audio を進められる
+    - 1回の実行で同じタスクは1度だけ投入する（失敗時も再投入しない）
+    - 投入前にリースを取得し、実行中はハートビートで延長する（他マシンのワーカーと重複しない）
+    """
+
+    def __init__(self, runner: StageRunner, stages: list[str] = None, concurrency: dict = None,
+                 status_path: str = "script_status.json", poll_interval: float = 5.0):
+        self.runner = runner
+        self.stages = stages or list(STAGE_MODULES)
+        self.concurrency = concurrency or load_stage_concurrency()
+        self.store = get_status_store(status_path)
+        self.poll_interval = poll_interval
+
+        self.pools = {
+            stage: ThreadPoolExecutor(max_workers=self.concurrency.get(stage, 1), thread_name_prefix=stage)
+            for stage in self.stages
+        }
+        self.inflight = {}      # future → (script_id, stage)
+        self.attempted = set()  # 投入済みの (script_id, stage)
+        self.failed = []
+
+    def _running_count(self, stage: str) -> int:
+        return sum(1 for _, s in self.inflight.values() if s == stage)
+
+    def ready_tasks(self, status_data: dict):
+        """
+        依存が満たされ、未完了かつ未投入のタスクを script_id 順に返す。
+        """
+        for script_id, status in status_data.items():
+            for stage in self.stages:
+                if status.get(stage) == True:
+                    continue
+                if (script_id, stage) in self.attempted:
+                    continue
+                if any(status.get(dep) != True for dep in TASK_DEPENDENCIES[stage]):
+                    continue
+                yield script_id, stage
+
+    def _run_task(self, stage: str, script_id: str) -> bool:
+        with LeaseHeartbeat(self.store, script_id, stage) as heartbeat:
+            ok = self.runner.run(stage, script_id)
+            if not ok:
+                heartbeat.release()  # 失敗したら他のワーカーがすぐ再実行できるようにリースを返す
+            return ok
+
+    def _submit_ready(self) -> int:
+        status_data = self.store.load_all() or {}
+        submitted = 0
+        for script_id, stage in self.ready_tasks(status_data):
+            if self._running_count(stage) >= self.concurrency.get(stage, 1):
+                continue
+            # status_data は古い可能性があるため、完了・依存・リースは claim がトランザクション内で確認し直す
+            # （他のワーカーがリース中、またはその後に完了させていれば今回は見送る）
+            if not self.store.claim(script_id, stage, dependencies=TASK_DEPENDENCIES[stage]):
+                continue
+            future = self.pools[stage].submit(self._run_task, stage, script_id)
+            self.inflight[future] = (script_id, stage)
+            self.attempted.add((script_id, stage))
+            submitted += 1
+            print(f"📥 投入: {script_id} → {stage}")
+        return submitted
+
+    def run(self):
+        try:
+            while True:
+                self._submit_ready()
+                if not self.inflight:
+                    print("✅ 実行可能なタスクはありません。スケジューラを終了します。")
+                    break
+
+                done, _ = wait(list(self.inflight), timeout=self.poll_interval, return_when=FIRST_COMPLETED)
+                for future in done:
+                    script_id, stage = self.inflight.pop(future)
+                    if not future.result():
+                        self.failed.append((script_id, stage))
+        finally:
+            for pool in self.pools.values():
+                pool.shutdown(wait=True)
+
+        for script_id in sorted({sid for sid, _ in self.attempted}):
+            self.runner.report(script_id)
+        stats = self.store.cache_stats()
+        if stats:
+            print(f"📊 statusキャッシュ: hit={stats['hit']} / miss={stats['miss']}")
+        if self.failed:
+            print("❌ 失敗したタスク:")
+            for script_id, stage in self.failed:
+                print(f"- {script_id}: {stage}")
@@ -0,0 +1,724 @@
+import copy
+import json
+from abc import ABC, abstractmethod
+import os
+import socket
+import sqlite3
+import random
+import threading
+import time
+from contextlib import contextmanager
+from functools import lru_cache
+from pathlib import Path
+
+from common.clients import get_s3_client
+from common.object_store import S3ObjectStore, LocalObjectStore, ObjectNotFound, NotModified, PreconditionFailed
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+DEFAULT_DB_PATH = ROOT_DIR / "script_status.db"
+DEFAULT_LEASE_SECONDS = 30 * 60  # タスク確保（リース）の有効期限（秒）
+LEASES_KEY = "_leases"  # S3 JSON 内のリース置き場（script_id ではない予約キー）
+
+
+def is_reserved_key(key: str) -> bool:
+    """
+    "_" で始まるキーはタスク名・script_id ではない（リースなどの管理用）
+    """
+    return key.startswith("_")
+
+
+def strip_reserved(status_data: dict) -> dict:
+    """
+    予約キーを除き、{script_id: {task_name: 値}} だけを返す
+    """
+    return {
+        script_id: {task_name: value for task_name, value in status.items() if not is_reserved_key(task_name)}
+        for script_id, status in status_data.items()
+        if not is_reserved_key(script_id)
+    }
+
+
+def default_owner() -> str:
+    """
+    リース所有者の識別子（ホスト名:PID）
+    """
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def print_no_target(task_name: str, completed_count: int, unmet_count: int, leased_count: int = 0):
+    # ログ出力：依存未達と完了済み（と他ワーカー処理中）を区別して表示
+    if leased_count:
+        print(f"[⏳] task={task_name} の処理対象は他のワーカーが処理中です（{leased_count}件）。")
+    elif completed_count and not unmet_count:
+        print(f"[✓] task={task_name} に対する処理対象はすべて完了済みです。")
+    elif unmet_count and not completed_count:
+        print(f"[⏳] task={task_name} に対する処理対象はすべて依存タスク未完了のためスキップされました。")
+    elif not completed_count and not unmet_count:
+        print(f"[❌] task={task_name} に該当する台本が存在しません。")
+    else:
+        print(f"[INFO] task={task_name} に対する処理対象は現在ありません。")
+
+
+class StatusStore(ABC):
+    """
+    script_idごとのタスク完了状況を保存するバックエンドの共通インターフェース。
+    status は {script_id: {task_name: True or "pending"}} の形で扱う。
+    リース関連（claim / renew / release）は、対応しないバックエンド向けに何もしない既定実装を持つ。
+    """
+
+    @abstractmethod
+    def load_all(self) -> dict:
+        """
+        全script_idの状態を返す。取得に失敗した場合は None
+        """
+
+    def get_script_status(self, script_id: str) -> dict:
+        return (self.load_all() or {}).get(script_id, {})
+
+    @abstractmethod
+    def mark_completed(self, script_id: str, task_name: str):
+        """
+        タスクを完了にし、そのタスクのリースを解除する
+        """
+
+    @abstractmethod
+    def merge_all(self, status_data: dict):
+        """
+        status_data を取り込む。未登録の項目は追加し、完了済み(True)は完了に揃える（完了を戻すことはしない）
+        """
+
+    def next_ready(self, task_name: str, dependencies: list[str], exclude: set = None) -> str:
+        """
+        依存タスクがすべて完了し、自身が未完了の script_id を1つ返す（なければ None）
+        exclude に含まれる script_id は選ばない
+        """
+        status_data = self.load_all()
+        if status_data is None:
+            return None
+
+        completed_count = 0
+        unmet_count = 0
+        for script_id, status in status_data.items():
+            if exclude and script_id in exclude:
+                continue
+            # すでに完了していたらスキップ
+            if status.get(task_name) == True:
+                completed_count += 1
+                continue
+            # 依存タスクが未完了ならスキップ
+            if any(status.get(dep) != True for dep in dependencies):
+                unmet_count += 1
+                continue
+            return script_id
+
+        print_no_target(task_name, completed_count, unmet_count)
+        return None
+
+    def claim_next(self, task_name: str, dependencies: list[str], owner: str = None,
+                   lease_seconds: float = DEFAULT_LEASE_SECONDS, exclude: set = None) -> str:
+        """
+        次の実行可能タスクを確保（リース取得）して script_id を返す。
+        リースに対応しないバックエンドでは next_ready と同じ。
+        """
+        return self.next_ready(task_name, dependencies, exclude)
+
+    def claim(self, script_id: str, task_name: str, owner: str = None,
+              lease_seconds: float = DEFAULT_LEASE_SECONDS, dependencies: list[str] = None) -> bool:
+        """
+        指定した script_id のタスクを確保する。
+        すでに完了している・依存タスクが未完了・他ワーカーが有効なリースを持っている場合は False。
+        （呼び出し側が読んだ状態は古い可能性があるため、確保と同時に状態を確認し直す）
+        """
+        status = self.get_script_status(script_id)
+        return status.get(task_name) != True and all(status.get(dep) == True for dep in dependencies or [])
+
+    def renew(self, script_id: str, task_name: str, owner: str = None,
+              lease_seconds: float = DEFAULT_LEASE_SECONDS) -> bool:
+        """
+        リースの期限を延長する（ハートビート）。リースを失っていれば False。
+        """
+        return True
+
+    def release(self, script_id: str, task_name: str, owner: str = None):
+        pass
+
+    def cache_stats(self) -> dict:
+        return {}
+
+
+class S3JsonStatusStore(StatusStore):
+    """
+    S3上の script_status.json 1ファイルで管理する従来方式。
+
+    - 更新は ETag による条件付き書き込み（If-Match）で行い、競合したら読み直して再試行する
+    - リースはタスクの状態とは別に、予約キー "_leases" に {script_id: {task: {"owner", "expires_at"}}} として保持する
+      （同じファイルなので確保と状態確認は1回の条件付き書き込みで済む。load_all の結果には含めない）
+    - object_store に LocalObjectStore を渡すと、S3なしで同じ挙動を再現できる
+    - 最後に読んだ内容を ETag とともに保持し、読み込みは If-None-Match の条件付きで行う
+      （変更がなければ 304 で本文をダウンロードしない）
+    """
+
+    CAS_RETRIES = 8
+
+    def __init__(self, key: str = "script_status.json", bucket: str = None, object_store=None):
+        self.key = key
+        self.bucket = bucket or os.getenv("AWS_S3_BUCKET_NAME", "youtube-auto-bk")
+        self.objects = object_store or S3ObjectStore(self.bucket)
+        # 同一プロセス内の read-modify-write を直列化する
+        self._lock = threading.Lock()
+        self._cached = None  # (status_data, etag)
+        self.hits = 0
+        self.misses = 0
+
+    def _read(self) -> tuple[dict, str]:
+        # 呼び出し側で書き換えてもキャッシュが汚れないよう、常にコピーを返す
+        cached = self._cached
+        try:
+            body, etag = self.objects.get(self.key, if_none_match=cached[1] if cached else None)
+        except NotModified:
+            self.hits += 1
+            return copy.deepcopy(cached[0]), cached[1]
+        except ObjectNotFound:
+            self._cached = None
+            raise
+
+        self.misses += 1
+        status_data = json.loads(body.decode("utf-8"))
+        self._cached = (copy.deepcopy(status_data), etag)
+        return status_data, etag
+
+    def cache_stats(self) -> dict:
+        return {"hit": self.hits, "miss": self.misses}
+
+    def load_all(self) -> dict:
+        try:
+            return strip_reserved(self._read()[0])
+        except ObjectNotFound:
+            print(f"⚠️ S3にstatusファイルが存在しません: {self.key}")
+            return {}
+        except Exception as e:
+            print(f"❌ S3からのstatus取得失敗: {e}")
+            return None
+
+    def _transact(self, apply, default=None):
+        """
+        apply(status_data) -> (changed, result) を条件付き書き込みで適用し、result を返す。
+        失敗時は default を返す。
+        """
+        with self._lock:
+            for attempt in range(self.CAS_RETRIES):
+                try:
+                    status_data, etag = self._read()
+                except ObjectNotFound:
+                    status_data, etag = {}, None
+                except Exception as e:
+                    print(f"❌ S3からのstatus取得失敗: {e}")
+                    return default
+
+                changed, result = apply(status_data)
+                if not changed:
+                    return result
+
+                body = json.dumps(status_data, ensure_ascii=False, indent=2).encode("utf-8")
+                try:
+                    if etag:
+                        new_etag = self.objects.put(self.key, body, if_match=etag)
+                    else:
+                        new_etag = self.objects.put(self.key, body, if_none_match="*")
+                    # 書き込んだ内容をそのままキャッシュ（次回の読み込みは304で済む）
+                    self._cached = (status_data, new_etag)
+                    return result
+                except PreconditionFailed:
+                    print(f"🔁 status更新が競合しました。再試行します（{attempt + 1}/{self.CAS_RETRIES}）")
+                    time.sleep(random.uniform(0.05, 0.3) * (attempt + 1))
+                except Exception as e:
+                    print(f"❌ ステータスのS3保存失敗: {e}")
+                    return default
+
+            print(f"❌ status更新の競合が解消しませんでした: {self.key}")
+            return default
+
+    def mark_completed(self, script_id: str, task_name: str):
+        def apply(status_data):
+            status_data.setdefault(script_id, {})[task_name] = True
+            self._pop_lease(status_data, script_id, task_name)
+            return True, True
+
+        if self._transact(apply, default=False):
+            print(f"[INFO] 完了フラグ更新（S3）: {script_id} → {task_name}=True")
+
+    def merge_all(self, status_data: dict):
+        def apply(current):
+            for script_id, status in strip_reserved(status_data).items():
+                entry = current.setdefault(script_id, {})
+                for task_name, value in status.items():
+                    if task_name not in entry or value == True:
+                        entry[task_name] = value
+            return True, True
+
+        return self._transact(apply, default=False)
+
+    @staticmethod
+    def _get_lease(status_data: dict, script_id: str, task_name: str) -> dict:
+        return status_data.get(LEASES_KEY, {}).get(script_id, {}).get(task_name)
+
+    @staticmethod
+    def _set_lease(status_data: dict, script_id: str, task_name: str, owner: str, expires_at: float):
+        leases = status_data.setdefault(LEASES_KEY, {}).setdefault(script_id, {})
+        leases[task_name] = {"owner": owner, "expires_at": expires_at}
+
+    @staticmethod
+    def _pop_lease(status_data: dict, script_id: str, task_name: str):
+        leases = status_data.get(LEASES_KEY, {})
+        leases.get(script_id, {}).pop(task_name, None)
+        if script_id in leases and not leases[script_id]:
+            del leases[script_id]
+
+    def _lease_holder(self, status_data: dict, script_id: str, task_name: str, now: float) -> str:
+        # 有効なリースがあれば所有者を返す（期限切れは無視＝自動回収）
+        lease = self._get_lease(status_data, script_id, task_name)
+        if lease and lease.get("expires_at", 0) > now:
+            return lease.get("owner")
+        return None
+
+    def claim_next(self, task_name: str, dependencies: list[str], owner: str = None,
+                   lease_seconds: float = DEFAULT_LEASE_SECONDS, exclude: set = None) -> str:
+        owner = owner or default_owner()
+
+        def apply(status_data):
+            now = time.time()
+            completed_count = 0
+            unmet_count = 0
+            leased_count = 0
+            for script_id, status in status_data.items():
+                if is_reserved_key(script_id) or (exclude and script_id in exclude):
+                    continue
+                if status.get(task_name) == True:
+                    completed_count += 1
+                    continue
+                if any(status.get(dep) != True for dep in dependencies):
+                    unmet_count += 1
+                    continue
+                if self._lease_holder(status_data, script_id, task_name, now):
+                    leased_count += 1
+                    continue
+                self._set_lease(status_data, script_id, task_name, owner, now + lease_seconds)
+                return True, script_id
+
+            print_no_target(task_name, completed_count, unmet_count, leased_count)
+            return False, None
+
+        return self._transact(apply)
+
+    def claim(self, script_id: str, task_name: str, owner: str = None,
+              lease_seconds: float = DEFAULT_LEASE_SECONDS, dependencies: list[str] = None) -> bool:
+        owner = owner or default_owner()
+
+        def apply(status_data):
+            now = time.time()
+            status = status_data.setdefault(script_id, {})
+            # 読んだ後に他のワーカーが完了させていたら確保しない
+            if status.get(task_name) == True:
+                return False, False
+            if any(status.get(dep) != True for dep in dependencies or []):
+                return False, False
+            holder = self._lease_holder(status_data, script_id, task_name, now)
+            if holder and holder != owner:
+                return False, False
+            self._set_lease(status_data, script_id, task_name, owner, now + lease_seconds)
+            return True, True
+
+        return self._transact(apply, default=False)
+
+    def renew(self, script_id: str, task_name: str, owner: str = None,
+              lease_seconds: float = DEFAULT_LEASE_SECONDS) -> bool:
+        owner = owner or default_owner()
+
+        def apply(status_data):
+            lease = self._get_lease(status_data, script_id, task_name)
+            if not lease or lease.get("owner") != owner:
+                return False, False
+            lease["expires_at"] = time.time() + lease_seconds
+            return True, True
+
+        return self._transact(apply, default=False)
+
+    def release(self, script_id: str, task_name: str, owner: str = None):
+        owner = owner or default_owner()
+
+        def apply(status_data):
+            lease = self._get_lease(status_data, script_id, task_name)
+            if not lease or lease.get("owner") != owner:
+                return False, None
+            self._pop_lease(status_data, script_id, task_name)
+            return True, None
+
+        self._transact(apply)
+
+
+class SqliteStatusStore(StatusStore):
+    """
+    ローカルSQLite（WALモード）で管理するバックエンド。
+
+    - (script_id, task) 単位の1行で持つため、更新は行単位でアトミック
+    - 実行可能なタスクはSQLで直接引く。対象タスクの行がない台本も未完了として扱う（S3 JSON と同じ）
+    - claim_next はトランザクション内でリースを取得するため、並列ワーカーでも重複しない
+    - snapshot_key を指定した場合のみ、更新のたびにS3へJSONスナップショットを書き出す
+    """
+
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS task_status (
+        script_id TEXT NOT NULL,
+        task TEXT NOT NULL,
+        done INTEGER NOT NULL DEFAULT 0,
+        lease_owner TEXT,
+        lease_expires REAL,
+        updated_at REAL,
+        PRIMARY KEY (script_id, task)
+    );
+    CREATE INDEX IF NOT EXISTS idx_task_pending ON task_status (task, done, script_id);
+    """
+
+    def __init__(self, db_path: Path = None, snapshot_key: str = None, bucket: str = None):
+        self.db_path = Path(db_path or os.getenv("STATUS_DB_PATH", DEFAULT_DB_PATH))
+        self.snapshot_key = snapshot_key
+        self.bucket = bucket or os.getenv("AWS_S3_BUCKET_NAME", "youtube-auto-bk")
+
+        conn = self._connect()
+        try:
+            conn.executescript(self.SCHEMA)
+            is_empty = conn.execute("SELECT COUNT(*) FROM task_status").fetchone()[0] == 0
+        finally:
+            conn.close()
+
+        # 初回のみ、S3スナップショットがあれば取り込む
+        if is_empty and self.snapshot_key:
+            self.import_snapshot()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(str(self.db_path), timeout=30, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    @contextmanager
+    def _transaction(self):
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            yield conn
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+
+    def load_all(self) -> dict:
+        conn = self._connect()
+        try:
+            rows = conn.execute("SELECT script_id, task, done FROM task_status ORDER BY script_id").fetchall()
+        finally:
+            conn.close()
+        status_data = {}
+        for script_id, task_name, done in rows:
+            status_data.setdefault(script_id, {})[task_name] = True if done else "pending"
+        # 過去に取り込まれた予約キー（"_leases" など）の行は返さない
+        return strip_reserved(status_data)
+
+    def get_script_status(self, script_id: str) -> dict:
+        conn = self._connect()
+        try:
+            rows = conn.execute(
+                "SELECT task, done FROM task_status WHERE script_id = ?", (script_id,)
+            ).fetchall()
+        finally:
+            conn.close()
+        return {task_name: True if done else "pending" for task_name, done in rows if not is_reserved_key(task_name)}
+
+    def mark_completed(self, script_id: str, task_name: str):
+        with self._transaction() as conn:
+            conn.execute(
+                """
+                INSERT INTO task_status (script_id, task, done, updated_at) VALUES (?, ?, 1, ?)
+                ON CONFLICT (script_id, task) DO UPDATE SET
+                    done = 1, lease_owner = NULL, lease_expires = NULL, updated_at = excluded.updated_at
+                """,
+                (script_id, task_name, time.time()),
+            )
+        print(f"[INFO] 完了フラグ更新（SQLite）: {script_id} → {task_name}=True")
+        self.export_snapshot()
+
+    def merge_all(self, status_data: dict):
+        now = time.time()
+        rows = [
+            (script_id, task_name, 1 if value == True else 0, now)
+            for script_id, status in strip_reserved(status_data).items()
+            for task_name, value in status.items()
+        ]
+        with self._transaction() as conn:
+            conn.executemany(
+                """
+                INSERT INTO task_status (script_id, task, done, updated_at) VALUES (?, ?, ?, ?)
+                ON CONFLICT (script_id, task) DO UPDATE SET
+                    done = MAX(done, excluded.done), updated_at = excluded.updated_at
+                """,
+                rows,
+            )
+        self.export_snapshot()
+        return True
+
+    # script_id の一覧（予約キーの行は除く）。対象タスクの行がなくても依存タスクの行があれば台本として扱う
+    SCRIPTS_SQL = "SELECT DISTINCT script_id FROM task_status WHERE substr(script_id, 1, 1) != '_'"
+
+    @staticmethod
+    def _deps_met_sql(dependencies: list[str]) -> tuple[str, list]:
+        # 依存タスクがすべて完了しているか（s.script_id について判定する式）
+        if not dependencies:
+            return "1", []
+        placeholders = ", ".join("?" for _ in dependencies)
+        sql = f"""(SELECT COUNT(*) FROM task_status d
+                   WHERE d.script_id = s.script_id AND d.task IN ({placeholders}) AND d.done = 1) = ?"""
+        return sql, list(dependencies) + [len(dependencies)]
+
+    def _ready_query(self, task_name: str, dependencies: list[str], now: float, exclude: set = None):
+        # 対象タスクの行がない台本は未完了として扱う。リース中のタスクは期限切れのもののみ再取得できる
+        deps_sql, deps_params = self._deps_met_sql(dependencies)
+        sql = f"""
+            SELECT s.script_id FROM ({self.SCRIPTS_SQL}) s
+            LEFT JOIN task_status t ON t.script_id = s.script_id AND t.task = ?
+            WHERE COALESCE(t.done, 0) = 0
+              AND (t.lease_owner IS NULL OR t.lease_expires < ?)
+              AND {deps_sql}
+        """
+        params = [task_name, now] + deps_params
+        if exclude:
+            sql += f" AND s.script_id NOT IN ({', '.join('?' for _ in exclude)})"
+            params += sorted(exclude)
+        sql += " ORDER BY s.script_id LIMIT 1"
+        return sql, params
+
+    def _print_summary(self, conn, task_name: str, dependencies: list[str], now: float):
+        # S3 JSON と同じく、完了済み・依存未達・他ワーカー処理中を分けて数える
+        deps_sql, deps_params = self._deps_met_sql(dependencies)
+        completed_count, unmet_count, leased_count = conn.execute(
+            f"""
+            SELECT COALESCE(SUM(done), 0),
+                   COALESCE(SUM((1 - done) * (1 - deps_met)), 0),
+                   COALESCE(SUM((1 - done) * deps_met * leased), 0)
+            FROM (
+                SELECT COALESCE(t.done, 0) AS done,
+                       CASE WHEN {deps_sql} THEN 1 ELSE 0 END AS deps_met,
+                       CASE WHEN t.lease_expires >= ? THEN 1 ELSE 0 END AS leased
+                FROM ({self.SCRIPTS_SQL}) s
+                LEFT JOIN task_status t ON t.script_id = s.script_id AND t.task = ?
+            )
+            """,
+            deps_params + [now, task_name],
+        ).fetchone()
+        print_no_target(task_name, completed_count, unmet_count, leased_count)
+
+    def next_ready(self, task_name: str, dependencies: list[str], exclude: set = None) -> str:
+        now = time.time()
+        sql, params = self._ready_query(task_name, dependencies, now, exclude)
+        conn = self._connect()
+        try:
+            row = conn.execute(sql, params).fetchone()
+            if row is None:
+                self._print_summary(conn, task_name, dependencies, now)
+                return None
+            return row[0]
+        finally:
+            conn.close()
+
+    def claim_next(self, task_name: str, dependencies: list[str], owner: str = None,
+                   lease_seconds: float = DEFAULT_LEASE_SECONDS, exclude: set = None) -> str:
+        owner = owner or default_owner()
+        now = time.time()
+        sql, params = self._ready_query(task_name, dependencies, now, exclude)
+        with self._transaction() as conn:
+            row = conn.execute(sql, params).fetchone()
+            if row is None:
+                self._print_summary(conn, task_name, dependencies, now)
+                return None
+            script_id = row[0]
+            # 対象タスクの行がまだなければ未完了の行として作る
+            conn.execute(
+                """
+                INSERT INTO task_status (script_id, task, done, lease_owner, lease_expires, updated_at)
+                VALUES (?, ?, 0, ?, ?, ?)
+                ON CONFLICT (script_id, task) DO UPDATE SET
+                    lease_owner = excluded.lease_owner, lease_expires = excluded.lease_expires,
+                    updated_at = excluded.updated_at
+                """,
+                (script_id, task_name, owner, now + lease_seconds, now),
+            )
+        return script_id
+
+    def claim(self, script_id: str, task_name: str, owner: str = None,
+              lease_seconds: float = DEFAULT_LEASE_SECONDS, dependencies: list[str] = None) -> bool:
+        owner = owner or default_owner()
+        now = time.time()
+        with self._transaction() as conn:
+            # 読んだ後に状態が変わっていないか、同じトランザクション内で依存タスクを確認し直す
+            if dependencies:
+                placeholders = ", ".join("?" for _ in dependencies)
+                met = conn.execute(
+                    f"SELECT COUNT(*) FROM task_status WHERE script_id = ? AND task IN ({placeholders}) AND done = 1",
+                    [script_id] + list(dependencies),
+                ).fetchone()[0]
+                if met != len(dependencies):
+                    return False
+            cursor = conn.execute(
+                """
+                INSERT INTO task_status (script_id, task, done, lease_owner, lease_expires, updated_at)
+                VALUES (?, ?, 0, ?, ?, ?)
+                ON CONFLICT (script_id, task) DO UPDATE SET
+                    lease_owner = excluded.lease_owner, lease_expires = excluded.lease_expires,
+                    updated_at = excluded.updated_at
+                WHERE task_status.done = 0
+                  AND (task_status.lease_owner IS NULL OR task_status.lease_expires < ?
+                       OR task_status.lease_owner = excluded.lease_owner)
+                """,
+                (script_id, task_name, owner, now + lease_seconds, now, now),
+            )
+            return cursor.rowcount == 1
+
+    def renew(self, script_id: str, task_name: str, owner: str = None,
+              lease_seconds: float = DEFAULT_LEASE_SECONDS) -> bool:
+        owner = owner or default_owner()
+        now = time.time()
+        with self._transaction() as conn:
+            cursor = conn.execute(
+                """
+                UPDATE task_status SET lease_expires = ?, updated_at = ?
+                WHERE script_id = ? AND task = ? AND lease_owner = ?
+                """,
+                (now + lease_seconds, now, script_id, task_name, owner),
+            )
+            return cursor.rowcount == 1
+
+    def release(self, script_id: str, task_name: str, owner: str = None):
+        owner = owner or default_owner()
+        with self._transaction() as conn:
+            conn.execute(
+                """
+                UPDATE task_status SET lease_owner = NULL, lease_expires = NULL
+                WHERE script_id = ? AND task = ? AND lease_owner = ?
+                """,
+                (script_id, task_name, owner),
+            )
+
+    def export_snapshot(self):
+        """
+        snapshot_key が設定されていれば、現在の状態をS3へJSONで書き出す（失敗しても処理は継続）
+        """
+        if not self.snapshot_key:
+            return
+        try:
+            get_s3_client().put_object(
+                Bucket=self.bucket,
+                Key=self.snapshot_key,
+                Body=json.dumps(self.load_all(), ensure_ascii=False, indent=2).encode("utf-8"),
+                ContentType="application/json"
+            )
+        except Exception as e:
+            print(f"⚠️ S3へのstatusスナップショット保存失敗: {e}")
+
+    def import_snapshot(self):
+        try:
+            s3 = get_s3_client()
+            response = s3.get_object(Bucket=self.bucket, Key=self.snapshot_key)
+            status_data = json.loads(response["Body"].read().decode("utf-8"))
+        except Exception as e:
+            print(f"⚠️ S3のstatusスナップショット取得失敗（空の状態で開始します）: {e}")
+            return
+        self.merge_all(status_data)
+        print(f"[INFO] S3スナップショットを取り込みました: {self.snapshot_key}")
+
+
+class LeaseLost(RuntimeError):
+    """
+    処理中にリースの延長に失敗した（他のワーカーに取られた可能性がある）
+    """
+
+
+class LeaseHeartbeat:
+    """
+    処理中、バックグラウンドで定期的にリースを延長するコンテキストマネージャ。
+
+        with LeaseHeartbeat(store, script_id, "compose") as heartbeat:
+            compose_video(script_id)
+        heartbeat.ensure_held()  # 途中でリースを失っていたら完了を記録しない
+        mark_script_completed(script_id, "compose")
+
+    - 処理が例外で終わった場合はリースを返却し、他のワーカーがすぐに再実行できるようにする
+    - 延長に失敗した（期限切れで他のワーカーに取られた）場合は lost が True になる
+    """
+
+    def __init__(self, store: StatusStore, script_id: str, task_name: str, owner: str = None,
+                 lease_seconds: float = DEFAULT_LEASE_SECONDS, interval: float = None):
+        self.store = store
+        self.script_id = script_id
+        self.task_name = task_name
+        self.owner = owner or default_owner()
+        self.lease_seconds = lease_seconds
+        self.interval = interval or lease_seconds / 3
+        self.lost = False
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            if not self.store.renew(self.script_id, self.task_name, self.owner, self.lease_seconds):
+                print(f"⚠️ リースを失いました: {self.script_id} → {self.task_name}")
+                self.lost = True
+                break
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._stop.set()
+        self._thread.join()
+        if exc_type is not None:
+            self.release()
+        return False
+
+    def release(self):
+        """
+        リースを返却する（自分が所有している場合のみ）
+        """
+        if not self.lost:
+            self.store.release(self.script_id, self.task_name, self.owner)
+
+    def ensure_held(self):
+        """
+        処理中にリースを失っていたら LeaseLost を送出する（他のワーカーが同じタスクを実行している可能性がある）
+        """
+        if self.lost:
+            raise LeaseLost(f"リースを失ったため完了を記録しません: {self.script_id} → {self.task_name}")
+
+
+@lru_cache(maxsize=None)
+def _create_store(backend: str, status_path: str, snapshot: bool) -> StatusStore:
+    if backend == "sqlite":
+        return SqliteStatusStore(snapshot_key=status_path if snapshot else None)
+    if backend == "local":
+        local_dir = os.getenv("STATUS_LOCAL_DIR", str(ROOT_DIR / "status_store"))
+        return S3JsonStatusStore(status_path, object_store=LocalObjectStore(local_dir))
+    return S3JsonStatusStore(status_path)
+
+
+def get_status_store(status_path: str = "script_status.json") -> StatusStore:
+    """
+    環境変数 STATUS_BACKEND でバックエンドを選択する。
+      - "s3"（デフォルト）: S3上の status_path（従来方式）
+      - "local": S3の代わりにローカルの STATUS_LOCAL_DIR に同形式のJSONを置く（オフライン・動作確認用）
+      - "sqlite": ローカルの STATUS_DB_PATH（既定: script_status.db）。
+                  STATUS_S3_SNAPSHOT=1 のときのみS3へスナップショットを同期
+    """
+    backend = os.getenv("STATUS_BACKEND", "s3")
+    snapshot = os.getenv("STATUS_S3_SNAPSHOT") == "1"
+    return _create_store(backend, status_path, snapshot)
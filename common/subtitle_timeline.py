@@ -0,0 +1,202 @@
+import json
+import re
+from datetime import timedelta
+from pathlib import Path
+
+# 字幕のタイムライン（表示イベントの一覧）を組み立て、SRT / JSON / ASS を書き出す共通処理
+# generator / generator_long の generate_subtitles から使う
+# - 各 title の「次の title」の位置は、後ろから1回なめて前計算する（title ごとに後続シーンを探し直さない）
+# - イベントは JSON と同じ {"scene_id", "start_sec", "end_sec", "text", "type"}。SRTに出すものだけ "srt_index" を持つ
+# - SRT / JSON / ASS はこのイベント一覧を1回たどって同時に作る
+# - 音声の長さ・改行済みテキスト・ASSスタイルなど、Shorts / 長尺で違う部分は呼び出し側から渡す
+
+# 字幕の見やすさ調整（遅れて表示、早めに消す）
+DISPLAY_START_DELAY = 0.05
+DISPLAY_EARLY_CUT = 0.05
+
+
+# 秒数を SRT の "00:00:00,000" フォーマットに変換
+def format_srt_time(seconds: float) -> str:
+    td = timedelta(seconds=seconds)
+    total_seconds = int(td.total_seconds())
+    milliseconds = int((seconds - total_seconds) * 1000)
+    hours = total_seconds // 3600
+    minutes = (total_seconds % 3600) // 60
+    seconds = total_seconds % 60
+    return f"{hours:02}:{minutes:02}:{seconds:02},{milliseconds:03}"
+
+
+def format_ass_time(seconds: float) -> str:
+    h = int(seconds // 3600)
+    m = int((seconds % 3600) // 60)
+    s = int(seconds % 60)
+    cs = int((seconds - int(seconds)) * 100)
+    return f"{h:01}:{m:02}:{s:02}.{cs:02}"
+
+
+def apply_highlight_tags(text: str, highlight_dict: dict) -> str:
+    for word in highlight_dict.get("emotional", []):
+        text = text.replace(word, r"{\1c&H33FFFF&}" + word + r"{\r}")  # yellow
+    for word in highlight_dict.get("emphasis", []):
+        text = text.replace(word, r"{\1c&H0000FF&}" + word + r"{\r}")  # blue（赤なら &H0000FF& を赤コードに変更）
+    return text
+
+
+def next_title_indices(timing_data: list, title_type: str = "title") -> list:
+    """
+    各シーンより後ろにある最初の title の位置（なければ None）を返す。後ろから1回たどるだけで求める
+    """
+    result = [None] * len(timing_data)
+    next_index = None
+    for k in range(len(timing_data) - 1, -1, -1):
+        result[k] = next_index
+        if timing_data[k]["type"] == title_type:
+            next_index = k
+    return result
+
+
+def build_timeline(timing_data: list, duration_of, text_of,
+                   number_titles: bool = False, split_main_title: bool = False) -> list:
+    """
+    timing（script_meta）から字幕イベントの一覧を作る。
+    - duration_of(scene): 表示に使う長さ（秒）。None のシーンは飛ばす
+    - text_of(scene): 本文（summary / source / fix など）の改行済みテキスト
+    - number_titles: title に「（1）」のような通し番号を付ける（Shorts）
+    - split_main_title: main_title を最初の改行で上下2つのテロップに分ける（Shorts）
+    """
+    next_title = next_title_indices(timing_data)
+    if timing_data:
+        # 後ろに title がないときは、最後のシーンの終わりまで title_top を出す
+        last_scene = timing_data[-1]
+        timeline_end = last_scene["start_sec"] + last_scene["duration"]
+
+    events = []
+    current_start = 0.0  # 各sceneの再生開始時間（累積）
+    title_count = 1
+
+    for i, scene in enumerate(timing_data):
+        duration = duration_of(scene)
+        if duration is None:
+            continue
+        scene_id = scene["scene_id"]
+
+        if scene["type"] == "title":
+            text = scene["text"]
+            if number_titles:
+                text = f"（{title_count}）{text}"
+                title_count += 1
+            start_sec = current_start
+            end_sec = current_start + duration
+            k = next_title[i]
+            next_title_start = timing_data[k]["start_sec"] if k is not None else timeline_end
+
+            # ① 中央表示（メタdurationでぴったり表示）
+            events.append({"scene_id": scene_id + "_center", "start_sec": start_sec, "end_sec": end_sec,
+                           "text": text, "type": "title_center"})
+            # ② 上部表示：startは titleのendから、endは次のtitleのstart
+            events.append({"scene_id": scene_id + "_top", "start_sec": end_sec, "end_sec": next_title_start,
+                           "text": text, "type": "title_top"})
+            current_start = end_sec
+            continue
+
+        if scene["type"] == "main_title":
+            start_sec = current_start
+            end_sec = current_start + duration
+            if split_main_title:
+                # 改行で上下分割（最初の \n または \\n）
+                split_text = re.split(r"(?:\\n|\n)", scene["text"], maxsplit=1)
+                top_text = split_text[0].strip()
+                center_text = split_text[1].strip() if len(split_text) > 1 else ""
+                events.append({"scene_id": scene_id + "_top", "start_sec": start_sec, "end_sec": end_sec,
+                               "text": top_text, "type": "main_title_top"})
+                if center_text:
+                    events.append({"scene_id": scene_id + "_center", "start_sec": start_sec, "end_sec": end_sec,
+                                   "text": center_text, "type": "main_title_center"})
+            else:
+                events.append({"scene_id": scene_id, "start_sec": start_sec, "end_sec": end_sec,
+                               "text": scene["text"], "type": "main_title"})
+            current_start = end_sec
+            continue
+
+        if scene["type"] == "source":
+            # 直前のシーンに重ねて表示する（current_start は更新しない）
+            start_sec = current_start - duration
+            end_sec = current_start
+        else:
+            start_sec = current_start
+            end_sec = current_start + duration
+            current_start = end_sec
+
+        events.append({"scene_id": scene_id, "start_sec": start_sec, "end_sec": end_sec,
+                       "text": text_of(scene), "type": scene["type"], "srt_index": i + 1})
+
+    return events
+
+
+def render_outputs(events: list, ass_styles: dict, highlight_dict: dict) -> tuple[list, list, list]:
+    """
+    イベント一覧を1回たどり、(SRTの行, JSON用のリスト, ASSの Dialogue 行) を返す
+    """
+    srt_lines = []
+    subtitle_json = []
+    ass_events = []
+
+    for event in events:
+        start_sec = round(event["start_sec"], 2)
+        end_sec = round(event["end_sec"], 2)
+        subtitle_json.append({
+            "scene_id": event["scene_id"],
+            "start_sec": start_sec,
+            "end_sec": end_sec,
+            "text": event["text"],
+            "type": event["type"]
+        })
+
+        if event.get("srt_index") is not None:
+            # 実際に表示する字幕の時間（やや遅れて出て、早めに消す）
+            display_start_sec = event["start_sec"] + DISPLAY_START_DELAY
+            display_end_sec = max(event["end_sec"] - DISPLAY_EARLY_CUT, event["start_sec"] + 0.2)
+            srt_lines.append(f"{event['srt_index']}")
+            srt_lines.append(f"{format_srt_time(display_start_sec)} --> {format_srt_time(display_end_sec)}")
+            srt_lines.append(event["text"])
+            srt_lines.append("")
+
+        if event["type"] == "title_top":
+            continue  # TitleTop はASSに出さない
+        style = ass_styles.get(event["type"], "Summary")
+        # sourceだけレイヤーを1に（最前面）
+        layer = 1 if event["type"] == "source" else 0
+        text = event["text"].replace("\\n", "\n").replace("\n", r"\N").replace(',', '，')
+        text = apply_highlight_tags(text, highlight_dict)
+        ass_events.append(
+            f"Dialogue: {layer},{format_ass_time(start_sec)},{format_ass_time(end_sec)},{style},,"
+            f"0,0,0,,{text}"
+        )
+
+    return srt_lines, subtitle_json, ass_events
+
+
+def write_outputs(events: list, output_dir: Path, script_id: str, ass_header: str, ass_styles: dict,
+                  highlight_dict: dict):
+    """
+    subtitles_{script_id}.srt / .json / .ass を output_dir に保存する
+    """
+    srt_lines, subtitle_json, ass_events = render_outputs(events, ass_styles, highlight_dict)
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    srt_path = output_dir / f"subtitles_{script_id}.srt"
+    with open(srt_path, "w", encoding="utf-8") as f:
+        f.write("\n".join(srt_lines))
+
+    json_path = output_dir / f"subtitles_{script_id}.json"
+    with open(json_path, "w", encoding="utf-8") as f:
+        json.dump(subtitle_json, f, ensure_ascii=False, indent=2)
+
+    ass_path = output_dir / f"subtitles_{script_id}.ass"
+    with open(ass_path, "w", encoding="utf-8") as f:
+        f.write(ass_header)
+        f.write("\n".join(ass_events))
+
+    print(f"✅ 字幕SRT保存: {srt_path}")
+    print(f"✅ 字幕JSON保存: {json_path}")
+    print(f"✅ ASS字幕保存: {ass_path}")
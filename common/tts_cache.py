@@ -0,0 +1,88 @@
+import hashlib
+import json
+import os
+import threading
+from functools import lru_cache
+from pathlib import Path
+
+from common.disk_lru import DiskLRU
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+DEFAULT_CACHE_DIR = ROOT_DIR / "cache" / "tts"
+DEFAULT_MAX_MB = 500
+
+
+class TTSCache:
+    """
+    VOICEVOXの合成結果をディスクに保存する内容アドレス型キャッシュ。
+
+    - キーは「整形後のひらがなテキスト + 話者ID + 合成パラメータ」のハッシュ
+    - 合計サイズが上限を超えたら、最終利用（mtime）が古いものから削除する（LRU、common.disk_lru）
+    - 複数スレッドから同時に使用可能（書き込みは一時ファイル → os.replace）
+    """
+
+    def __init__(self, cache_dir: Path = DEFAULT_CACHE_DIR, max_bytes: int = DEFAULT_MAX_MB * 1024 * 1024):
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.lru = DiskLRU(self.cache_dir, "*/*.wav", max_bytes)
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(text: str, speaker: int, params: dict) -> str:
+        payload = json.dumps({"text": text, "speaker": speaker, "params": params},
+                             ensure_ascii=False, sort_keys=True)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _path(self, key: str) -> Path:
+        # 1ディレクトリにファイルが集中しないよう先頭2文字で分ける
+        return self.cache_dir / key[:2] / f"{key}.wav"
+
+    def get(self, key: str) -> bytes | None:
+        path = self._path(key)
+        try:
+            data = path.read_bytes()
+            os.utime(path)  # 最終利用時刻を更新（LRU用）
+        except FileNotFoundError:
+            with self._lock:
+                self.misses += 1
+            return None
+        with self._lock:
+            self.hits += 1
+        return data
+
+    def put(self, key: str, data: bytes):
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        tmp_path.write_bytes(data)
+        replaced_size = path.stat().st_size if path.exists() else 0
+        os.replace(tmp_path, path)
+        self.lru.added(len(data), replaced_size)
+
+    def evict(self):
+        self.lru.evict()
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "hit": self.hits,
+            "miss": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+        }
+
+    def stats_line(self) -> str:
+        s = self.stats()
+        return f"hit={s['hit']} / miss={s['miss']}（ヒット率 {s['hit_rate']:.0%}）"
+
+
+@lru_cache(maxsize=None)
+def get_tts_cache() -> TTSCache:
+    """
+    環境変数 TTS_CACHE_DIR / TTS_CACHE_MAX_MB で保存先と上限サイズを変更できる。
+    """
+    cache_dir = os.getenv("TTS_CACHE_DIR", str(DEFAULT_CACHE_DIR))
+    max_mb = float(os.getenv("TTS_CACHE_MAX_MB", DEFAULT_MAX_MB))
+    return TTSCache(cache_dir, int(max_mb * 1024 * 1024))
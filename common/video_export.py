@@ -1,6 +1,6 @@
 from moviepy.editor import VideoClip
 
-def export_video_high_quality(clip: VideoClip, output_path: str):
+def export_video_high_quality(clip: VideoClip, output_path: str, threads: int = None):
     """
     高画質・高再現性・高互換性で動画を書き出す共通関数。
     ffmpegのビットレート・プロファイル・ピクセル形式・音声設定などをすべて明示。
@@ -8,6 +8,7 @@ def export_video_high_quality(clip: VideoClip, output_path: str):
     Parameters:
         clip (VideoClip): 書き出すmoviepyクリップ
         output_path (str): 出力先パス（例："output/final.mp4"）
+        threads (int): libx264 のスレッド数（None なら ffmpeg に任せる）
     """
     clip.write_videofile(
         output_path,
@@ -15,6 +16,7 @@ def export_video_high_quality(clip: VideoClip, output_path: str):
         audio_codec="aac",             # 音声：AAC（汎用）
         fps=30,                        # フレームレート統一
         preset="medium",               # エンコード速度と画質のバランス
+        threads=threads,
         ffmpeg_params=[
             "-b:v", "4000k",
             "-maxrate", "4000k",
@@ -0,0 +1,77 @@
+import os
+from pathlib import Path
+
+import requests
+
+from common.encoder import select_encoder, run_encode, thread_args
+from common.ffmpeg_renderer import FPS
+
+# Runway などで生成した動画を、ダウンロードしながら compose 用に正規化して保存する
+# 正規化 = 中央切り出し（compose と同じ範囲）・30fps・yuv420p・音声なし
+# compose では切り出し・fps変換がほぼ不要になり、区間の中間動画も軽くなる
+
+CHUNK_SIZE = 1 << 20  # ffmpeg が直接読めない場合のダウンロード単位（1MiB）
+HTTP_INPUT_ARGS = ["-reconnect", "1", "-reconnect_streamed", "1", "-reconnect_delay_max", "5"]
+
+
+def normalize_command(src: str, output_path: Path, frame_size: tuple, encoder: dict) -> list[str]:
+    fw, fh = frame_size
+    vf = f"crop='min(iw,{fw})':'min(ih,{fh})',fps={FPS},setsar=1,format=yuv420p"
+    if encoder.get("filter"):
+        vf += "," + encoder["filter"]
+    is_http = str(src).startswith(("http://", "https://"))
+    return [
+        "ffmpeg", "-y", "-hide_banner", "-loglevel", "error",
+        *encoder.get("init", []),
+        *(HTTP_INPUT_ARGS if is_http else []),
+        "-i", str(src),
+        "-vf", vf, "-an",
+        *encoder["args"], *thread_args(),
+        "-movflags", "+faststart",
+        str(output_path),
+    ]
+
+
+def normalize_clip(src: str, output_path: Path, frame_size: tuple, encoder: dict = None) -> float:
+    """
+    src（ローカルパス or URL）を正規化して output_path に書き出し、所要時間（秒）を返す。
+    書き出し途中のファイルを compose が拾わないよう、一時ファイルに書いてから置き換える。
+    """
+    encoder = encoder or select_encoder()
+    output_path = Path(output_path)
+    tmp_path = output_path.with_name(f"{output_path.stem}.{os.getpid()}.tmp.mp4")
+    try:
+        elapsed = run_encode(normalize_command(src, tmp_path, frame_size, encoder),
+                             f"正規化 {output_path.name}", encoder)
+        os.replace(tmp_path, output_path)
+    finally:
+        tmp_path.unlink(missing_ok=True)
+    return elapsed
+
+
+def download(url: str, path: Path):
+    with requests.get(url, stream=True, timeout=60) as r:
+        r.raise_for_status()
+        with open(path, "wb") as f:
+            for chunk in r.iter_content(chunk_size=CHUNK_SIZE):
+                f.write(chunk)
+
+
+def ingest_clip(url: str, output_path: Path, frame_size: tuple) -> Path:
+    """
+    URL の動画を ffmpeg に直接読ませて（HTTPのストリーミング読み込み）正規化する。
+    ffmpeg が URL を読めない環境では、1MiB 単位でダウンロードしてから正規化する。
+    """
+    output_path = Path(output_path)
+    try:
+        normalize_clip(url, output_path, frame_size)
+    except RuntimeError as e:
+        print(f"⚠️ ストリーミング正規化に失敗したため、ダウンロードしてから正規化します: {e}")
+        raw_path = output_path.with_name(f"{output_path.stem}.raw.mp4")
+        try:
+            download(url, raw_path)
+            normalize_clip(raw_path, output_path, frame_size)
+        finally:
+            raw_path.unlink(missing_ok=True)
+    print(f"💾 正規化済み動画を保存: {output_path}")
+    return output_path
@@ -1,9 +1,9 @@
 import sys
 import os
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
-import random
 
 import json
+import shutil
 import numpy as np
 import re
 import math
@@ -18,19 +18,28 @@ from common.save_config import save_config_snapshot
 from common.script_utils import get_next_script_id, mark_script_completed
 from PIL import Image
 from common.video_export import export_video_high_quality
+from common.ffmpeg_renderer import render_single_pass, AUDIO_ARGS
+from common.segment_cache import render_segmented
+from common.seeded_random import get_rng, make_seed
+from common.encoder import select_encoder, with_encoder_filter, run_encode, encoder_threads, thread_args
+from common.motion import PrecomputedMotion, EFFECTS
+from common.audio_meta import get_audio_duration
+from common.audio_mix import mix_down
+from common.asset_cache import get_decoded_asset
 
 from datetime import datetime, timedelta
 from collections import defaultdict
 
 
-# 初期処理
-backup_script(__file__)
-save_config_snapshot()
+# 初期処理（スクリプト・設定のバックアップは main / __main__ で1回だけ行う。
+# compose_farm のワーカープロセスは import するだけなので、ここでは実行しない）
 load_dotenv()
 
 # 定数
 VIDEO_WIDTH = 720
 VIDEO_HEIGHT = 1280
+FRAME_SIZE = (720, 720)  # 背景素材（画像・動画）を切り出すサイズ
+MOTION_FRAME_SIZE = (720, 720)  # パン・ズームする静止画の出力サイズ
 
 # def add_overlay_bars_to_final(video_clip, top_height=100, color=(0, 0, 0)):
 #     duration = video_clip.duration
@@ -68,67 +77,37 @@ def check_srt_overlaps(srt_path: Path):
 
     print("✅ 字幕オーバーラップチェック完了\n")
 
-def make_offset_func(direction, offset, duration):
-    if direction == "up":
-        return lambda t: 0, lambda t: offset * (1 - 2 * t / duration)
-    elif direction == "down":
-        return lambda t: 0, lambda t: -offset * (1 - 2 * t / duration)
-    elif direction == "left":
-        return lambda t: offset * (1 - 2 * t / duration), lambda t: 0
-    elif direction == "right":
-        return lambda t: -offset * (1 - 2 * t / duration), lambda t: 0
-    elif direction == "diag":
-        return (
-            lambda t: -offset * (1 - 2 * t / duration),
-            lambda t: -offset * (1 - 2 * t / duration),
-        )
-    else:
-        return lambda t: 0, lambda t: 0
-
-
-def make_cropper(x_offset_func, y_offset_func, scale_func=None, duration=1.0):
-    def fl(gf, t):
-        t = min(t, duration)
-        frame = gf(t)
-        zoom = scale_func(t) if scale_func else 1.0
-        crop_half = int(360 / zoom)
-
-        x_center = 512 + int(x_offset_func(t))
-        y_center = 512 + int(y_offset_func(t))
-
-        return frame[
-            y_center - crop_half:y_center + crop_half,
-            x_center - crop_half:x_center + crop_half
-        ]
-    return fl
-
-
-
-def compose_video(script_id: str):
+def load_compose_renderer() -> str:
+    """
+    合成方式（config.json の compose_renderer）
+    - "ffmpeg": 1回のエンコードで完成版まで書き出す（デフォルト）
+    - "segments": 背景素材ごとの中間動画をキャッシュし、連結（ストリームコピー）で完成版にする
+    - "moviepy": 従来方式（moviepy書き出し → 字幕焼き込み → 互換変換）
+    """
+    with open("config/config.json", "r", encoding="utf-8") as f:
+        return json.load(f).get("compose_renderer", "ffmpeg")
+
+
+def build_render_plan(script_id: str) -> dict:
+    """
+    tags / 字幕JSON から「どの素材を・いつ・どれだけ表示し、どの音を重ねるか」を組み立てる。
+    レンダラー（ffmpeg / moviepy）に依存しない部分。
+    """
     timing_path = Path(f"data/stage_2_tag/tags_{script_id}.json")
-    subtitle_path = Path(f"data/stage_4_subtitles/subtitles_{script_id}.srt")
     audio_base_dir = Path(f"data/stage_1_audio/{script_id}")
     image_base_dir = Path(f"data/stage_5_image/{script_id}")
-    output_dir = Path(f"data/stage_6_output/{script_id}")
-    output_dir.mkdir(parents=True, exist_ok=True)
 
     with open(timing_path, "r", encoding="utf-8") as f:
         data = json.load(f)
         scenes = data["scenes"]
 
-    clips = []
-    audio_clips = []
-    current_start = 0.0  # 累積型の再生開始時刻（すべての基準）
-
-    # ✅ parent_scene_id ごとに背景画像を表示
-    from collections import defaultdict
-
     # ✅ parent_scene_id ごとに背景画像を表示（音声と完全同期させる）
     parent_scene_map = defaultdict(list)
     for scene in scenes:
         parent_scene_map[scene["parent_scene_id"]].append(scene)
 
     timeline_pointer = 0.0  # 画像表示の累積開始時間。音声と同じく前から順に積み上げていく
+    segments = []
 
     for parent_id, group in parent_scene_map.items():
         video_path_mv = image_base_dir / f"{parent_id}_mv.mp4"
@@ -153,113 +132,46 @@ def compose_video(script_id: str):
             print(f"⚠️ 素材が見つからないためスキップ: {parent_id}")
             continue
 
-
         # ✅ そのグループに含まれる各 scene_id.wav の再生時間（＋SILENCE）を積算
         group_duration = 0.0
         for scene in group:
             audio_path = audio_base_dir / f"{scene['scene_id']}.wav"
             if not audio_path.exists():
                 continue
-            audio_clip = AudioFileClip(str(audio_path))
-            group_duration += audio_clip.duration + SILENCE_DURATION
-
-        # ✅ この親sceneの画像を表示する開始時刻と表示時間を決定（＝音声と完全一致）
-        start_time = timeline_pointer
-        duration = group_duration
-        end_time = start_time + duration
-        timeline_pointer = end_time  # 次の親sceneの画像表示開始時間に更新
-
-        if asset_type == "image":
-            pil_image = Image.open(asset_path).convert("RGB")
-            np_frame = np.array(pil_image)
-            img_clip = ImageClip(np_frame)
-
-            offset = 50
-            x_offset_func = lambda t: 0
-            y_offset_func = lambda t: 0
-            scale_func = None
-
-            if asset_path.name.endswith("_mv.png"):
-                effect = random.choice([
-                    "pan_up", "pan_down", "pan_left", "pan_right", "pan_diag",
-                    "zoom_in", "zoom_out"
-                ])
-                print(f"✨ effect applied to {parent_id}: {effect}")
-
-                if effect == "pan_up":
-                    x_offset_func, y_offset_func = make_offset_func("up", offset, duration)
-                elif effect == "pan_down":
-                    x_offset_func, y_offset_func = make_offset_func("down", offset, duration)
-                elif effect == "pan_left":
-                    x_offset_func, y_offset_func = make_offset_func("left", offset, duration)
-                elif effect == "pan_right":
-                    x_offset_func, y_offset_func = make_offset_func("right", offset, duration)
-                elif effect == "pan_diag":
-                    x_offset_func, y_offset_func = make_offset_func("diag", offset, duration)
-                elif effect == "zoom_in":
-                    scale_func = lambda t: 1.0 + 0.1 * (t / duration)
-                elif effect == "zoom_out":
-                    scale_func = lambda t: 1.1 - 0.1 * (t / duration)
-
-                img_clip = img_clip.fl(
-                    make_cropper(x_offset_func, y_offset_func, scale_func, duration),
-                    apply_to=["mask"]
-                )
-
-            img_clip = img_clip.set_position(("center", "center")).resize((720, 720))
-            clip = img_clip.set_start(start_time).set_duration(duration).set_fps(30)
-
-            print(f"🖼️ 画像clip: parent_id={parent_id}, start={start_time:.2f}s, duration={duration:.2f}s, file={asset_path.name}")
-
-        elif asset_type == "video":
-            clip = (
-                VideoFileClip(str(asset_path))
-                .without_audio()
-                .set_start(start_time)
-                .set_duration(duration)
-                .set_fps(30)
-            )
-
-            # ✅ 中央正方形720×720でcropするだけ（パン・ズームなし）
-            clip = clip.crop(x_center=clip.w // 2, y_center=clip.h // 2, width=720, height=720)
-            clip = clip.set_position(("center", "center"))
-
-        clips.append(clip)  # ← ここ
-
-    for i, scene in enumerate(scenes):
-        scene_id = scene["scene_id"]
-        audio_path = audio_base_dir / f"{scene_id}.wav"
-
+            # generate_audio が記録した実長を優先し、なければWAVヘッダから読む（デコードしない）
+            group_duration += get_audio_duration(audio_path, scene.get("audio_duration")) + SILENCE_DURATION
+
+        effect = None
+        if asset_type == "image" and asset_path.name.endswith("_mv.png"):
+            # (script_id, parent_id) ごとに固定のシードで選ぶ（再実行しても同じ動きになり、区間キャッシュが効く）
+            effect = get_rng(script_id, parent_id, "compose").choice(EFFECTS)
+            print(f"✨ effect applied to {parent_id}: {effect}")
+
+        segments.append({
+            "parent_id": parent_id,
+            "path": asset_path,
+            "type": asset_type,
+            "start": timeline_pointer,
+            "duration": group_duration,
+            "effect": effect,
+        })
+        print(f"🖼️ {asset_type}: parent_id={parent_id}, start={timeline_pointer:.2f}s, duration={group_duration:.2f}s, file={asset_path.name}")
+        timeline_pointer += group_duration  # 次の親sceneの画像表示開始時間に更新
+
+    # ナレーション（シーン順に連結）
+    narration = []
+    for scene in scenes:
+        audio_path = audio_base_dir / f"{scene['scene_id']}.wav"
         if not audio_path.exists():
-            print(f"⚠️ スキップ: {scene_id}（画像または音声が見つからない）")
+            print(f"⚠️ スキップ: {scene['scene_id']}（画像または音声が見つからない）")
             continue
+        narration.append({
+            "scene_id": scene["scene_id"],
+            "path": audio_path,
+            "duration": get_audio_duration(audio_path, scene.get("audio_duration")),  # 末尾の無音を含むWAVの長さ
+        })
 
-        # 音声読み込み + 無音0秒追加
-        audio_clip = AudioFileClip(str(audio_path))
-        silence = AudioClip(make_frame=lambda t: [0], duration=SILENCE_DURATION, fps=44100).set_fps(44100)
-        audio_clip = concatenate_audioclips([audio_clip, silence])
-        real_duration = audio_clip.duration  # SILENCE_DURATIONを含む
-
-        # 安全な時間定義
-        start_time = current_start
-        end_time = start_time + real_duration
-        duration = end_time - start_time  # ← duration を先に定義！
-
-
-        # 音声clip（明示的にstart/endを指定）
-        audio_clip = audio_clip.set_start(start_time).set_end(end_time)
-        audio_clips.append(audio_clip)
-
-        current_start = end_time  # 次のsceneの基準時間に進める
-
-    if not clips:
-        print("❌ 有効なsceneがありません。動画を生成できません。")
-        return
-
-    final_audio = concatenate_audioclips(audio_clips)
-
-    # ======== 🎵 BGM・効果音の挿入 ========
-
+    # ======== 🎵 BGM・効果音 ========
     project_root = Path(__file__).parent.parent
     fixed_assets_dir = project_root / "fixed_assets"
 
@@ -271,22 +183,18 @@ def compose_video(script_id: str):
     print(f"存在するか？ {bgm_path.exists()}")
 
     # BGM（全体にループ）
+    bgm = None
     if not bgm_path.exists():
         print("⚠️ BGMファイルが見つかりません。スキップします。")
-        bgm_clip = None
     else:
-        bgm_clip = AudioFileClip(str(bgm_path))
-        bgm_duration = final_audio.duration
-        bgm_loop = afx.audio_loop(bgm_clip, duration=bgm_duration).volumex(0.02)  # 音量調整（0.0〜1.0）
+        bgm = {"path": bgm_path, "volume": 0.02}  # 音量調整（0.0〜1.0）
 
     subtitle_json_path = Path(f"data/stage_4_subtitles/subtitles_{script_id}.json")
     with open(subtitle_json_path, "r", encoding="utf-8") as f:
         subtitle_scenes = json.load(f)
 
-
     # 効果音の挿入（main_title: ドドン, title_top: ドン）
-    se_clips = []
-
+    se = []
     for scene in subtitle_scenes:
         scene_type = scene.get("type", "")
         scene_start = scene.get("start_sec", None)
@@ -294,19 +202,82 @@ def compose_video(script_id: str):
             continue
 
         if scene_type == "main_title_top" and se_main_path.exists():
-            se_clip = AudioFileClip(str(se_main_path)).set_start(scene_start).volumex(0.5)
-            se_clips.append(se_clip)
+            se.append({"path": se_main_path, "start": scene_start, "volume": 0.5})
         elif scene_type == "title_center" and se_center_path.exists():
-            se_clip = AudioFileClip(str(se_center_path)).set_start(scene_start).volumex(0.4)
-            se_clips.append(se_clip)
+            se.append({"path": se_center_path, "start": scene_start, "volume": 0.4})
+
+    return {
+        "segments": segments,
+        "narration": narration,
+        "bgm": bgm,
+        "se": se,
+        "ass": Path(f"data/stage_4_subtitles/subtitles_{script_id}.ass"),
+    }
+
+
+def save_render_plan(script_id: str, plan: dict, path: Path):
+    """
+    選んだ素材・エフェクトとシードを記録する（再実行時に同じ結果になったかを確認できるように）
+    """
+    record = {
+        "script_id": script_id,
+        "segments": [
+            {**segment, "path": Path(segment["path"]).as_posix(),
+             "seed": make_seed(script_id, segment["parent_id"], "compose")}
+            for segment in plan["segments"]
+        ],
+    }
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(record, f, ensure_ascii=False, indent=2)
+
+
+def render_with_moviepy(plan: dict, output_dir: Path, final_path: Path, compatible_path: Path):
+    """
+    従来方式: moviepyで書き出し → ASS字幕焼き込み → 再生互換版へ変換（3回エンコード）
+    字幕焼き込み・互換変換のエンコーダは common.encoder で自動選択する
+    """
+    clips = []
+    readers = []  # 書き出し後に close する読み込み元（ffmpegのサブプロセスを残さない）
+    for segment in plan["segments"]:
+        asset_path = segment["path"]
+        start_time = segment["start"]
+        duration = segment["duration"]
+        effect = segment["effect"]
+
+        if segment["type"] == "image":
+            pil_image = Image.open(asset_path).convert("RGB")
+            if effect:
+                # 全フレームの切り出し位置を事前計算し、各フレームはスライスのみで生成する
+                motion = PrecomputedMotion(np.array(pil_image), effect, duration, MOTION_FRAME_SIZE)
+                img_clip = VideoClip(make_frame=motion.frame_at, duration=duration)
+            else:
+                # 静止画は1回だけリサイズしておく（フレームごとのリサイズをしない）
+                img_clip = ImageClip(np.array(pil_image.resize((720, 720), Image.LANCZOS)))
+
+            img_clip = img_clip.set_position(("center", "center"))
+            clip = img_clip.set_start(start_time).set_duration(duration).set_fps(30)
 
-    # ======== 🎧 音声合成 ========
-    audio_layers = [final_audio]  # ナレーション主体
-    if bgm_clip:
-        audio_layers.append(bgm_loop)
-    audio_layers.extend(se_clips)
+        else:
+            video_clip = VideoFileClip(str(asset_path))
+            readers.append(video_clip)
+            clip = (
+                video_clip
+                .without_audio()
+                .set_start(start_time)
+                .set_duration(duration)
+                .set_fps(30)
+            )
 
-    composite_audio = CompositeAudioClip(audio_layers)
+            # ✅ 中央正方形720×720でcropするだけ（パン・ズームなし）
+            clip = clip.crop(x_center=clip.w // 2, y_center=clip.h // 2, width=720, height=720)
+            clip = clip.set_position(("center", "center"))
+
+        clips.append(clip)
+
+    # ======== 🎧 音声合成 ========
+    # ナレーション・BGM・効果音は NumPy で1本のWAVにミックスダウン済みのものを使う
+    composite_audio = AudioFileClip(str(plan["mixed_audio"]))
+    readers.append(composite_audio)
 
     # ✅ base_video をこのタイミングで定義
     base_video = CompositeVideoClip(clips, size=(VIDEO_WIDTH, VIDEO_HEIGHT))
@@ -315,85 +286,96 @@ def compose_video(script_id: str):
     final = base_video.set_audio(composite_audio)
 
     temp_path = output_dir / "no_subtitles.mp4"
-    export_video_high_quality(final, str(temp_path))
+    try:
+        export_video_high_quality(final, str(temp_path), threads=encoder_threads())
+    finally:
+        for reader in readers:
+            reader.close()
+
+    # .ass字幕を使って no_subtitles.mp4 → final.mp4 を生成
+    encoder = select_encoder()
+    ass_path = plan["ass"]
+    ffmpeg_ass_cmd = [
+        "ffmpeg", "-y", *encoder.get("init", []), *encoder["hwaccel"], "-i", str(temp_path),
+        "-vf", with_encoder_filter(encoder, f"ass={ass_path.as_posix()}"),
+        *encoder["args"], *thread_args(), *AUDIO_ARGS,
+        str(final_path),
+    ]
+    run_encode(ffmpeg_ass_cmd, "ASS字幕焼き込み", encoder)
+    print(f"✅ .ass字幕付き動画を保存しました: {final_path}")
+
+    ffmpeg_compat_cmd = [
+        "ffmpeg", "-y", *encoder.get("init", []), *encoder["hwaccel"], "-i", str(final_path),
+        "-vf", with_encoder_filter(encoder, "scale=trunc(iw/2)*2:trunc(ih/2)*2,format=yuv420p"),
+        *encoder["args"], *thread_args(), *AUDIO_ARGS,
+        str(compatible_path),
+    ]
+    run_encode(ffmpeg_compat_cmd, "互換変換", encoder)
+    print(f"✅ 再生互換版動画を保存しました: {compatible_path}")
 
-        # .ass字幕を使って no_subtitles.mp4 → final.mp4 を生成
-    ass_path = Path(f"data/stage_4_subtitles/subtitles_{script_id}.ass")
+
+def compose_video(script_id: str):
+    output_dir = Path(f"data/stage_6_output/{script_id}")
+    output_dir.mkdir(parents=True, exist_ok=True)
     final_path = output_dir / f"final{script_id}.mp4"
+    compatible_path = output_dir / "final_compatible.mp4"
 
-    if not ass_path.exists():
-        raise FileNotFoundError(f"❌ .ass 字幕ファイルが見つかりません: {ass_path}")
-
-    ffmpeg_ass_cmd = (
-        f'ffmpeg -y -hwaccel cuda -i "{temp_path}" '
-        f'-vf "ass={ass_path.as_posix()}" '
-        f'-c:v h264_nvenc -preset slow -b:v 4000k -maxrate 4000k -bufsize 8000k '
-        f'-pix_fmt yuv420p -profile:v baseline -level 4.0 '
-        f'-c:a aac -b:a 128k -ar 44100 -ac 2 '
-        f'"{final_path}"'
-    )
-
-    print(f"[ASS字幕焼き込み] {ffmpeg_ass_cmd}")
-    ret = os.system(ffmpeg_ass_cmd)
-    if ret != 0:
-        raise RuntimeError(f"❌ .ass字幕焼き込み処理に失敗しました（code={ret}）")
-    print(f"✅ .ass字幕付き動画を保存しました: {final_path}")
+    plan = build_render_plan(script_id)
+    if not plan["segments"] or not plan["narration"]:
+        print("❌ 有効なsceneがありません。動画を生成できません。")
+        return
 
+    if not plan["ass"].exists():
+        raise FileNotFoundError(f"❌ .ass 字幕ファイルが見つかりません: {plan['ass']}")
 
-    # if subtitle_path.exists():
-    #     check_srt_overlaps(subtitle_path)
-
-    #     ffmpeg_command = (
-    #         f'ffmpeg -y -hwaccel cuda -i "{temp_path}" '
-    #         f'-vf "subtitles=\'{subtitle_path.as_posix()}\':force_style='
-    #         f'\'Fontname=Noto Sans CJK JP, Alignment=2,Fontsize=18,Outline=2,MarginV=80,Shadow=1, '
-    #         f'PrimaryColour=&H00FFFFFF,OutlineColour=&H00000000,ShadowColour=&H80000000,BorderStyle=1, LineSpacing=0\'" '
-    #         f'-c:v h264_nvenc -preset slow -b:v 4000k -maxrate 4000k -bufsize 8000k '
-    #         f'-pix_fmt yuv420p -profile:v baseline -level 4.0 '
-    #         f'-c:a aac -b:a 128k -ar 44100 -ac 2 '
-    #         f'"{final_path}"'
-    #     )
-    #     print(f"[GPU字幕焼き込み] {ffmpeg_command}")
-    #     ret = os.system(ffmpeg_command)
-    #     if ret != 0:
-    #         raise RuntimeError(f"❌ 字幕焼き込みffmpeg処理に失敗しました（code={ret}）")
-    #     print(f"✅ 字幕付き動画をGPUで保存しました: {final_path}")
-
-    # else:
-    #     print(f"⚠️ 字幕が見つかりません。字幕なしで保存: {temp_path}")
-    #     temp_path.rename(final_path)
+    save_render_plan(script_id, plan, output_dir / "render_plan.json")
 
-    compatible_path = output_dir / "final_compatible.mp4"
-    ffmpeg_compat_cmd = (
-        f'ffmpeg -y -hwaccel cuda -i "{final_path}" '
-        f'-vf "scale=trunc(iw/2)*2:trunc(ih/2)*2,format=yuv420p" '
-        f'-c:v h264_nvenc -preset slow -b:v 4000k -maxrate 4000k -bufsize 8000k -pix_fmt yuv420p '
-        f'-profile:v baseline -level 4.0 '
-        f'-c:a aac -b:a 128k -ar 44100 -ac 2 '
-        f'"{compatible_path}"'
-    )
+    # ナレーション・BGM・効果音をサンプル単位で配置した1本のWAVにする（どちらのレンダラーでも使う）
+    plan["mixed_audio"] = output_dir / "mixed_audio.wav"
+    mix_down(plan, plan["mixed_audio"], decode_asset=get_decoded_asset)
 
+    renderer = load_compose_renderer()
+    if renderer == "moviepy":
+        render_with_moviepy(plan, output_dir, final_path, compatible_path)
+        return
 
-    print(f"[GPU互換変換] {ffmpeg_compat_cmd}")
-    os.system(ffmpeg_compat_cmd)
-    print(f"✅ 再生互換版動画（GPU使用）を保存しました: {compatible_path}")
+    if renderer == "segments":
+        # 変更のあった背景素材の区間だけを再エンコードし、残りはキャッシュをストリームコピーでつなぐ
+        render_segmented(plan, final_path, frame_size=FRAME_SIZE, canvas_size=(VIDEO_WIDTH, VIDEO_HEIGHT))
+    else:
+        # 素材の切り出し・パン/ズーム・音声ミックス・字幕焼き込みを1回のエンコードで行う
+        render_single_pass(plan, final_path, frame_size=FRAME_SIZE, canvas_size=(VIDEO_WIDTH, VIDEO_HEIGHT))
 
+    # 1パスの出力は偶数サイズ・yuv420pで再生互換のため、再エンコードせずにコピーする
+    shutil.copyfile(final_path, compatible_path)
+    print(f"✅ 再生互換版動画を保存しました: {compatible_path}")
 
-if __name__ == "__main__":
-    task_name = "compose"
 
-    while True:
-        script_id = get_next_script_id(task_name)
-        if not script_id:
-            print("✅ 全ての script_id に対して compose が完了しています。")
-            break
+def main(script_id: str = None):
+    backup_script(__file__)
+    save_config_snapshot()
 
-        print(f"🎬 処理対象のscript_id: {script_id}")
-        try:
-            compose_video(script_id)
-            mark_script_completed(script_id, task_name)
-            print(f"✅ 完了: {script_id}")
-        except Exception as e:
-            print(f"❌ エラー: {script_id} で例外発生: {e}")
+    task_name = "compose"
+    script_id = script_id or get_next_script_id(task_name)
+    if script_id is None:
+        return
 
+    compose_video(script_id)
+    mark_script_completed(script_id, task_name)
+    print(f"✅ 完了: {script_id}")
 
+
+if __name__ == "__main__":
+    # 複数の script_id をプロセスプールで並列に合成する
+    # 同時実行数: --workers > 環境変数 COMPOSE_WORKERS > config.json の stage_concurrency.compose
+    import argparse
+    from common.compose_farm import ComposeFarm
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--max_scripts", type=int, default=None, help="今回処理する最大本数")
+    args, _ = parser.parse_known_args()
+
+    backup_script(__file__)
+    save_config_snapshot()
+    ComposeFarm("generator", workers=args.workers, max_scripts=args.max_scripts).run()
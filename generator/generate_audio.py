@@ -2,15 +2,18 @@ import sys
 import os
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
-from pydub import AudioSegment
 import io
 import json
-import requests
+import wave
 import re
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
 from dotenv import load_dotenv
 from common.misread_dict import apply_misread_corrections
-from fugashi import Tagger
+from common.clients import get_http_session
+from common.reading import normalize_reading
+from common.tts_cache import get_tts_cache
+from common.constants import SILENCE_DURATION
 import shutil
 from common.script_utils import parse_args_script_id, mark_script_completed, get_next_script_id, parse_and_generate_voicevox_script
 
@@ -18,66 +21,46 @@ from common.script_utils import parse_args_script_id, mark_script_completed, get
 load_dotenv()
 VOICEVOX_ENGINE_URL = os.getenv("VOICEVOX_ENGINE_URL", "http://localhost:50021")
 SPEAKER_ID = int(os.getenv("VOICEROID_SPEAKER_ID", 66))
-
-# 形態素解析器の初期化
-tagger = Tagger()
-
-# テキストをひらがなに変換する関数
-def convert_to_hiragana(text: str) -> str:
-    return "".join([word.feature.kana if word.feature.kana else word.surface for word in tagger(text)])
-
-# 助詞の発音を修正する関数
-def fix_particle_pronunciation(text: str) -> str:
-    tokens = tagger(text)
-    result = []
-    for token in tokens:
-        surface = token.surface
-        pos = token.feature[0]
-        if pos == '助詞':
-            if surface == 'は':
-                result.append('わ')
-                continue
-            elif surface == 'へ':
-                result.append('え')
-                continue
-            elif surface == 'を':
-                result.append('お')
-                continue
-        result.append(surface)
-    return ''.join(result)
-
-# カナかな変換
-def kata_to_hira(text: str) -> str:
-    return ''.join(
-        chr(ord(char) - 0x60) if 'ァ' <= char <= 'ン' else char
-        for char in text
-    )
-
-
-# 音声合成を行う関数
-def synthesize_voice(text: str, output_path: Path):
+# 同時に投げる合成リクエスト数（VOICEVOXエンジン側の並列数に合わせる）
+VOICEVOX_WORKERS = int(os.getenv("VOICEVOX_WORKERS", 2))
+
+# 音声合成パラメータ
+SYNTHESIS_PARAMS = {
+    "speedScale": 1.45,
+    "intonationScale": 1.2,
+    "pitchScale": 0.0,
+    "volumeScale": 1.0,
+    "prePhonemeLength": 0.1,
+    "postPhonemeLength": 0.1,
+}
+
+# TTS用にテキストを整形する関数（形態素解析を使うためメインスレッドで呼ぶ）
+def normalize_tts_text(text: str) -> str:
     # 🎯 改行はVOICEVOXに渡すと「えぬ」と読まれるため空白に置換
     text = text.replace("\\n", " ")  # ← バックスラッシュn（2文字）を空白に
     text = text.replace("\n", " ")   # ← 改行文字（1文字）も空白に
 
     text = apply_misread_corrections(text)
-    text = fix_particle_pronunciation(text)
-    hiragana_text = convert_to_hiragana(text)
-    hiragana_text = kata_to_hira(hiragana_text)  # ← カタカナ→ひらがな
-    print(f"[TTS用テキスト]: {hiragana_text}")
+    # 助詞の発音補正・読み変換・カタカナ→ひらがなを1回の形態素解析でまとめて行う
+    return normalize_reading(text)
+
+# VOICEVOXに合成をリクエストし、音声データを返す関数（スレッドから呼んでよい）
+def request_synthesis(hiragana_text: str) -> bytes:
+    # 同じテキスト・話者・パラメータの合成結果があればVOICEVOXを呼ばない
+    tts_cache = get_tts_cache()
+    cache_key = tts_cache.make_key(hiragana_text, SPEAKER_ID, SYNTHESIS_PARAMS)
+    cached = tts_cache.get(cache_key)
+    if cached is not None:
+        return cached
+
+    session = get_http_session()
     query_payload = {"text": hiragana_text, "speaker": SPEAKER_ID}
-    query_res = requests.post(f"{VOICEVOX_ENGINE_URL}/audio_query", params=query_payload)
+    query_res = session.post(f"{VOICEVOX_ENGINE_URL}/audio_query", params=query_payload)
     if query_res.status_code != 200:
         raise RuntimeError(f"音声クエリ失敗: {query_res.text}")
     query_data = query_res.json()
-    # 音声合成パラメータの設定
-    query_data["speedScale"] = 1.45
-    query_data["intonationScale"] = 1.2
-    query_data["pitchScale"] = 0.0
-    query_data["volumeScale"] = 1.0
-    query_data["prePhonemeLength"] = 0.1
-    query_data["postPhonemeLength"] = 0.1
-    synthesis_res = requests.post(
+    query_data.update(SYNTHESIS_PARAMS)
+    synthesis_res = session.post(
         f"{VOICEVOX_ENGINE_URL}/synthesis",
         params={"speaker": SPEAKER_ID},
         data=json.dumps(query_data),
@@ -85,14 +68,36 @@ def synthesize_voice(text: str, output_path: Path):
     )
     if synthesis_res.status_code != 200:
         raise RuntimeError(f"音声合成失敗: {synthesis_res.text}")
-    with open(output_path, "wb") as f:
-        f.write(synthesis_res.content)
-
-# mp3をwavに変換する関数
-def convert_to_wav(mp3_path: Path, wav_path: Path):
-    sound = AudioSegment.from_file(mp3_path)
-    sound += AudioSegment.silent(duration=100)
-    sound.export(wav_path, format="wav")
+    tts_cache.put(cache_key, synthesis_res.content)
+    return synthesis_res.content
+
+# WAVの末尾に無音を追加し、（パディング前の長さ, パディング後の長さ）を秒で返す関数
+# デコードし直さず、ヘッダの情報からサンプル単位で無音を足すだけにする
+def pad_wav_silence(wav_bytes: bytes, silence_sec: float = SILENCE_DURATION) -> tuple[bytes, float, float]:
+    with wave.open(io.BytesIO(wav_bytes), "rb") as wf:
+        params = wf.getparams()
+        frames = wf.readframes(params.nframes)
+
+    silence_frames = int(round(params.framerate * silence_sec))
+    # 8bit PCMは無音が0x80、それ以外は0
+    silence_byte = b"\x80" if params.sampwidth == 1 else b"\x00"
+    frames += silence_byte * (silence_frames * params.sampwidth * params.nchannels)
+
+    buf = io.BytesIO()
+    with wave.open(buf, "wb") as wf:
+        wf.setparams(params)
+        wf.writeframes(frames)
+
+    voice_duration = params.nframes / params.framerate
+    audio_duration = (params.nframes + silence_frames) / params.framerate
+    return buf.getvalue(), voice_duration, audio_duration
+
+# 1シーン分の音声を生成し、（音声の長さ, 無音込みのWAVの長さ）を返す関数（ワーカースレッドで実行）
+def synthesize_scene(hiragana_text: str, wav_path: Path) -> tuple[float, float]:
+    wav_bytes, voice_duration, audio_duration = pad_wav_silence(request_synthesis(hiragana_text))
+    with open(wav_path, "wb") as f:
+        f.write(wav_bytes)
+    return voice_duration, audio_duration
 
 # 台本のテキストからシーンを分割する関数
 def split_script_to_scenes(script_text: str) -> list[dict]:
@@ -121,9 +126,9 @@ def split_script_to_scenes(script_text: str) -> list[dict]:
     return scenes
 
 # メイン処理
-def main():
+def main(script_id: str = None):
     task_name = "audio"
-    script_id = parse_args_script_id() or get_next_script_id(task_name)
+    script_id = script_id or parse_args_script_id() or get_next_script_id(task_name)
     if script_id is None:
         return
 
@@ -159,31 +164,53 @@ def main():
             scene_id_to_type[entry["scene_id"]] = entry["type"]
 
 
+    # 読みの整形は形態素解析器を共有するため先にまとめて行い、合成リクエストだけを並列化する
+    tts_texts = []
+    for i, scene in enumerate(scenes, start=1):
+        hiragana_text = normalize_tts_text(scene["text"])
+        print(f"[TTS用テキスト] scene_{i:02}: {hiragana_text}")
+        tts_texts.append(hiragana_text)
+
+    # 各シーンの音声を並列に生成（完了順はばらばらでも、結果はシーン番号で保持する）
+    durations = {}
+    with ThreadPoolExecutor(max_workers=VOICEVOX_WORKERS) as pool:
+        futures = {}
+        for i, scene in enumerate(scenes, start=1):
+            scene_id = f"scene_{i:02}"
+            print(f"🗣️ {scene_id} - 音声生成: {scene['text'][:15]}...")
+            future = pool.submit(
+                synthesize_scene,
+                tts_texts[i - 1],
+                output_dir / f"{scene_id}.wav",
+            )
+            futures[future] = scene_id
+
+        for future in as_completed(futures):
+            scene_id = futures[future]
+            try:
+                durations[scene_id] = future.result()
+            except Exception as e:
+                print(f"❌ エラー ({scene_id}): {e}")
+    print(f"📊 TTSキャッシュ: {get_tts_cache().stats_line()}")
+
+    # タイミング情報はシーン順に組み立てる
     scene_timings = []
     elapsed = 0.0
-
-    # 各シーンの音声を生成し、タイミング情報を記録
     for i, scene in enumerate(scenes, start=1):
         scene_id = f"scene_{i:02}"
-        mp3_path = output_dir / f"{scene_id}.mp3"
-        wav_path = output_dir / f"{scene_id}.wav"
-        print(f"🗣️ {scene_id} - 音声生成: {scene['text'][:15]}...")
-
-        try:
-            synthesize_voice(scene["text"], mp3_path)
-            convert_to_wav(mp3_path, wav_path)
-            duration = AudioSegment.from_file(mp3_path).duration_seconds
-            scene_timings.append({
-                "scene_id": scene_id,
-                "start_sec": round(elapsed, 2),
-                "duration": round(duration, 2),
-                "text": scene["text"],
-                "type": scene_id_to_type.get(scene_id, "unknown")  # ← これで完全一致
-
-            })
-            elapsed += duration
-        except Exception as e:
-            print(f"❌ エラー ({scene_id}): {e}")
+        if scene_id not in durations:
+            continue
+        duration, audio_duration = durations[scene_id]
+        scene_timings.append({
+            "scene_id": scene_id,
+            "start_sec": round(elapsed, 2),
+            "duration": round(duration, 2),
+            "audio_duration": round(audio_duration, 4),  # 無音込みのWAVの実長（後段はファイルを開かずにこれを使う）
+            "text": scene["text"],
+            "type": scene_id_to_type.get(scene_id, "unknown")  # ← これで完全一致
+
+        })
+        elapsed += duration
 
     # タイミング情報を保存
     timing_path = output_dir / f"timing_{script_id}.json"
@@ -195,7 +222,8 @@ def main():
     scene_id_to_timing = {
         s["scene_id"]: {
             "start_sec": s["start_sec"],
-            "duration": s["duration"]
+            "duration": s["duration"],
+            "audio_duration": s["audio_duration"]
         }
         for s in scene_timings
     }
@@ -205,6 +233,7 @@ def main():
         if timing:
             entry["start_sec"] = timing["start_sec"]
             entry["duration"] = timing["duration"]
+            entry["audio_duration"] = timing["audio_duration"]
 
     # 🔽 タイミング付きのmetaを再保存（字幕用に使える）
     meta_path_with_timing = output_dir / f"script_meta_{script_id}.json"
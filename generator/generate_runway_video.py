@@ -4,19 +4,19 @@ from dotenv import load_dotenv
 import json
 from typing import List
 import time
-import requests  # ファイルDL用
 from urllib.parse import urlparse, unquote
-import random  # ←追加
 
 import sys
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
-from common.script_utils import parse_args_script_id, get_next_script_id, mark_script_completed
+from common.script_utils import parse_args_script_id, get_next_script_id, mark_script_completed, lease_heartbeat
+from common.seeded_random import get_rng, make_seed
+from common.video_ingest import ingest_clip
 
 import boto3
 from pathlib import Path
 
 from dotenv import load_dotenv
-from download_from_s3 import download_images_from_s3
+from generator.download_from_s3 import download_images_from_s3
 from concurrent.futures import ThreadPoolExecutor, as_completed
 
 
@@ -36,21 +36,34 @@ load_dotenv()
 # 環境変数からAPIキーを取得
 RUNWAY_API_KEY = os.getenv("RUNWAY_API_KEY")
 
-if not RUNWAY_API_KEY:
-    print("エラー: RUNWAY_API_KEY 環境変数が設定されていません")
-    exit()
+# RunwayMLクライアントを初期化（キー未設定時は main() 側でエラー表示して終了）
+client = RunwayML(api_key=RUNWAY_API_KEY) if RUNWAY_API_KEY else None
 
-# RunwayMLクライアントを初期化
-client = RunwayML(api_key=RUNWAY_API_KEY)
+# 保存する動画のサイズ（compose_video の FRAME_SIZE と同じ範囲を中央から切り出す）
+FRAME_SIZE = (720, 720)
 
 # 汎用モーションプロンプトの読み込み
 with open("prompts/video/motion_prompts.json", "r", encoding="utf-8") as f:
     motion_prompts = json.load(f)
 
-def request_runway(image_url: str, image_filename: str, save_dir: Path):
-    # durationをファイル名に応じて分岐
-    duration = 10 if "_mv" in image_filename else 5
-    prompt_text = random.choice(motion_prompts)  # ←ここを変更
+def choose_motion_prompt(script_id: str, image_filename: str) -> dict:
+    """
+    画像ごとのモーションプロンプトと尺を決める。
+    (script_id, 画像名) ごとに固定のシードで選ぶので、再実行しても同じプロンプトになる。
+    """
+    parent_id = Path(image_filename).stem
+    return {
+        "image": image_filename,
+        # durationをファイル名に応じて分岐
+        "duration": 10 if "_mv" in image_filename else 5,
+        "prompt_text": get_rng(script_id, parent_id, task_name).choice(motion_prompts),
+        "seed": make_seed(script_id, parent_id, task_name),
+    }
+
+
+def request_runway(image_url: str, image_filename: str, save_dir: Path, motion: dict):
+    duration = motion["duration"]
+    prompt_text = motion["prompt_text"]
 
     image_to_video = client.image_to_video.create(
         model="gen4_turbo",
@@ -85,14 +98,9 @@ def request_runway(image_url: str, image_filename: str, save_dir: Path):
             video_url = output[0]
             print("✅ 動画生成完了！動画URL:", video_url)
 
-            # ローカルに保存
+            # ダウンロードしながら compose 用に正規化（中央切り出し・30fps）して保存
             output_path = save_dir / f"{Path(image_filename).stem}.mp4"
-            print(f"💾 ダウンロード保存: {output_path}")
-            with requests.get(video_url, stream=True) as r:
-                r.raise_for_status()
-                with open(output_path, 'wb') as f:
-                    for chunk in r.iter_content(chunk_size=8192):
-                        f.write(chunk)
+            ingest_clip(video_url, output_path, FRAME_SIZE)
         else:
             print("⚠ 想定外の出力形式でした。内容:", output)
     else:
@@ -148,16 +156,11 @@ def get_image_urls_for_script(script_id: str) -> List[str]:
 
 # メイン処理
 
-# 引数として script_id を受け取る
 task_name = "video"
 max_workers = 3
 
-while True:
-    script_id = get_next_script_id(task_name)
-    if not script_id:
-        print("✅ すべてのscript_idを処理済みです。")
-        break
 
+def process_script(script_id: str):
     print(f"🎬 処理対象のscript_id: {script_id}")
     download_images_from_s3(script_id)
     image_urls = get_image_urls_for_script(script_id)
@@ -165,17 +168,47 @@ while True:
     save_dir = Path(f"data/stage_5_image/{script_id}")
     save_dir.mkdir(parents=True, exist_ok=True)
 
+    # 画像ごとのモーションプロンプトを先に決めて記録しておく
+    motions = {}
+    for url in image_urls:
+        image_filename = Path(unquote(urlparse(url).path)).name
+        motions[url] = choose_motion_prompt(script_id, image_filename)
+    with open(save_dir / f"motion_prompts_{script_id}.json", "w", encoding="utf-8") as f:
+        json.dump(list(motions.values()), f, ensure_ascii=False, indent=2)
+
     # 並列で処理
     with ThreadPoolExecutor(max_workers=max_workers) as executor:
         futures = []
         for url in image_urls:
-            parsed = urlparse(url)
-            image_filename = Path(unquote(parsed.path)).name
+            motion = motions[url]
             print(f"🖼️ 使用画像: {url}")
-            futures.append(executor.submit(request_runway, url, image_filename, save_dir))
+            futures.append(executor.submit(request_runway, url, motion["image"], save_dir, motion))
 
         for future in as_completed(futures):
             future.result()
 
     mark_script_completed(script_id, task_name)
     print(f"✅ script_id {script_id} を完了としてマークしました")
+
+
+def main(script_id: str = None):
+    if not RUNWAY_API_KEY:
+        print("エラー: RUNWAY_API_KEY 環境変数が設定されていません")
+        return
+
+    # 引数として script_id を受け取る（なければ未処理分を順に処理）
+    if script_id:
+        process_script(script_id)
+        return
+
+    while True:
+        script_id = get_next_script_id(task_name)
+        if not script_id:
+            print("✅ すべてのscript_idを処理済みです。")
+            break
+        with lease_heartbeat(script_id, task_name):
+            process_script(script_id)
+
+
+if __name__ == "__main__":
+    main(parse_args_script_id())
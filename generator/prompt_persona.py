@@ -1,11 +1,11 @@
 import os
 import json
 import re
-from openai import OpenAI
 # 修正後（ワークスペースルートに `sys.path` を通してある前提）
 import sys
 import os
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from common.llm_cache import chat_completion
 
 from PIL import Image
 from pathlib import Path
@@ -14,8 +14,6 @@ import base64
 import io
 
 
-client = OpenAI(api_key=os.environ.get("OPENAI_API_KEY"))
-
 PROMPT_DIR = "prompts/image/prompt_generator/"
 
 def load_prompt_template(filename: str) -> str:
@@ -23,15 +21,14 @@ def load_prompt_template(filename: str) -> str:
     with open(path, "r", encoding="utf-8") as f:
         return f.read()
 
-def call_gpt(user_prompt: str) -> str:
-    response = client.chat.completions.create(
+def call_gpt(user_prompt: str, template: str = "") -> str:
+    # 応答は common.llm_cache に保存され、同じテンプレート・入力なら再実行時にAPIを呼ばない
+    return chat_completion(
+        [{"role": "user", "content": user_prompt}],
         model="gpt-4o",
-        messages=[
-            {"role": "user", "content": user_prompt}
-        ],
-        temperature=0.7
+        temperature=0.7,
+        template=template,
     )
-    return response.choices[0].message.content.strip()
 
 def collect_text_for_scene(script_id, parent_id):
     tag_path = Path(f"data/stage_2_tag/tags_{script_id}.json")
@@ -65,7 +62,7 @@ def run_theme_reader_multi(input_text: str, input_before: str, input_after: str)
         .replace("「{input_before}」", input_before)
         .replace("「{input_after}」", input_after)
     )
-    return call_gpt(user_prompt)
+    return call_gpt(user_prompt, template)
 
 def run_theme_selector(input_text: str, candidates_text: str) -> str:
     """候補の中からベスト構図を選ぶ"""
@@ -75,12 +72,12 @@ def run_theme_selector(input_text: str, candidates_text: str) -> str:
         .replace("「{input_text}」", input_text)
         .replace("「{candidates_text}」", candidates_text)
     )
-    return call_gpt(user_prompt)
+    return call_gpt(user_prompt, template)
 
 def run_prompt_crafter(composition: str) -> str:
     template = load_prompt_template("PromptCrafter.txt")
     user_prompt = template.replace("「{composition}」", composition)
-    return call_gpt(user_prompt)
+    return call_gpt(user_prompt, template)
 
 
 def run_image_critic(composition: str, image_info: str) -> str:
@@ -90,7 +87,7 @@ def run_image_critic(composition: str, image_info: str) -> str:
         .replace("「{composition}」", composition)
         .replace("「{image_info}」", image_info)
     )
-    return call_gpt(user_prompt)
+    return call_gpt(user_prompt, template)
 
 
 def run_image_improver(original_prompt: str, composition: str, feedback: str) -> str:
@@ -101,7 +98,7 @@ def run_image_improver(original_prompt: str, composition: str, feedback: str) ->
         .replace("「{composition}」", composition)
         .replace("「{feedback}」", feedback)
     )
-    return call_gpt(user_prompt)
+    return call_gpt(user_prompt, template)
 
 
 def run_finalizer(composition: str, image_list: list[str], feedbacks: list[str]) -> str:
@@ -115,7 +112,7 @@ def run_finalizer(composition: str, image_list: list[str], feedbacks: list[str])
         .replace("「{image_list}」", image_block)
         .replace("「{feedbacks}」", feedback_block)
     )
-    return call_gpt(user_prompt)
+    return call_gpt(user_prompt, template)
 
 def generate_image(prompt: str, num_images: int = 1) -> list[Image.Image]:
     results = []
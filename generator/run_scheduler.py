@@ -0,0 +1,24 @@
+import sys
+import os
+import argparse
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from common.generate_status import generate_status
+from common.stage_runner import StageRunner
+from common.stage_scheduler import StageScheduler
+
+# 複数の script_id を異なるステージで同時に進めるスケジューラの起動スクリプト
+# 例: python generator/run_scheduler.py --stages audio tag prompt subtitle
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--package", type=str, default="generator", help="generator or generator_long")
+    parser.add_argument("--stages", nargs="+", default=None, help="実行するステージ（省略時は全ステージ）")
+    parser.add_argument("--poll_interval", type=float, default=5.0)
+    args = parser.parse_args()
+
+    # ステータスファイルを整備してから処理を開始（サブプロセスを起動せず同じプロセスで実行）
+    generate_status()
+
+    runner = StageRunner(args.package)
+    scheduler = StageScheduler(runner, stages=args.stages, poll_interval=args.poll_interval)
+    scheduler.run()
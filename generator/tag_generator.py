@@ -6,7 +6,7 @@ import json
 from datetime import datetime
 from dotenv import load_dotenv
 import openai
-from openai import OpenAI
+from common.llm_cache import chat_completion, get_llm_cache, LLMReplayMiss
 
 
 import re
@@ -16,8 +16,7 @@ from shutil import move
 from common.backup_script import backup_script
 from common.save_config import save_config_snapshot
 from common.global_image_tag_dict import TONE_KEYWORDS
-from fugashi import Tagger  # ✅ 追加：日本語分かち書き用
-from common.script_utils import parse_args_script_id, get_next_script_id, mark_script_completed
+from common.script_utils import parse_args_script_id, get_next_script_id, mark_script_completed, release_script_lease
 from collections import defaultdict
 
 
@@ -26,7 +25,6 @@ save_config_snapshot()
 
 # OpenAI APIキー読み込み
 load_dotenv()
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
 
 
 # プロンプトテンプレートを読み込み、TEXTを埋め込む
@@ -40,32 +38,36 @@ def load_prompt(template_path: str, variables: dict) -> str:
 
 # GPTに感情タグを問い合わせ
 def detect_emotion_from_text(text: str) -> str:
-    prompt_path = Path(__file__).parent / ".." / "prompts" / "image" / "emotion_prompt.txt"
-    prompt = load_prompt(str(prompt_path.resolve()), {"TEXT": text})
+    prompt_path = (Path(__file__).parent / ".." / "prompts" / "image" / "emotion_prompt.txt").resolve()
+    prompt = load_prompt(str(prompt_path), {"TEXT": text})
     try:
-        response = client.chat.completions.create(
+        return chat_completion(
+            [{"role": "user", "content": prompt}],
             model="gpt-4o",
-            messages=[{"role": "user", "content": prompt}],
             temperature=0.5,
+            template=prompt_path.read_text(encoding="utf-8"),
         )
-        return response.choices[0].message.content.strip()
+    except LLMReplayMiss:
+        raise
     except Exception as e:
         print(f"[感情判定エラー] {text} → {e}")
         return "neutral"
 
 # GPTにタグを問い合わせ
 def generate_tags(text: str) -> list:
-    prompt_path = Path(__file__).parent / ".." / "prompts" / "image" / "tags_prompt.txt"
-    prompt = load_prompt(str(prompt_path.resolve()), {"TEXT": text}) 
+    prompt_path = (Path(__file__).parent / ".." / "prompts" / "image" / "tags_prompt.txt").resolve()
+    prompt = load_prompt(str(prompt_path), {"TEXT": text})
     try:
-        response = client.chat.completions.create(
+        tag_line = chat_completion(
+            [{"role": "user", "content": prompt}],
             model="gpt-4o",
-            messages=[{"role": "user", "content": prompt}],
             temperature=0.7,
+            template=prompt_path.read_text(encoding="utf-8"),
         )
-        tag_line = response.choices[0].message.content.strip()
         tags = [tag.strip() for tag in tag_line.split("、") if tag.strip()]
         return tags
+    except LLMReplayMiss:
+        raise
     except Exception as e:
         print(f"[タグ生成エラー] {text} → {e}")
         return ["キーワード1", "キーワード2"]
@@ -131,6 +133,7 @@ def tag_from_timing(timing_json_path: Path, output_base_dir: Path):
             "scene_id": scene_id,
             "start_sec": round(start_sec, 2),
             "duration": round(duration, 2),
+            "audio_duration": scene.get("audio_duration"),  # 無音込みのWAVの実長（compose_video用）
             "text": text,
             "type": scene_type,
             "tags": tags,
@@ -182,35 +185,43 @@ def tag_from_timing(timing_json_path: Path, output_base_dir: Path):
 
     # save_sd_prompts(tagged_data, script_id, output_base_dir)
     print(f"✅ タグ付きJSON出力完了: {output_path}")
+    get_llm_cache().report("感情判定")
     return output_path
 
 
 # 実行部分（timingファイルを順に処理して scenes_json に出力）
-if __name__ == "__main__":
+def main(script_id: str = None):
     input_dir = Path("data/stage_1_audio")
     output_dir = Path("data/stage_2_tag")
 
     # ✅ script_status.jsonを見て未処理のscript_idを取得
         # ✅ task_name を指定
     task_name = "tag"
-    script_id = parse_args_script_id() or get_next_script_id(task_name)
+    script_id = script_id or parse_args_script_id() or get_next_script_id(task_name)
     if script_id is None:
         print("✅ 全てのスクリプトが処理済みです。")
-        exit()
+        return
 
     timing_json = input_dir / script_id / f"timing_{script_id}.json"
     if not timing_json.exists():
         print(f"❌ timingファイルが見つかりません: {timing_json}")
-        exit()
+        release_script_lease(script_id, task_name)
+        return
  
     date_path = timing_json.parent.name
     out_path = output_dir / f"tags_{script_id}.json"
     if out_path.exists():
         print(f"⚠️ 既に処理済み: {out_path}")
-        exit()
+        release_script_lease(script_id, task_name)
+        return
 
     try:
         tag_from_timing(timing_json_path=timing_json, output_base_dir=output_dir)
         mark_script_completed(script_id, task_name)  # ✅ 同じtask_nameを使う
     except Exception as e:
         print(f"[ERROR] 処理失敗: {timing_json} → {e}")
+        release_script_lease(script_id, task_name)
+
+
+if __name__ == "__main__":
+    main()
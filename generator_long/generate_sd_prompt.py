@@ -5,14 +5,15 @@ sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
 import random
 from dotenv import load_dotenv
-from openai import OpenAI
+from common.clients import get_openai_client
 from common.script_utils import parse_args_script_id, get_next_script_id, mark_script_completed
+from common.seeded_random import get_rng, make_seed
 
 
 
 # .envファイルからOpenAI APIキーを読み込む
 load_dotenv()
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+client = get_openai_client()
 
 # 各ファイルを読み込み
 with open("prompts/image/default_prompt.json", "r") as f:
@@ -60,8 +61,11 @@ with open("prompts/image/emotion_suffix.json", "r", encoding="utf-8") as f:
 #         return f"Error parsing GPT output: {e}"
 
 
-def generate_sd_prompt(theme, default_data, comp_data, human_comp_data, gpt_suffix):
-    subcategory = random.choice(list(default_data[theme].keys()))
+def generate_sd_prompt(theme, default_data, comp_data, human_comp_data, gpt_suffix, rng=random):
+    """
+    rng には common.seeded_random.get_rng() の乱数を渡すと、同じ台本で同じプロンプトになる
+    """
+    subcategory = rng.choice(list(default_data[theme].keys()))
     base_prompt = default_data[theme][subcategory]
 
     # 人間系テーマの場合はhuman_comp_dataを使用
@@ -70,22 +74,22 @@ def generate_sd_prompt(theme, default_data, comp_data, human_comp_data, gpt_suff
     else:
         cdata = comp_data
 
-    distance_prompt = random.choice(list(cdata["distance"].values()))
-    angle_prompt = random.choice(list(cdata["angle"].values()))
-    pose_prompt = random.choice(list(cdata["pose"].values()))
-    composition_prompt = random.choice(list(cdata["composition"].values()))
-    focus_prompt = random.choice(list(cdata["focus"].values()))
+    distance_prompt = rng.choice(list(cdata["distance"].values()))
+    angle_prompt = rng.choice(list(cdata["angle"].values()))
+    pose_prompt = rng.choice(list(cdata["pose"].values()))
+    composition_prompt = rng.choice(list(cdata["composition"].values()))
+    focus_prompt = rng.choice(list(cdata["focus"].values()))
 
     final_prompt = f"{base_prompt}, {distance_prompt}, {angle_prompt}, {pose_prompt}, {composition_prompt}, {focus_prompt}, {gpt_suffix}"
     return final_prompt
 
-if __name__ == "__main__":
+def main(script_id: str = None):
 
     # 引数として script_id を受け取る
     task_name = "prompt"
-    script_id = parse_args_script_id() or get_next_script_id(task_name)
+    script_id = script_id or parse_args_script_id() or get_next_script_id(task_name)
     if script_id is None:
-        exit()
+        return
 
     # 入力ファイル読み込み
     tag_path = f"data_long/stage_2_tag/tags_{script_id}.json"
@@ -105,7 +109,8 @@ if __name__ == "__main__":
 
     output = {}
     for parent_id, scenes in parent_groups.items():
-        # テーマは各回ランダム選択
+        # テーマは各回ランダム選択（(script_id, parent_id) ごとに固定のシード）
+        rng = get_rng(script_id, parent_id, task_name)
 
         # 出現比率の設定
         weighted_theme_choices = (
@@ -117,7 +122,7 @@ if __name__ == "__main__":
         )
 
         # テーマを確率に基づいて選択
-        theme = random.choice(weighted_theme_choices)
+        theme = rng.choice(weighted_theme_choices)
 
         # 感情のタグを取得（なければ None）
         emotion_tag = None
@@ -131,11 +136,12 @@ if __name__ == "__main__":
         if theme in ["girl", "beauty", "normal_beauty"] and emotion_tag in emotion_suffix_data:
             gpt_suffix = emotion_suffix_data[emotion_tag]
 
-        prompt = generate_sd_prompt(theme, default_data, comp_data, human_comp_data, gpt_suffix)
+        prompt = generate_sd_prompt(theme, default_data, comp_data, human_comp_data, gpt_suffix, rng)
 
         output[parent_id] = {
             "prompt": prompt,
             "theme": theme,
+            "seed": make_seed(script_id, parent_id, task_name),
             "scenes": scenes
         }
 
@@ -145,3 +151,6 @@ if __name__ == "__main__":
         json.dump(output, f, ensure_ascii=False, indent=2)
     mark_script_completed(script_id, task_name)
 
+
+if __name__ == "__main__":
+    main()
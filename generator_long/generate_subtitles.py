@@ -2,27 +2,30 @@ import sys
 import os
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
-import re
 import json
 from pathlib import Path
-from datetime import timedelta
-from librosa import load, get_duration  # 音声の実長を取得するため
 
 from common.backup_script import backup_script
 from common.save_config import save_config_snapshot
-from common.script_utils import parse_args_script_id, get_next_script_id, mark_script_completed
+from common.script_utils import parse_args_script_id, get_next_script_id, mark_script_completed, release_script_lease
 from common.constants import SILENCE_DURATION
-from openai import OpenAI
+from common.audio_meta import get_audio_duration  # 音声の実長をWAVヘッダから取得（デコードしない）
+from common.line_break import break_lines_concurrently
+from common.subtitle_timeline import build_timeline, render_outputs, write_outputs
+from common.local_line_break import break_line_locally, stats_line as local_line_break_stats
 from dotenv import load_dotenv
 
 # APIキー読み込み
 load_dotenv()
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
 
 # div_prompt.txt の読み込み（初回のみ）
 with open("prompts/subtitle/div_prompt_l.txt", "r", encoding="utf-8") as f:
     system_prompt = f.read()
 
+# ローカル改行（形態素解析）の行幅。半角は0.5文字として数える
+# div_prompt_l.txt と同じ目安（1行20〜30文字、改行は1回まで）
+LINE_BREAK_LAYOUT = {"target_width": 20, "max_width": 30, "max_lines": 2}
+
 # スクリプトのバックアップと設定保存（トレーサビリティ確保）
 backup_script(__file__)
 save_config_snapshot()
@@ -35,246 +38,18 @@ if highlight_path.exists():
 else:
     highlight_dict = {"emotional": [], "emphasis": []}
 
-def apply_highlight_tags(text: str, highlight_dict: dict) -> str:
-    for word in highlight_dict.get("emotional", []):
-        text = text.replace(word, r"{\1c&H33FFFF&}" + word + r"{\r}")  # yellow
-    for word in highlight_dict.get("emphasis", []):
-        text = text.replace(word, r"{\1c&H0000FF&}" + word + r"{\r}")  # blue（赤なら &H0000FF& を赤コードに変更）
-    return text
-
-# 秒数を SRT の "00:00:00,000" フォーマットに変換
-def format_srt_time(seconds: float) -> str:
-    td = timedelta(seconds=seconds)
-    total_seconds = int(td.total_seconds())
-    milliseconds = int((seconds - total_seconds) * 1000)
-    hours = total_seconds // 3600
-    minutes = (total_seconds % 3600) // 60
-    seconds = total_seconds % 60
-    return f"{hours:02}:{minutes:02}:{seconds:02},{milliseconds:03}"
-
-def format_ass_time(seconds: float) -> str:
-    h = int(seconds // 3600)
-    m = int((seconds % 3600) // 60)
-    s = int(seconds % 60)
-    cs = int((seconds - int(seconds)) * 100)
-    return f"{h:01}:{m:02}:{s:02}.{cs:02}"
-
-
-def apply_ai_line_break(text: str) -> str:
-    try:
-        user_input = {
-            "text": text
-        }
-
-        response = client.chat.completions.create(
-            model="gpt-4o",
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": json.dumps(user_input, ensure_ascii=False)}
-            ],
-            temperature=0.7
-        )
-
-        result = response.choices[0].message.content.strip()
-        return result
-
-    except Exception as e:
-        print(f"[LineBreak API Error] {e}")
-        return text  # エラー時は改行なしでそのまま返す
-
-# 字幕ファイル（.srt）と構造化JSONを生成
-def generate_subtitles(timing_json_path: Path, output_dir: Path, script_id: str):
-    # 元となるタイミング情報を読み込み
-    with open(timing_json_path, "r", encoding="utf-8") as f:
-        timing_data = json.load(f)
-
-    srt_lines = []        # SRT出力用の行リスト
-    subtitle_json = []    # JSON保存用データ
-    current_start = 0.0   # 各sceneの再生開始時間（累積）
-
-    # 字幕の見やすさ調整（遅れて表示、早めに消す）
-    DISPLAY_START_DELAY = 0.05
-    DISPLAY_EARLY_CUT = 0.05
-
-    # 各sceneごとに処理
-    for i, scene in enumerate(timing_data, start=1):
-        scene_id = scene["scene_id"]
-        text = scene["text"]
-        # すべての改行をASS用改行に統一
-        # 1. 手動改行があるかを確認
-        text = scene["text"].replace("\\n", "\n").replace("\n", r"\N")
-        has_manual_break = r"\N" in text
-
-        # 2. 改行がない場合のみ、自動処理（外部APIなど）
-        if not has_manual_break:
-            # APIを使って自然改行を挿入する（仮の関数名：apply_ai_line_break）
-            text = apply_ai_line_break(text)
-
-
-        # 音声ファイルから正確なdurationを取得（＋無音0.1sを加算）
-        audio_path = Path(f"data_long/stage_1_audio/{script_id}/{scene_id}.wav")
-        if not audio_path.exists():
-            if scene["type"] == "source":
-                # 音声はないが timing 情報は使いたい
-                duration = scene["duration"]
-            else:
-                print(f"⚠️ 音声ファイルなし: {scene_id}")
-                continue
-        else:
-            y, sr = load(audio_path, sr=None)
-            duration = get_duration(y=y, sr=sr) + SILENCE_DURATION
-        
-        if scene["type"] == "title":
-            scene_id = scene["scene_id"]
-            text = scene["text"]
-            start_sec = current_start
-            end_sec = current_start + duration
-
-            # ① 中央表示（メタdurationでぴったり表示）
-            subtitle_json.append({
-                "scene_id": scene_id + "_center",
-                "start_sec": round(start_sec, 2),
-                "end_sec": round(end_sec, 2),
-                "text": text,
-                "type": "title_center"
-            })
-
-            # ② 次のtitleを探す
-            next_title_start = None
-            for future_scene in timing_data[i:]:
-                if future_scene["type"] == "title":
-                    next_title_start = future_scene["start_sec"]
-                    break
-
-            # fallback: 最後のsceneの end_sec を代入（常にtitle_topを出力）
-            if next_title_start is None:
-                last_scene = timing_data[-1]
-                next_title_start = last_scene["start_sec"] + last_scene["duration"]
-
-            # 上部表示：startは titleのendから、endは次のtitleのstart
-            subtitle_json.append({
-                "scene_id": scene_id + "_top",
-                "start_sec": round(end_sec, 2),
-                "end_sec": round(next_title_start, 2),
-                "text": text,
-                "type": "title_top"
-            })
-
-            current_start += duration
-            continue
-
-        if scene["type"] == "main_title":
-            start_sec = current_start
-            end_sec = current_start + duration
-
-            subtitle_json.append({
-                "scene_id": scene["scene_id"],
-                "start_sec": round(start_sec, 2),
-                "end_sec": round(end_sec, 2),
-                "text": scene["text"],
-                "type": "main_title"
-            })
-
-            current_start = end_sec
-            continue
-
-
-
-
-        if scene["type"] == "source":
-            start_sec = current_start - duration
-            end_sec = current_start
-            # current_start は更新しない
-        else:
-            start_sec = current_start
-            end_sec = current_start + duration
-            current_start = end_sec
-
-
-        # 実際に表示する字幕の時間（やや遅れて出て、早めに消す）
-        display_start_sec = start_sec + DISPLAY_START_DELAY
-        display_end_sec = max(end_sec - DISPLAY_EARLY_CUT, start_sec + 0.2)
-
-        # SRT形式の字幕を構築
-        srt_lines.append(f"{i}")
-        srt_lines.append(f"{format_srt_time(display_start_sec)} --> {format_srt_time(display_end_sec)}")
-        srt_lines.append(text)
-        srt_lines.append("")
-
-        # JSON形式でも字幕情報を保存（正確なstart/endを記録）
-        subtitle_json.append({
-            "scene_id": scene_id,
-            "start_sec": round(start_sec, 2),
-            "end_sec": round(end_sec, 2),
-            "text": text,
-            "type": scene["type"]
-        })
-
-
-    # 出力ディレクトリを作成
-    output_dir.mkdir(parents=True, exist_ok=True)
-
-    # SRTファイルとして保存
-    srt_path = output_dir / f"subtitles_{script_id}.srt"
-    with open(srt_path, "w", encoding="utf-8") as f:
-        f.write("\n".join(srt_lines))
-
-    # JSON形式でも保存
-    json_path = output_dir / f"subtitles_{script_id}.json"
-    with open(json_path, "w", encoding="utf-8") as f:
-        json.dump(subtitle_json, f, ensure_ascii=False, indent=2)
-
-    print(f"✅ 字幕SRT保存: {srt_path}")
-    print(f"✅ 字幕JSON保存: {json_path}")
-
-def generate_ass_from_json(json_path: Path, output_path: Path):
-    with open(json_path, "r", encoding="utf-8") as f:
-        scenes = json.load(f)
-
-    # 次のtitleまでの時間探索（title保持のため）
-    title_timing = [s for s in scenes if s["type"] == "title_center"]
-    title_timing.append({"start_sec": 99999})  # ダミー
-
-    ass_events = []
-    for i, scene in enumerate(scenes):
-        if scene["type"] == "title_top":
-            continue  # TitleTop をスキップ
-        style = {
-            "main_title": "MainTitle",
-            "main_title_top": "MainTitleTop",        # ← 追加
-            "main_title_center": "MainTitleCenter",  # ← 追加
-            "title_center": "TitleCenter",
-            "title_top": "TitleTop",
-            "source": "Source",
-            "summary": "Summary"
-        }.get(scene["type"], "Summary")
-        # sourceだけレイヤーを1に（最前面）
-        layer = 1 if scene["type"] == "source" else 0
-
-
-        start = scene["start_sec"]
-
-        if scene["type"] == "title_top":
-            for t in title_timing:
-                if t["start_sec"] > start:
-                    end = t["start_sec"]
-                    break
-        else:
-            end = scene["end_sec"]
-
-
-
-
-        text = scene["text"].replace("\\n", "\n").replace("\n", r"\N").replace(',', '，')
-        text = apply_highlight_tags(text, highlight_dict)
-
-        ass_events.append(
-            f"Dialogue: {layer},{format_ass_time(start)},{format_ass_time(end)},{style},,"
-            f"0,0,0,,{text}"
-        )
-
-
-    ass_header = """[Script Info]
+# 字幕の種類 → ASSスタイル名（ない種類は Summary）
+ASS_STYLES = {
+    "main_title": "MainTitle",
+    "main_title_top": "MainTitleTop",        # ← 追加
+    "main_title_center": "MainTitleCenter",  # ← 追加
+    "title_center": "TitleCenter",
+    "title_top": "TitleTop",
+    "source": "Source",
+    "summary": "Summary"
+}
+
+ASS_HEADER = """[Script Info]
 Title: Generated
 ScriptType: v4.00+
 Collisions: Normal
@@ -305,37 +80,118 @@ Format: Layer, Start, End, Style, Name, MarginL, MarginR, MarginV, Effect, Text
 #         Alignment, MarginL, MarginR, MarginV,
 #         Encoding
 
+
+def load_line_breaker() -> str:
+    """
+    改行方式（config.json の subtitle_line_breaker）
+    - "local": 形態素解析で改行し、収まらないものだけ GPT に回す（デフォルト）
+    - "llm": すべて GPT で改行する
+    """
+    with open("config/config.json", "r", encoding="utf-8") as f:
+        return json.load(f).get("subtitle_line_breaker", "local")
+
+
+# 行分け（改行）が必要なシーンの字幕を、あらかじめ全シーン分まとめて改行しておく
+# title / main_title は元テキストをそのまま使うため対象外
+# source は直前シーンと scene_id が同じなので、(scene_id, type) で対応づける
+def prepare_line_breaks(timing_data: list) -> dict:
+    use_local = load_line_breaker() == "local"
+    resolved = {}
+    pending = {}
+    for scene in timing_data:
+        if scene["type"] in ("title", "main_title"):
+            continue
+        key = (scene["scene_id"], scene["type"])
+        text = scene["text"].replace("\\n", "\n").replace("\n", r"\N")
+        if r"\N" in text:
+            continue
+        local_text = break_line_locally(text, **LINE_BREAK_LAYOUT) if use_local else None
+        if local_text is None:
+            pending[key] = text  # ローカルで収まらないものだけ GPT に回す
+        else:
+            resolved[key] = local_text
+
+    resolved.update(break_lines_concurrently(pending, system_prompt))
+    if use_local:
+        print(f"✂️ {local_line_break_stats()}")
+    return resolved
+
+def get_scene_duration(scene: dict, script_id: str) -> float | None:
+    """
+    音声の正確なdurationを取得（＋無音0.1sを加算）。音声がなく使えないシーンは None
+    generate_audio が timing に実長を記録していれば、音声ファイルは開かない
+    """
+    audio_path = Path(f"data_long/stage_1_audio/{script_id}/{scene['scene_id']}.wav")
+    if scene.get("audio_duration") is not None:
+        return scene["audio_duration"] + SILENCE_DURATION
+    if not audio_path.exists():
+        if scene["type"] == "source":
+            # 音声はないが timing 情報は使いたい
+            return scene["duration"]
+        print(f"⚠️ 音声ファイルなし: {scene['scene_id']}")
+        return None
+    return get_audio_duration(audio_path) + SILENCE_DURATION
+
+
+# 字幕ファイル（.srt / .json / .ass）を生成
+# タイムラインは common.subtitle_timeline で1回だけ組み立て、3形式とも同じイベント一覧から書き出す
+def generate_subtitles(timing_json_path: Path, output_dir: Path, script_id: str):
+    # 元となるタイミング情報を読み込み
+    with open(timing_json_path, "r", encoding="utf-8") as f:
+        timing_data = json.load(f)
+
+    # AI改行は全シーン分を同時に依頼する（シーンごとに順番に待たない）
+    line_breaks = prepare_line_breaks(timing_data)
+
+    def text_of(scene: dict) -> str:
+        # すべての改行をASS用改行に統一し、改行がないものは prepare_line_breaks で改行済みのものを使う
+        text = scene["text"].replace("\\n", "\n").replace("\n", r"\N")
+        if r"\N" in text:
+            return text
+        return line_breaks.get((scene["scene_id"], scene["type"]), text)
+
+    events = build_timeline(
+        timing_data,
+        duration_of=lambda scene: get_scene_duration(scene, script_id),
+        text_of=text_of,
+    )
+    write_outputs(events, output_dir, script_id, ASS_HEADER, ASS_STYLES, highlight_dict)
+
+
+# 字幕JSON（手で直したものなど）からASSだけを作り直す
+def generate_ass_from_json(json_path: Path, output_path: Path):
+    with open(json_path, "r", encoding="utf-8") as f:
+        scenes = json.load(f)
+
+    _, _, ass_events = render_outputs(scenes, ASS_STYLES, highlight_dict)
+
     output_path.parent.mkdir(parents=True, exist_ok=True)
     with open(output_path, "w", encoding="utf-8") as f:
-        f.write(ass_header)
+        f.write(ASS_HEADER)
         f.write("\n".join(ass_events))
 
     print(f"✅ ASS字幕保存: {output_path}")
 
 
 # メイン処理：引数があればそれを使用、なければ最古のscript_idを処理
-if __name__ == "__main__":
+def main(script_id: str = None):
     input_dir = Path("data_long/stage_1_audio")
     output_dir = Path("data_long/stage_4_subtitles")
 
     task_name = "subtitle"
-    script_id = parse_args_script_id() or get_next_script_id(task_name)
+    script_id = script_id or parse_args_script_id() or get_next_script_id(task_name)
     if script_id is None:
-        exit()
+        return
 
     input_path = input_dir / script_id / f"script_meta_{script_id}.json"
     if not input_path.exists():
         print(f"❌ 入力ファイルが見つかりません: {input_path}")
-        exit()
+        release_script_lease(script_id, task_name)
+        return
 
     generate_subtitles(input_path, output_dir, script_id)
-
-    # JSONファイルの出力先を明示的に定義
-    json_path = output_dir / f"subtitles_{script_id}.json"
-
-    generate_ass_from_json(
-        json_path=json_path,  # 生成済みsubtitle_jsonへのパス
-        output_path=output_dir / f"subtitles_{script_id}.ass"
-    )
     mark_script_completed(script_id, task_name)
 
+
+if __name__ == "__main__":
+    main()
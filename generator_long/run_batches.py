@@ -2,14 +2,13 @@ import sys
 import os
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
-import subprocess
 import time
 from pathlib import Path
-from common.script_utils import parse_args_script_id, get_next_script_id, mark_script_completed
+from common.script_utils import parse_args_script_id, get_next_script_id, mark_script_completed, lease_heartbeat
+from generator_long.fetch_images import fetch_all_images
 
 # 未処理の台本IDを取得
 task_name = "image"
-script_id = parse_args_script_id()
 
 def run_batches_for(script_id):
     json_path = Path(f"data_long/stage_3_prompt/prompts_{script_id}.json")
@@ -23,21 +22,13 @@ def run_batches_for(script_id):
     while True:
         print(f"\n🌀 バッチ実行: script_id={script_id}, index {start_index} 〜 {start_index + batch_size - 1}")
         try:
-            result = subprocess.run(
-                ["python", "generator_long/fetch_images.py",
-                 "--script_id", script_id,
-                 "--start_index", str(start_index),
-                 "--batch_size", str(batch_size)],
-                check=False
-            )
-
-            if result.returncode == 1:
+            # fetch_images をプロセス内で直接呼び出す（False = 残りバッチなし）
+            should_continue = fetch_all_images(json_path, script_id, start_index, batch_size)
+
+            if not should_continue:
                 print(f"✅ {script_id} の全バッチ処理が完了しました。")
                 mark_script_completed(script_id, task_name)
                 break
-            elif result.returncode != 0:
-                print(f"❌ {script_id} の処理で異常終了（コード {result.returncode}）しました。")
-                break
 
             start_index += batch_size
             print("💤 2秒休憩中...\n")
@@ -50,12 +41,20 @@ def run_batches_for(script_id):
             print(f"❌ バッチ実行中にエラーが発生しました: {type(e).__name__}: {e}")
             break
 
-if script_id:
-    run_batches_for(script_id)
-else:
+
+def main(script_id: str = None):
+    if script_id:
+        run_batches_for(script_id)
+        return
+
     while True:
         script_id = get_next_script_id(task_name)
         if not script_id:
             print("✅ 全ての台本に対して image タスクが完了しています。")
             break
-        run_batches_for(script_id)
\ No newline at end of file
+        with lease_heartbeat(script_id, task_name):
+            run_batches_for(script_id)
+
+
+if __name__ == "__main__":
+    main(parse_args_script_id())
@@ -1,13 +1,17 @@
-import subprocess
 import os
 import json
 import sys
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
+from common.generate_status import generate_status
 from common.script_utils import get_next_script_id
+from common.stage_runner import StageRunner
 
 # ステータスファイルを整備してから処理を開始
-subprocess.run(["python", "common/generate_status.py"])
+generate_status()  # 別プロセスを起動せずにプロセス内で実行
+
+# 各ステージはプロセス内で実行（import・クライアント生成は初回のみ）
+runner = StageRunner("generator_long")
 
 # タスクは audio が最初のステージ
 while True:
@@ -19,10 +23,9 @@ while True:
     print(f"▶️ 処理対象 script_id: {script_id}")
 
     # 各ステージを順番に実行
-    subprocess.run(["python", "generator_long/generate_audio.py", "--script_id", script_id])
-    subprocess.run(["python", "generator_long/tag_generator.py", "--script_id", script_id])
-    subprocess.run(["python", "generator_long/generate_sd_prompt.py", "--script_id", script_id])
-    subprocess.run(["python", "generator_long/generate_subtitles.py", "--script_id", script_id])
+    for stage in ["audio", "tag", "prompt", "subtitle"]:
+        runner.run(stage, script_id)
+    runner.report(script_id)
 
 
     print(f"[✓] script_id={script_id} に対する全処理が完了しました。\n")
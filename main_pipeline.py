@@ -4,6 +4,7 @@ import os
 from common.script_utils import resolve_latest_script_info
 from common.backup_script import backup_script
 from common.save_config import save_config_snapshot
+from common.stage_runner import StageRunner
 
 backup_script(__file__)
 save_config_snapshot()
@@ -16,16 +17,25 @@ def run_step(command: list[str], description: str):
         print(f"❌ エラー: {description} で失敗しました")
         sys.exit(1)
 
+def run_stage(runner: StageRunner, stage: str, script_id: str, description: str):
+    print(f"\n=== {description} ===")
+    if not runner.run(stage, script_id):
+        print(f"❌ エラー: {description} で失敗しました")
+        sys.exit(1)
+
 if __name__ == "__main__":
     info = resolve_latest_script_info()
     script_id = info["script_id"]
     print(f"[対象台本] script_id: {script_id}")
 
-    run_step(["python", "generator/generate_audio.py"], "音声生成")
-    run_step(["python", "generator/tag_generator.py"], "タグ生成")
-    run_step(["python", "generator/fetch_images.py"], "画像取得")
-    run_step(["python", "generator/generate_subtitles.py"], "字幕生成")
-    run_step(["python", "generator/compose_video.py"], "動画合成")
+    # generator配下のステージはプロセス内で実行
+    runner = StageRunner()
+    run_stage(runner, "audio", script_id, "音声生成")
+    run_stage(runner, "tag", script_id, "タグ生成")
+    run_stage(runner, "image", script_id, "画像取得")
+    run_stage(runner, "subtitle", script_id, "字幕生成")
+    run_stage(runner, "compose", script_id, "動画合成")
+    runner.report(script_id)
 
     run_step(["python", "generator/generate_thumbnail.py", script_id], "サムネイル生成")
     run_step(["python", "generator/generate_ed.py", script_id], "ED生成")
@@ -1,13 +1,12 @@
-import subprocess
 from common.script_utils import find_oldest_script_id
+from common.stage_runner import StageRunner
 from pathlib import Path
 
-def run_step(script, script_id):
-    cmd = ["python", f"generator/{script}.py", script_id]
-    print(f"▶️ 実行中: {script}.py ({script_id})")
-    result = subprocess.run(cmd)
-    if result.returncode != 0:
-        print(f"❌ エラー: {script}.py ({script_id})")
+runner = StageRunner()
+
+def run_step(stage, script_id):
+    # 各ステージは同一プロセス内で実行（import・クライアント生成は初回のみ）
+    if not runner.run(stage, script_id):
         exit(1)
 
 def check_existing_outputs(script_id):
@@ -31,12 +30,13 @@ def main():
     check_existing_outputs(script_id)  # ← ここで事前チェック
 
     # ステージ順に実行
-    run_step("generate_audio", script_id)
-    run_step("tag_generator", script_id)
-    run_step("generate_subtitles", script_id)
-    run_step("fetch_images", script_id)
-    run_step("compose_video", script_id)
+    run_step("audio", script_id)
+    run_step("tag", script_id)
+    run_step("subtitle", script_id)
+    run_step("image", script_id)
+    run_step("compose", script_id)
 
+    runner.report(script_id)
     print(f"✅ 完了: script_id = {script_id}")
 
 if __name__ == "__main__":
@@ -0,0 +1,86 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+from common.audio_mix import mix_down, write_wav
+from common.constants import SILENCE_DURATION
+
+# 音声ミックスダウン（moviepy の CompositeAudioClip vs NumPy）のベンチマーク
+# 使い方: python test/bench_audio_mix.py [シーン数]
+# ダミーのナレーション（24kHz モノラル）・BGM・効果音を一時ディレクトリに作って比較する
+
+
+def make_tone(path: Path, seconds: float, rate: int, channels: int, freq: float):
+    t = np.arange(int(seconds * rate)) / rate
+    tone = (0.3 * np.sin(2 * np.pi * freq * t)).astype(np.float32)[:, None]
+    write_wav(path, np.repeat(tone, channels, axis=1), rate)
+
+
+def make_plan(work_dir: Path, n_scenes: int) -> dict:
+    rng = np.random.default_rng(0)
+    narration = []
+    for i in range(n_scenes):
+        path = work_dir / f"scene_{i + 1:02}.wav"
+        make_tone(path, float(rng.uniform(1.5, 4.0)), 24000, 1, 220 + i)
+        narration.append({"path": path})
+
+    bgm_path = work_dir / "bgm.wav"
+    make_tone(bgm_path, 20.0, 44100, 2, 110)
+    se_path = work_dir / "se.wav"
+    make_tone(se_path, 1.0, 44100, 2, 880)
+
+    return {
+        "narration": narration,
+        "bgm": {"path": bgm_path, "volume": 0.02},
+        "se": [{"path": se_path, "start": 2.5 * i, "volume": 0.4} for i in range(n_scenes // 3)],
+    }
+
+
+def moviepy_mix(plan: dict, output_path: Path):
+    """
+    旧 compose_video と同じ組み立て（concatenate + 無音clip + audio_loop + CompositeAudioClip）
+    """
+    from moviepy.editor import AudioFileClip, AudioClip, CompositeAudioClip, concatenate_audioclips, afx
+
+    audio_clips = []
+    current_start = 0.0
+    for item in plan["narration"]:
+        audio_clip = AudioFileClip(str(item["path"]))
+        silence = AudioClip(make_frame=lambda t: [0], duration=SILENCE_DURATION, fps=44100).set_fps(44100)
+        audio_clip = concatenate_audioclips([audio_clip, silence])
+        end_time = current_start + audio_clip.duration
+        audio_clips.append(audio_clip.set_start(current_start).set_end(end_time))
+        current_start = end_time
+    final_audio = concatenate_audioclips(audio_clips)
+
+    bgm_clip = AudioFileClip(str(plan["bgm"]["path"]))
+    layers = [final_audio, afx.audio_loop(bgm_clip, duration=final_audio.duration).volumex(plan["bgm"]["volume"])]
+    for se in plan["se"]:
+        layers.append(AudioFileClip(str(se["path"])).set_start(se["start"]).volumex(se["volume"]))
+
+    CompositeAudioClip(layers).write_audiofile(str(output_path), fps=44100, logger=None)
+
+
+if __name__ == "__main__":
+    n_scenes = int(sys.argv[1]) if len(sys.argv) > 1 else 30
+    with tempfile.TemporaryDirectory() as tmp:
+        work_dir = Path(tmp)
+        plan = make_plan(work_dir, n_scenes)
+        print(f"🎧 ナレーション {n_scenes}本 / 効果音 {len(plan['se'])}回")
+
+        t0 = time.perf_counter()
+        duration = mix_down(plan, work_dir / "mixed_numpy.wav")
+        numpy_sec = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        moviepy_mix(plan, work_dir / "mixed_moviepy.wav")
+        moviepy_sec = time.perf_counter() - t0
+
+    print(f"moviepy: {moviepy_sec:.2f}秒 / NumPy: {numpy_sec:.2f}秒（音声 {duration:.1f}秒）")
+    print(f"⚡ 高速化: {moviepy_sec / numpy_sec:.1f}倍")
@@ -0,0 +1,53 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import tempfile
+import time
+
+from common.line_break import break_lines_concurrently
+from common.llm_cache import get_llm_cache
+
+import fake_openai_server
+
+# 字幕のAI改行（1件ずつ順番 vs 非同期で同時 vs キャッシュ済み）の比較。ダミーOpenAIサーバーに対して実行する
+# 使い方: python test/bench_line_break.py [シーン数] [応答時間(秒)]
+
+if __name__ == "__main__":
+    n_scenes = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    delay = float(sys.argv[2]) if len(sys.argv) > 2 else 0.5
+
+    server = fake_openai_server.start_in_thread(delay=delay)
+    os.environ["OPENAI_BASE_URL"] = f"http://127.0.0.1:{server.server_port}/v1"
+    os.environ.setdefault("OPENAI_API_KEY", "dummy")
+
+    def use_fresh_cache():
+        os.environ["LLM_CACHE_DIR"] = tempfile.mkdtemp(prefix="llm_cache_")
+        get_llm_cache.cache_clear()
+
+    texts = {(f"scene_{i:02}", "summary"): f"これは{i}番目のシーンの字幕テキストです" for i in range(1, n_scenes + 1)}
+
+    use_fresh_cache()
+    t0 = time.perf_counter()
+    sequential = {}
+    for key, text in texts.items():
+        sequential.update(break_lines_concurrently({key: text}, "改行してください", concurrency=1))
+    sequential_sec = time.perf_counter() - t0
+
+    use_fresh_cache()
+    fake_openai_server.stats["max_concurrent"] = 0
+    t0 = time.perf_counter()
+    concurrent = break_lines_concurrently(texts, "改行してください", rate_per_minute=3000)
+    concurrent_sec = time.perf_counter() - t0
+
+    # 同じ内容の再実行（キャッシュから返る）
+    t0 = time.perf_counter()
+    replayed = break_lines_concurrently(texts, "改行してください")
+    cached_sec = time.perf_counter() - t0
+
+    assert concurrent == sequential == replayed, "シーンとの対応づけが一致しません"
+    assert all(r"\N" in text for text in concurrent.values())
+    print(f"順番: {sequential_sec:.2f}秒 / 同時: {concurrent_sec:.2f}秒"
+          f"（最大同時接続 {fake_openai_server.stats['max_concurrent']}）")
+    print(f"⚡ 高速化: {sequential_sec / concurrent_sec:.1f}倍 / 再実行（キャッシュ）: {cached_sec:.2f}秒")
+    server.shutdown()
@@ -0,0 +1,67 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import random
+import time
+from pathlib import Path
+
+from common import misread_dict
+from common.misread_dict import MISREAD_REPLACEMENTS, apply_misread_corrections
+
+# 読み間違い補正（str.replace ループ vs 正規表現1パス）のベンチマーク
+# 使い方: python test/bench_misread.py [追加する辞書エントリ数]
+
+SCRIPTS_DIR = Path(__file__).resolve().parents[1] / "scripts"
+
+
+def legacy_apply(text: str, replacements: dict) -> str:
+    for wrong, corrected in replacements.items():
+        text = text.replace(wrong, corrected)
+    return text
+
+
+def load_corpus() -> list[str]:
+    lines = []
+    for path in sorted(SCRIPTS_DIR.rglob("*.txt")):
+        lines.extend(line for line in path.read_text(encoding="utf-8").splitlines() if line.strip())
+    return lines
+
+
+def add_dummy_entries(count: int):
+    # 実在しない漢字列を登録して辞書サイズだけを増やす
+    rng = random.Random(0)
+    entries = {}
+    for _ in range(count):
+        key = "".join(chr(rng.randint(0x4E00, 0x9FFF)) for _ in range(rng.randint(2, 5)))
+        if key not in MISREAD_REPLACEMENTS:
+            entries[key] = "だみー"
+    MISREAD_REPLACEMENTS.update(entries)
+
+
+def bench(label: str, func, lines: list[str]) -> float:
+    t0 = time.perf_counter()
+    for line in lines:
+        func(line)
+    elapsed = time.perf_counter() - t0
+    print(f"{label:<24} {elapsed * 1000:9.1f}ms（{elapsed / len(lines) * 1e6:7.1f}µs/行）")
+    return elapsed
+
+
+if __name__ == "__main__":
+    extra = int(sys.argv[1]) if len(sys.argv) > 1 else 0
+    lines = load_corpus()
+    add_dummy_entries(extra)
+    print(f"📚 コーパス: {len(lines)}行 / 辞書: {len(MISREAD_REPLACEMENTS)}件")
+
+    t0 = time.perf_counter()
+    misread_dict.reload_misread_dict()
+    print(f"{'正規表現の生成':<24} {(time.perf_counter() - t0) * 1000:9.1f}ms")
+
+    snapshot = dict(MISREAD_REPLACEMENTS)
+    legacy = bench("str.replace ループ", lambda text: legacy_apply(text, snapshot), lines)
+    compiled = bench("正規表現1パス", apply_misread_corrections, lines)
+    print(f"⚡ 高速化: {legacy / compiled:.1f}倍")
+
+    diff = sum(1 for line in lines if legacy_apply(line, snapshot) != apply_misread_corrections(line))
+    print(f"🔍 結果が異なる行: {diff}行（連鎖置換・登録順依存の解消による差分）")
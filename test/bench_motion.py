@@ -0,0 +1,97 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import time
+
+import numpy as np
+from PIL import Image
+
+from common.motion import PrecomputedMotion, EFFECTS
+
+# パン・ズームのフレーム生成速度（旧 make_cropper + フレームごとのリサイズ vs 事前計算）
+# 使い方: python test/bench_motion.py [秒数]
+
+FPS = 30
+SRC_SIZE = 1024
+FRAME_SIZE = (720, 720)
+
+
+# ---- 旧実装（compose_video.make_offset_func / make_cropper + moviepy の resize 相当） ----
+def legacy_funcs(effect: str, duration: float, offset: int = 50):
+    move = lambda t: offset * (1 - 2 * t / duration)
+    zero = lambda t: 0
+    scale = None
+    if effect == "pan_up":
+        fx, fy = zero, move
+    elif effect == "pan_down":
+        fx, fy = zero, lambda t: -move(t)
+    elif effect == "pan_left":
+        fx, fy = move, zero
+    elif effect == "pan_right":
+        fx, fy = lambda t: -move(t), zero
+    elif effect == "pan_diag":
+        fx, fy = lambda t: -move(t), lambda t: -move(t)
+    else:
+        fx, fy = zero, zero
+        if effect == "zoom_in":
+            scale = lambda t: 1.0 + 0.1 * (t / duration)
+        elif effect == "zoom_out":
+            scale = lambda t: 1.1 - 0.1 * (t / duration)
+    return fx, fy, scale
+
+
+def legacy_frame(image: np.ndarray, t: float, duration: float, fx, fy, scale) -> np.ndarray:
+    t = min(t, duration)
+    zoom = scale(t) if scale else 1.0
+    crop_half = int(360 / zoom)
+    x_center = 512 + int(fx(t))
+    y_center = 512 + int(fy(t))
+    cropped = image[
+        y_center - crop_half:y_center + crop_half,
+        x_center - crop_half:x_center + crop_half
+    ]
+    return np.array(Image.fromarray(cropped).resize(FRAME_SIZE, Image.LANCZOS))
+
+
+def psnr(a: np.ndarray, b: np.ndarray) -> float:
+    mse = np.mean((a.astype(np.float64) - b.astype(np.float64)) ** 2)
+    return float("inf") if mse == 0 else 10 * np.log10(255 ** 2 / mse)
+
+
+def bench(label: str, produce, n_frames: int) -> float:
+    t0 = time.perf_counter()
+    for i in range(n_frames):
+        produce(i / FPS)
+    elapsed = time.perf_counter() - t0
+    fps = n_frames / elapsed
+    print(f"  {label:<12} {fps:9.1f} fps")
+    return fps
+
+
+if __name__ == "__main__":
+    duration = float(sys.argv[1]) if len(sys.argv) > 1 else 5.0
+    n_frames = int(duration * FPS)
+    image = np.random.default_rng(0).integers(0, 256, (SRC_SIZE, SRC_SIZE, 3), dtype=np.uint8)
+    print(f"🖼️ 元画像 {SRC_SIZE}x{SRC_SIZE} → {FRAME_SIZE[0]}x{FRAME_SIZE[1]} / {duration}秒（{n_frames}フレーム）")
+
+    for effect in EFFECTS:
+        print(f"[{effect}]")
+        fx, fy, scale = legacy_funcs(effect, duration)
+        legacy = bench("旧実装", lambda t: legacy_frame(image, t, duration, fx, fy, scale), n_frames)
+
+        t0 = time.perf_counter()
+        motion = PrecomputedMotion(image, effect, duration, FRAME_SIZE, FPS)
+        setup_ms = (time.perf_counter() - t0) * 1000
+        # moviepy がフレームを書き出す前に行う連続メモリ化（スライスのビュー → 実体）も含めて計測
+        fast = bench("事前計算", lambda t: np.ascontiguousarray(motion.frame_at(t)), n_frames)
+        print(f"  ⚡ {fast / legacy:.1f}倍（事前計算 {setup_ms:.1f}ms）")
+
+        if not motion.sliceable:
+            # ズームは補間方式ごとに、旧実装（LANCZOS）との画質差（PSNR）も比較する
+            nearest = PrecomputedMotion(image, effect, duration, FRAME_SIZE, FPS, sampling="nearest")
+            bench("最近傍", lambda t: nearest.frame_at(t), n_frames)
+            t = duration / 2
+            reference = legacy_frame(image, t, duration, fx, fy, scale)
+            for label, m in (("双線形", motion), ("最近傍", nearest)):
+                print(f"  {label} PSNR: {psnr(reference, m.frame_at(t)):.1f}dB")
@@ -0,0 +1,78 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import time
+from pathlib import Path
+
+from common.clients import get_tagger
+from common.reading import normalize_reading
+
+# 読み変換（generate_audio.normalize_tts_text の後半）のマイクロベンチマーク
+# 使い方: python test/bench_reading.py [繰り返し回数]
+
+SCRIPTS_DIR = Path(__file__).resolve().parents[1] / "scripts"
+
+tagger = get_tagger()
+
+
+# ---- 旧実装（形態素解析2回 + 1文字ずつのカナ変換） ----
+def legacy_fix_particle_pronunciation(text: str) -> str:
+    result = []
+    for token in tagger(text):
+        surface = token.surface
+        if token.feature[0] == '助詞' and surface in ('は', 'へ', 'を'):
+            result.append({'は': 'わ', 'へ': 'え', 'を': 'お'}[surface])
+            continue
+        result.append(surface)
+    return ''.join(result)
+
+
+def legacy_convert_to_hiragana(text: str) -> str:
+    return "".join([word.feature.kana if word.feature.kana else word.surface for word in tagger(text)])
+
+
+def legacy_kata_to_hira(text: str) -> str:
+    return ''.join(
+        chr(ord(char) - 0x60) if 'ァ' <= char <= 'ン' else char
+        for char in text
+    )
+
+
+def legacy_normalize(text: str) -> str:
+    text = legacy_fix_particle_pronunciation(text)
+    return legacy_kata_to_hira(legacy_convert_to_hiragana(text))
+
+
+def load_corpus() -> list[str]:
+    lines = []
+    for path in sorted(SCRIPTS_DIR.rglob("*.txt")):
+        for line in path.read_text(encoding="utf-8").splitlines():
+            line = line.strip()
+            if line and not line.startswith("["):
+                lines.append(line)
+    return lines
+
+
+def bench(label: str, func, lines: list[str], repeat: int) -> float:
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        for line in lines:
+            func(line)
+    elapsed = time.perf_counter() - t0
+    print(f"{label:<28} {elapsed:8.3f}秒（{elapsed / (len(lines) * repeat) * 1e6:7.1f}µs/行）")
+    return elapsed
+
+
+if __name__ == "__main__":
+    repeat = int(sys.argv[1]) if len(sys.argv) > 1 else 3
+    lines = load_corpus()
+    print(f"📚 コーパス: {len(lines)}行 × {repeat}回")
+
+    legacy = bench("旧実装（2パス）", legacy_normalize, lines, repeat)
+    fused = bench("1パス（キャッシュなし）", normalize_reading.__wrapped__, lines, repeat)
+    normalize_reading.cache_clear()
+    cached = bench("1パス + LRUキャッシュ", normalize_reading, lines, repeat)
+
+    print(f"⚡ 高速化: 1パス {legacy / fused:.2f}倍 / キャッシュ込み {legacy / cached:.2f}倍")
+    print(f"📊 キャッシュ: {normalize_reading.cache_info()}")
@@ -0,0 +1,82 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import subprocess
+import tempfile
+import time
+import wave
+from pathlib import Path
+
+from common import audio_meta
+
+# 字幕ステージの音声長取得（librosa.load + get_duration vs WAVヘッダ読み取り）の比較
+# - 起動時間: 各モジュールを import するだけの別プロセスの実行時間
+# - 1シーンあたり: VOICEVOX と同じ形式（24kHz / 16bit / mono）のダミーWAVで計測
+# 使い方: python test/bench_subtitle_duration.py [シーン数] [1シーンの秒数]
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+
+
+def import_seconds(statement: str, repeat: int = 3) -> float | None:
+    """
+    新しいプロセスで statement を実行するのにかかった時間（最小値）。失敗したら None
+    """
+    best = None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        result = subprocess.run([sys.executable, "-c", statement], cwd=ROOT_DIR, capture_output=True)
+        elapsed = time.perf_counter() - t0
+        if result.returncode != 0:
+            return None
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def write_dummy_wav(path: Path, seconds: float, sample_rate: int = 24000):
+    with wave.open(str(path), "wb") as wf:
+        wf.setnchannels(1)
+        wf.setsampwidth(2)
+        wf.setframerate(sample_rate)
+        wf.writeframes(b"\x00\x00" * int(seconds * sample_rate))
+
+
+if __name__ == "__main__":
+    n_scenes = int(sys.argv[1]) if len(sys.argv) > 1 else 40
+    seconds = float(sys.argv[2]) if len(sys.argv) > 2 else 6.0
+
+    # ---- 起動時間 ----
+    baseline = import_seconds("pass")
+    header_import = import_seconds("import common.audio_meta")
+    librosa_import = import_seconds("import librosa")
+    print(f"🚀 起動: python のみ {baseline:.2f}秒 / audio_meta {header_import:.2f}秒 / "
+          + (f"librosa {librosa_import:.2f}秒" if librosa_import is not None else "librosa 未インストール"))
+
+    # ---- 1シーンあたりの長さ取得 ----
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = []
+        for i in range(n_scenes):
+            path = Path(tmp) / f"scene_{i:03}.wav"
+            write_dummy_wav(path, seconds)
+            paths.append(path)
+
+        t0 = time.perf_counter()
+        header_durations = [audio_meta.read_wav_header(path).duration for path in paths]
+        header_sec = time.perf_counter() - t0
+        print(f"📏 WAVヘッダ: {header_sec / n_scenes * 1000:.3f}ms/シーン（{n_scenes}シーン）")
+
+        try:
+            from librosa import load, get_duration
+        except ImportError:
+            print("⚠️ librosa がないため旧実装（librosa.load）は計測しません")
+        else:
+            t0 = time.perf_counter()
+            librosa_durations = []
+            for path in paths:
+                y, sr = load(path, sr=None)
+                librosa_durations.append(get_duration(y=y, sr=sr))
+            librosa_sec = time.perf_counter() - t0
+
+            assert all(abs(a - b) < 1e-6 for a, b in zip(header_durations, librosa_durations)), "長さが一致しません"
+            print(f"📏 librosa.load: {librosa_sec / n_scenes * 1000:.3f}ms/シーン")
+            print(f"⚡ 高速化: {librosa_sec / header_sec:.0f}倍")
@@ -0,0 +1,77 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import random
+import time
+
+from common.subtitle_timeline import build_timeline, next_title_indices, render_outputs
+
+# 字幕タイムラインの「次の title 探し」（旧: title ごとに timing_data[i:] を走査 vs 新: 後ろから1回）の比較
+# シーン数を増やしたときに、旧実装だけ時間が二乗で伸びることを確認する
+# 使い方: python test/bench_subtitle_timeline.py [titleの割合]
+
+
+def make_timing(n_scenes: int, title_ratio: float, seed: int = 0) -> list:
+    rng = random.Random(seed)
+    timing = []
+    t = 0.0
+    for i in range(n_scenes):
+        scene_type = "title" if rng.random() < title_ratio else "summary"
+        duration = round(rng.uniform(1, 5), 2)
+        timing.append({"scene_id": f"scene_{i:05}", "type": scene_type, "text": f"字幕{i}",
+                       "start_sec": round(t, 2), "duration": duration, "audio_duration": duration})
+        t += duration
+    return timing
+
+
+# ---- 旧実装（generate_subtitles 内の次の title 探し） ----
+def legacy_next_title_starts(timing_data: list) -> list:
+    starts = []
+    for i, scene in enumerate(timing_data, start=1):
+        if scene["type"] != "title":
+            continue
+        next_title_start = None
+        for future_scene in timing_data[i:]:
+            if future_scene["type"] == "title":
+                next_title_start = future_scene["start_sec"]
+                break
+        if next_title_start is None:
+            last_scene = timing_data[-1]
+            next_title_start = last_scene["start_sec"] + last_scene["duration"]
+        starts.append(next_title_start)
+    return starts
+
+
+def new_next_title_starts(timing_data: list) -> list:
+    last_scene = timing_data[-1]
+    timeline_end = last_scene["start_sec"] + last_scene["duration"]
+    next_title = next_title_indices(timing_data)
+    return [timing_data[k]["start_sec"] if k is not None else timeline_end
+            for i, k in enumerate(next_title) if timing_data[i]["type"] == "title"]
+
+
+if __name__ == "__main__":
+    title_ratio = float(sys.argv[1]) if len(sys.argv) > 1 else 0.2
+
+    for n_scenes in (500, 2000, 8000, 32000):
+        timing = make_timing(n_scenes, title_ratio)
+
+        t0 = time.perf_counter()
+        legacy = legacy_next_title_starts(timing)
+        legacy_sec = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        new = new_next_title_starts(timing)
+        new_sec = time.perf_counter() - t0
+        assert legacy == new, "次の title の開始時刻が一致しません"
+
+        # タイムライン全体（イベント組み立て + SRT/JSON/ASS の文字列化）
+        t0 = time.perf_counter()
+        events = build_timeline(timing, duration_of=lambda scene: scene["audio_duration"],
+                                text_of=lambda scene: scene["text"])
+        render_outputs(events, {}, {})
+        total_sec = time.perf_counter() - t0
+
+        print(f"{n_scenes:>6}シーン: 次のtitle探し 旧 {legacy_sec * 1000:8.1f}ms / 新 {new_sec * 1000:6.1f}ms"
+              f" | タイムライン全体 {total_sec * 1000:7.1f}ms")
@@ -0,0 +1,96 @@
+import argparse
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# OpenAI互換の chat.completions を返すダミーサーバー（字幕のAI改行などの動作確認用）
+# 使い方:
+#   python test/fake_openai_server.py --port 8010 --delay 1.0
+#   OPENAI_BASE_URL=http://127.0.0.1:8010/v1 OPENAI_API_KEY=dummy python generator/generate_subtitles.py --script_id xxx
+# 応答: user メッセージが {"text": ...} なら文の中ほどに \N を入れて返す。それ以外はそのまま返す。
+
+stats = {"requests": 0, "max_concurrent": 0}
+_active = 0
+_lock = threading.Lock()
+
+
+def fake_reply(messages: list) -> str:
+    content = messages[-1]["content"] if messages else ""
+    try:
+        text = json.loads(content)["text"]
+    except (ValueError, KeyError, TypeError):
+        return content
+    middle = len(text) // 2
+    return text[:middle] + r"\N" + text[middle:]
+
+
+class FakeOpenAIHandler(BaseHTTPRequestHandler):
+    delay = 0.0
+
+    def do_POST(self):
+        global _active
+        if not self.path.rstrip("/").endswith("/chat/completions"):
+            self.send_response(404)
+            self.end_headers()
+            return
+
+        length = int(self.headers.get("Content-Length", 0))
+        request = json.loads(self.rfile.read(length).decode("utf-8") or "{}")
+        with _lock:
+            stats["requests"] += 1
+            _active += 1
+            stats["max_concurrent"] = max(stats["max_concurrent"], _active)
+        try:
+            time.sleep(self.delay)
+            body = json.dumps({
+                "id": f"chatcmpl-fake-{stats['requests']}",
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": request.get("model", "fake"),
+                "choices": [{
+                    "index": 0,
+                    "message": {"role": "assistant", "content": fake_reply(request.get("messages", []))},
+                    "finish_reason": "stop",
+                }],
+                "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0},
+            }, ensure_ascii=False).encode("utf-8")
+        finally:
+            with _lock:
+                _active -= 1
+
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_in_thread(port: int = 0, delay: float = 0.0) -> ThreadingHTTPServer:
+    """
+    ベンチマーク・動作確認スクリプトから使う（port=0 なら空いているポート）
+    """
+    FakeOpenAIHandler.delay = delay
+    server = ThreadingHTTPServer(("127.0.0.1", port), FakeOpenAIHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--port", type=int, default=8010)
+    parser.add_argument("--delay", type=float, default=1.0, help="1リクエストあたりの疑似応答時間（秒）")
+    args = parser.parse_args()
+
+    FakeOpenAIHandler.delay = args.delay
+    server = ThreadingHTTPServer(("127.0.0.1", args.port), FakeOpenAIHandler)
+    print(f"🧪 ダミーOpenAI起動: http://127.0.0.1:{args.port}/v1（delay={args.delay}秒）")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        print(f"📊 リクエスト数: {stats}")
@@ -0,0 +1,93 @@
+import argparse
+import io
+import json
+import threading
+import time
+import wave
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+# generate_audio.py の動作確認用のダミーVOICEVOXエンジン
+# 使い方:
+#   python test/fake_voicevox_server.py --port 50021 --delay 0.5
+#   VOICEVOX_ENGINE_URL=http://localhost:50021 python generator/generate_audio.py --script_id xxx
+
+SAMPLE_RATE = 24000
+SECONDS_PER_CHAR = 0.1
+
+stats = {"audio_query": 0, "synthesis": 0, "max_concurrent": 0}
+_active = 0
+_lock = threading.Lock()
+
+
+def make_silent_wav(seconds: float) -> bytes:
+    buf = io.BytesIO()
+    with wave.open(buf, "wb") as wf:
+        wf.setnchannels(1)
+        wf.setsampwidth(2)
+        wf.setframerate(SAMPLE_RATE)
+        wf.writeframes(b"\x00\x00" * int(SAMPLE_RATE * seconds))
+    return buf.getvalue()
+
+
+class FakeVoicevoxHandler(BaseHTTPRequestHandler):
+    delay = 0.0
+
+    def _send(self, body: bytes, content_type: str):
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        global _active
+        url = urlparse(self.path)
+        params = parse_qs(url.query)
+        length = int(self.headers.get("Content-Length", 0))
+        payload = self.rfile.read(length) if length else b""
+
+        if url.path == "/audio_query":
+            text = params.get("text", [""])[0]
+            with _lock:
+                stats["audio_query"] += 1
+            self._send(json.dumps({"text": text}, ensure_ascii=False).encode("utf-8"), "application/json")
+            return
+
+        if url.path == "/synthesis":
+            query = json.loads(payload.decode("utf-8") or "{}")
+            with _lock:
+                stats["synthesis"] += 1
+                _active += 1
+                stats["max_concurrent"] = max(stats["max_concurrent"], _active)
+            try:
+                time.sleep(self.delay)
+                seconds = len(query.get("text", "")) * SECONDS_PER_CHAR / query.get("speedScale", 1.0)
+                self._send(make_silent_wav(seconds), "audio/wav")
+            finally:
+                with _lock:
+                    _active -= 1
+            return
+
+        self.send_response(404)
+        self.end_headers()
+
+    def log_message(self, format, *args):
+        pass
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--port", type=int, default=50021)
+    parser.add_argument("--delay", type=float, default=0.5, help="合成1回あたりの疑似処理時間（秒）")
+    args = parser.parse_args()
+
+    FakeVoicevoxHandler.delay = args.delay
+    server = ThreadingHTTPServer(("127.0.0.1", args.port), FakeVoicevoxHandler)
+    print(f"🧪 ダミーVOICEVOX起動: http://127.0.0.1:{args.port}（delay={args.delay}秒）")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        print(f"📊 リクエスト数: {stats}")
@@ -19,7 +19,7 @@ import sys
 import os
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
-from common.script_utils import get_next_script_id, mark_script_completed  # 追加
+from common.script_utils import get_next_script_id, mark_script_completed, release_script_lease  # 追加
 
 
 # 認証とYouTube APIのスコープ
@@ -165,6 +165,7 @@ def main():
 
     if not video_path.exists():
         print(f"❌ 動画ファイルが存在しません: {video_path}")  # ★修正
+        release_script_lease(script_id, task_name)
         return
 
     title = extract_main_title(meta_path)
@@ -183,6 +184,7 @@ def main():
         success = True
     except Exception as e:
         print(f"❌ アップロード失敗: {e}")
+        release_script_lease(script_id, task_name)
         return
 
     extract_thumbnail(base_dir / "final.mp4", base_dir / "thumbnail.jpg")